@@ -723,7 +723,7 @@ async function loadBusArrivals() {
   const card = document.getElementById('busInfoCard');
   if (!card) return;
   try {
-    const response = await fetch(new URL('api/bus/arrivals?t=' + Date.now(), window.location.href), { cache: 'no-store' });
+    const response = await fetch(new URL('api/bus/arrivals', window.location.href), { cache: 'no-cache' });
     const data = await response.json();
     if (!response.ok) throw new Error(data.note || '버스 정보 조회 실패');
     renderBusArrivals(data);
@@ -809,7 +809,7 @@ async function loadSubwayArrivals() {
   const card = document.getElementById('subwayInfoCard');
   if (!card) return;
   try {
-    const response = await fetch(new URL('api/subway/arrivals?t=' + Date.now(), window.location.href), { cache: 'no-store' });
+    const response = await fetch(new URL('api/subway/arrivals', window.location.href), { cache: 'no-cache' });
     const data = await response.json();
     if (!response.ok) throw new Error(data.note || '지하철 정보 조회 실패');
     renderSubwayArrivals(data);
@@ -827,6 +827,28 @@ async function loadSubwayArrivals() {
   }
 }
 
+// 지하철은 SSE 스트림으로 변경분만 받고, 스트림이 끊겨 있는 동안에만 30초 폴링으로 대체합니다.
+let subwayStreamLive = false;
+
+function startSubwayStream() {
+  if (!window.EventSource) return;
+  const stream = new EventSource(new URL('api/subway/stream', window.location.href));
+  stream.addEventListener('subway', (event) => {
+    subwayStreamLive = true;
+    try {
+      renderSubwayArrivals(JSON.parse(event.data));
+    } catch (error) {
+      console.warn('subway stream event skipped', error);
+    }
+  });
+  stream.addEventListener('open', () => {
+    subwayStreamLive = true;
+  });
+  stream.addEventListener('error', () => {
+    subwayStreamLive = false;
+  });
+}
+
 const SUINBUNDANG_STATIONS = ['청량리','왕십리','서울숲','압구정로데오','강남구청','선정릉','선릉','한티','도곡','구룡','개포동','대모산입구','수서','복정','가천대','태평','모란','야탑','이매','서현','수내','정자','미금','오리','죽전','보정','구성','신갈','기흥','상갈','청명','영통','망포','매탄권선','수원시청','매교','수원','고색','오목천','어천','야목','사리','한대앞','중앙','고잔','초지','안산','신길온천','정왕','오이도','달월','월곶','소래포구','인천논현','호구포','남동인더스파크','원인재','연수','송도','인하대','숭의','신포','인천'];
 
 
@@ -1062,7 +1084,7 @@ async function loadWeatherInfo() {
   const card = document.getElementById('weatherCard');
   if (!card) return;
   try {
-    const response = await fetch(new URL('api/weather?t=' + Date.now(), window.location.href), { cache: 'no-store' });
+    const response = await fetch(new URL('api/weather', window.location.href), { cache: 'no-cache' });
     const data = await response.json();
     if (!response.ok) throw new Error(data.note || '날씨 정보 조회 실패');
     renderWeatherInfo(data);
@@ -1133,11 +1155,13 @@ function renderWeatherInfo(data) {
 }
 
 
-async function setupAdminMetricsTab() {
+async function setupAdminMetricsTab(me = null) {
   try {
-    const meResponse = await fetch(new URL('api/portal/me?t=' + Date.now(), window.location.href), { cache: 'no-store' });
-    if (!meResponse.ok) return;
-    const me = await meResponse.json();
+    if (!me) {
+      const meResponse = await fetch(new URL('api/portal/me?t=' + Date.now(), window.location.href), { cache: 'no-store' });
+      if (!meResponse.ok) return;
+      me = await meResponse.json();
+    }
     if (me.role !== 'admin') return;
     const tabs = document.querySelector('.transport-tabs');
     const tabsCard = document.querySelector('.transport-tabs-card');
@@ -1230,14 +1254,35 @@ async function loadAdminMetrics() {
   }
 }
 
+// 첫 화면은 /api/dashboard 한 번으로 그리고, 실패한 섹션만 개별 API로 다시 불러옵니다.
+async function loadDashboard() {
+  let sections = {};
+  try {
+    const response = await fetch(new URL('api/dashboard', window.location.href), { cache: 'no-cache' });
+    if (!response.ok) throw new Error(`HTTP ${response.status}`);
+    sections = (await response.json()).sections || {};
+  } catch (error) {
+    console.log('대시보드 로딩 실패:', error);
+  }
+  const ready = (name) => sections[name] && sections[name].data && !sections[name].error;
+
+  if (ready('tide')) {
+    lastOceanData = { today: sections.tide.data.today, tomorrow: sections.tide.data.tomorrow };
+    displayOceanData(lastOceanData.today, lastOceanData.tomorrow);
+  } else {
+    loadOceanData(false);
+  }
+  if (ready('bus')) renderBusArrivals(sections.bus.data); else loadBusArrivals();
+  if (ready('subway')) renderSubwayArrivals(sections.subway.data); else loadSubwayArrivals();
+  if (ready('weather')) renderWeatherInfo(sections.weather.data); else loadWeatherInfo();
+  setupAdminMetricsTab(sections.me ? sections.me.data : null);
+}
+
 // 초기 로드 및 주기적 업데이트
 document.addEventListener('DOMContentLoaded', function() {
     lastKstDateKey = kstDateKeyFormatter.format(new Date());
-    loadOceanData(false);
-    loadBusArrivals();
-    loadSubwayArrivals();
-    loadWeatherInfo();
-    setupAdminMetricsTab();
+    loadDashboard();
+    startSubwayStream();
     startMinuteTicker();
     
     // 조수 원본 JSON은 1시간마다만 다시 받고, 현재 수위/남은 시간은 1분 ticker가 계속 재계산합니다.
@@ -1251,7 +1296,7 @@ document.addEventListener('DOMContentLoaded', function() {
     }, 60 * 1000);
 
     setInterval(() => {
-        loadSubwayArrivals();
+        if (!subwayStreamLive) loadSubwayArrivals();
     }, 30 * 1000);
 
     setInterval(() => {
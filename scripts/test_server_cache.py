@@ -0,0 +1,838 @@
+#!/usr/bin/env python3
+import gzip
+import importlib.util
+import io
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+spec = importlib.util.spec_from_file_location('server', ROOT / 'server.py')
+server = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(server)
+TMP_DATA = tempfile.TemporaryDirectory()
+server.DATA_DIR = Path(TMP_DATA.name)
+server.BUS_ROUTE_CACHE_PATH = server.DATA_DIR / 'bus_station_routes.json'
+server.VISIT_METRICS_PATH = server.DATA_DIR / 'visit_metrics.json'
+server.SUBWAY_EVENT_LOG = server.DATA_DIR / 'subway_events.jsonl'
+server.POST_WOLGOT_TRACKS_PATH = server.DATA_DIR / 'subway_post_wolgot_tracks.json'
+
+# Case 1: concurrent misses on a cold key call the factory exactly once.
+calls = []
+def slow_factory():
+    calls.append(1)
+    time.sleep(0.2)
+    return {'n': len(calls)}
+
+results = []
+threads = [threading.Thread(target=lambda: results.append(server.cached('t-cold', slow_factory, 60))) for _ in range(8)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert len(calls) == 1 and all(r == {'n': 1} for r in results), (calls, results)
+stats = server.cache_stats_snapshot()['t-cold']
+assert stats['refreshes'] == 1 and stats['coalesced'] + stats['hits'] == 7, stats
+
+# Case 2: while an expired key refreshes, other threads get the previous value.
+server.CACHE['t-expired'] = {'time': time.time() - 120, 'value': 'old'}
+started = threading.Event()
+def refresh_factory():
+    started.set()
+    time.sleep(0.2)
+    return 'new'
+leader = threading.Thread(target=lambda: results.append(server.cached('t-expired', refresh_factory, 60)))
+leader.start()
+started.wait()
+assert server.cached('t-expired', refresh_factory, 60) == 'old'
+leader.join()
+assert server.cached('t-expired', refresh_factory, 60) == 'new'
+
+# Case 3: a failed refresh is shared with waiters instead of retried by each.
+failures = []
+def failing_factory():
+    failures.append(1)
+    time.sleep(0.2)
+    raise RuntimeError('upstream down')
+errors = []
+def call_failing():
+    try:
+        server.cached('t-fail', failing_factory, 60)
+    except RuntimeError as exc:
+        errors.append(str(exc))
+threads = [threading.Thread(target=call_failing) for _ in range(4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+assert len(failures) == 1 and errors == ['upstream down'] * 4, (failures, errors)
+assert 't-fail' not in server.CACHE_FLIGHTS
+
+# Case 4: stale-while-revalidate answers immediately and refreshes in the background.
+server.CACHE['t-swr'] = {'time': time.time() - 90, 'value': 'stale'}
+def slow_fresh():
+    time.sleep(0.3)
+    return 'fresh'
+t0 = time.time()
+assert server.cached('t-swr', slow_fresh, 60, max_stale=60) == 'stale'
+assert time.time() - t0 < 0.1
+deadline = time.time() + 2
+while server.CACHE['t-swr']['value'] != 'fresh' and time.time() < deadline:
+    time.sleep(0.02)
+assert server.cached('t-swr', slow_fresh, 60, max_stale=60) == 'fresh'
+
+# Case 5: past the max-staleness bound the old value is dropped, not served.
+server.CACHE['t-too-old'] = {'time': time.time() - 200, 'value': 'ancient'}
+assert server.cached('t-too-old', lambda: 'refetched', 60, max_stale=60) == 'refetched'
+
+class FakeHandler:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+        self.status = None
+        self.sent = {}
+        self.wfile = io.BytesIO()
+
+    def send_response(self, status):
+        self.status = status
+
+    command = 'GET'
+
+    def send_header(self, key, value):
+        self.sent[key] = value
+
+    def end_headers(self):
+        pass
+
+# Case 6: cached payloads are encoded once and revalidated with ETag/304.
+fills = []
+def payload_factory():
+    fills.append(1)
+    return {'title': '월곶', 'n': 1}
+encoded = server.cached_json('t-etag', payload_factory, 60)
+assert server.cached_json('t-etag', payload_factory, 60) is encoded and len(fills) == 1
+h = FakeHandler()
+server.encoded_json_response(h, encoded)
+assert h.status == 200 and h.sent['ETag'] == encoded['etag'] and h.wfile.getvalue() == encoded['body'], h.sent
+h = FakeHandler({'If-None-Match': encoded['etag']})
+server.encoded_json_response(h, encoded)
+assert h.status == 304 and h.wfile.getvalue() == b'', h.status
+h = FakeHandler({'If-None-Match': '"other"'})
+server.encoded_json_response(h, encoded)
+assert h.status == 200
+
+# Case 7: large payloads are compressed once per fill and negotiated per request.
+big = server.encode_json_body({'stationTopology': server.WOLGOT_ROUTE * 20})
+assert 'gzip' in big['encodings'], big['encodings'].keys()
+h = FakeHandler({'Accept-Encoding': 'gzip, deflate'})
+server.encoded_json_response(h, big)
+assert h.sent['Content-Encoding'] == 'gzip' and gzip.decompress(h.wfile.getvalue()) == big['body'], h.sent
+h = FakeHandler({'Accept-Encoding': 'gzip', 'If-None-Match': big['encodings']['gzip']['etag']})
+server.encoded_json_response(h, big)
+assert h.status == 304
+h = FakeHandler({'Accept-Encoding': 'gzip;q=0, identity'})
+server.encoded_json_response(h, big)
+assert 'Content-Encoding' not in h.sent and h.wfile.getvalue() == big['body'], h.sent
+assert server.encode_json_body({'n': 1})['encodings'] == {}
+
+# Case 8: fingerprinted static assets are immutable only at their hashed URL.
+server.load_static_assets()
+index = server.STATIC_ASSETS['index.html']['body'].decode('utf-8')
+css_hash = server.STATIC_ASSETS['styles/ocean.css']['hash']
+assert f'styles/ocean.css?v={css_hash}' in index, index[:800]
+h = FakeHandler()
+server.send_static_asset(h, 'styles/ocean.css', f'v={css_hash}')
+assert h.status == 200 and h.sent['Cache-Control'] == server.STATIC_IMMUTABLE_CACHE_CONTROL, h.sent
+h = FakeHandler()
+server.send_static_asset(h, 'styles/ocean.css', 'v=8.1')
+assert h.sent['Cache-Control'] == 'no-cache', h.sent
+
+# Case 9: visit metrics are counted in memory and written only on flush.
+server.VISIT_METRICS_STATE['loaded'] = False
+for _ in range(5):
+    server.record_metric(FakeHandler(), 'bus')
+assert not server.VISIT_METRICS_PATH.exists()
+assert server.compact_metrics_for_admin()['total']['anonymous']['api:bus'] == 5
+server.flush_visit_metrics()
+saved = server.json.loads(server.VISIT_METRICS_PATH.read_text())
+assert saved['total']['anonymous']['api:bus'] == 5, saved
+
+# Case 10: bus stations are fetched concurrently and one failing stop stays partial.
+def fake_fetch_json(url, params):
+    time.sleep(0.2)
+    if params['stationId'] == server.DEFAULT_STATIONS[1]['stationId'] and url == server.GG_BASE_ARRIVAL:
+        raise RuntimeError('HTTP 500')
+    if url == server.GG_BASE_STATION_ROUTES:
+        return {'response': {'msgBody': {'busRouteList': [{'routeName': '20'}]}}}
+    return {'response': {'msgHeader': {'resultCode': 0}, 'msgBody': {'busArrivalList': [{'routeName': '20', 'predictTime1': 3}]}}}
+original_fetch_json = server.fetch_json
+server.fetch_json = fake_fetch_json
+server.os.environ['GYEONGGI_BUS_API_KEY'] = 'test'
+t0 = time.time()
+stations = server.fetch_bus_stations(server.DEFAULT_STATIONS)
+assert time.time() - t0 < 0.35, time.time() - t0
+assert stations[0]['arrivals'][0]['minutes'] == 3, stations[0]
+assert stations[1]['arrivals'] == [] and 'HTTP 500' in stations[1]['note'], stations[1]
+server.fetch_json = original_fetch_json
+del server.os.environ['GYEONGGI_BUS_API_KEY']
+
+# Case 11: station route lists are cached per stop (empty ones too) and kept
+# when a refresh fails, which is then not retried before its backoff ends.
+route_calls = []
+def routes_then_fail(url, params):
+    route_calls.append(url)
+    if len(route_calls) > 1:
+        raise RuntimeError('quota exceeded')
+    return {'response': {'msgBody': {'busRouteList': [{'routeName': '11-A'}]}}}
+server.fetch_json = routes_then_fail
+stop = {'stationId': 't-route-stop'}
+assert server.station_route_rows('k', stop) == [{'routeName': '11-A'}]
+assert server.station_route_rows('k', stop) == [{'routeName': '11-A'}] and len(route_calls) == 1
+assert 't-route-stop' in server.json.loads(server.BUS_ROUTE_CACHE_PATH.read_text())
+server.CACHE['bus-station-routes:t-route-stop']['time'] -= server.BUS_ROUTE_CACHE_TTL + 1
+assert server.station_route_rows('k', stop) == [{'routeName': '11-A'}]
+time.sleep(0.1)
+assert server.station_route_rows('k', stop) == [{'routeName': '11-A'}] and len(route_calls) == 2, route_calls
+assert server.station_route_rows('k', stop) == [{'routeName': '11-A'}]
+time.sleep(0.1)
+assert len(route_calls) == 2 and server.BUS_ROUTE_RETRY_AT['t-route-stop'] > time.time(), route_calls
+server.BUS_ROUTE_RETRY_AT['t-route-stop'] = 0
+server.station_route_rows('k', stop)
+time.sleep(0.1)
+assert len(route_calls) == 3, route_calls
+server.fetch_json = lambda url, params: {'response': {'msgHeader': {'resultCode': 4}, 'msgBody': {}}}
+assert server.station_route_rows('k', {'stationId': 't-empty-stop'}) == []
+assert server.CACHE['bus-station-routes:t-empty-stop']['value'] == []
+server.fetch_json = original_fetch_json
+
+# Case 12: upstream calls to one host reuse a pooled keep-alive connection.
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+connections = []
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        connections.append(self.client_address)
+        super().setup()
+
+    def do_GET(self):
+        body = b'{"ok": true}'
+        self.send_response(200 if 'fail' not in self.path else 500)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+upstream = ThreadingHTTPServer(('127.0.0.1', 0), Upstream)
+threading.Thread(target=upstream.serve_forever, daemon=True).start()
+base = f'http://127.0.0.1:{upstream.server_address[1]}'
+for n in range(3):
+    assert server.fetch_json(f'{base}/api', {'n': n}) == {'ok': True}
+assert len(connections) == 1, connections
+try:
+    server.upstream_json(f'{base}/fail')
+    raise AssertionError('HTTP 500 should raise')
+except server.urllib.error.HTTPError as exc:
+    assert exc.code == 500
+
+# Case 13: the asyncio engine shares CACHE, coalesces fills and keeps its
+# upstream connection alive across requests.
+async def async_checks():
+    fills = []
+    async def slow_fill():
+        fills.append(1)
+        await server.asyncio.sleep(0.05)
+        return 'async-value'
+    server.CACHE.pop('async-key', None)
+    values = await server.asyncio.gather(*(server.async_cached('async-key', slow_fill, ttl=10) for _ in range(5)))
+    assert values == ['async-value'] * 5 and len(fills) == 1
+    connections.clear()
+    for n in range(3):
+        assert await server.async_fetch_json(f'{base}/api', {'n': n}) == {'ok': True}
+    assert len(connections) == 1, connections
+    try:
+        await server.async_upstream_json(f'{base}/fail')
+        raise AssertionError('HTTP 500 should raise')
+    except server.urllib.error.HTTPError as exc:
+        assert exc.code == 500
+server.asyncio.run(async_checks())
+upstream.shutdown()
+
+# Case 14: the subway stream only publishes when arrivals or positions change.
+first = server.encode_json_body({'arrivals': [{'trainNo': '1'}], 'trainPositions': [], 'updatedAt': 'a'})
+same = server.encode_json_body({'arrivals': [{'trainNo': '1'}], 'trainPositions': [], 'updatedAt': 'b'})
+moved = server.encode_json_body({'arrivals': [{'trainNo': '1'}], 'trainPositions': [{'trainNo': '1'}], 'updatedAt': 'b'})
+assert server.publish_subway_stream(first)
+assert not server.publish_subway_stream(same)
+assert server.publish_subway_stream(moved)
+event_id, chunk = server.subway_stream_event()
+assert event_id == 2 and chunk.startswith(b'id: 2\nevent: subway\ndata: {') and chunk.endswith(b'\n\n')
+stream_handler = FakeHandler()
+stream_handler.headers['Last-Event-ID'] = '2'
+assert server.last_subway_stream_event_id(stream_handler, {}) == 2
+
+# Case 15: the dashboard returns every section with its own error and freshness.
+(server.DATA_DIR / 'tide_today.json').write_text('{"korean_date": "오늘"}')
+def failing_bus():
+    raise RuntimeError('bus down')
+def slow_weather():
+    time.sleep(0.5)
+    return {'payload': {'late': True}}
+originals = (server.bus_arrivals_encoded, server.subway_arrivals_encoded, server.weather_encoded, server.DASHBOARD_DEADLINE)
+server.bus_arrivals_encoded = failing_bus
+server.subway_arrivals_encoded = lambda debug_enabled=False: server.cached_json('subway-arrivals-wolgot', lambda: {'arrivals': []}, 60)
+server.weather_encoded = slow_weather
+server.DASHBOARD_DEADLINE = 0.2
+try:
+    h = FakeHandler()
+    server.handle_dashboard(h)
+finally:
+    server.bus_arrivals_encoded, server.subway_arrivals_encoded, server.weather_encoded, server.DASHBOARD_DEADLINE = originals
+sections = server.json.loads(h.wfile.getvalue())['sections']
+assert h.status == 200 and h.sent['Cache-Control'] == 'private, no-cache'
+assert sections['tide']['data'] == {'today': {'korean_date': '오늘'}, 'tomorrow': None}
+assert sections['bus']['error'] == 'bus down' and '불러오지 못했습니다' in sections['bus']['data']['note']
+assert sections['subway']['data'] == {'arrivals': []} and sections['subway']['updatedAt']
+assert sections['weather']['error'] and sections['weather']['data'] is None
+assert sections['me']['data'] == {'authenticated': False}
+server.CACHE.pop('subway-arrivals-wolgot', None)
+
+# Case 16: weather sources fill concurrently into their own caches and a slow
+# Windy call does not hold back the KMA view.
+kma_calls = []
+def fake_kma_request(url, params, deadline=None):
+    kma_calls.append(url)
+    time.sleep(0.1)
+    if url == server.KMA_ULTRA_NCST:
+        return [{'category': 'T1H', 'obsrValue': '21.5'}, {'category': 'REH', 'obsrValue': '60'}]
+    return [{'category': 'SKY', 'fcstDate': '20261016', 'fcstTime': '1200', 'fcstValue': '1'}]
+windy_started = threading.Event()
+def slow_windy():
+    windy_started.set()
+    time.sleep(0.6)
+    return {'windGustMs': 7.5, 'temperatureC': 21.0}
+server.kma_request = fake_kma_request
+server.fetch_windy_weather = slow_windy
+started = time.time()
+weather = server.fetch_weather()
+assert time.time() - started < 0.5 and weather['temperatureC'] == 21.5 and weather['windGustMs'] is None, weather
+assert len(kma_calls) == 2 and windy_started.is_set()
+time.sleep(0.7)
+weather = server.fetch_weather()
+assert weather['windGustMs'] == 7.5 and len(kma_calls) == 2, (weather, kma_calls)
+
+# Case 17: KMA sources follow the publish schedule: no refetch while the base
+# time is unchanged, and an unpublished base is probed with backoff.
+published = {'20261016': {'1000', '1100'}}
+probes = []
+def scheduled_kma_request(url, params, deadline=None):
+    probes.append(params['base_time'])
+    if params['base_time'] in published.get(params['base_date'], ()):
+        return [{'category': 'T1H', 'obsrValue': params['base_time']}]
+    return []
+server.kma_request = scheduled_kma_request
+server.KMA_SOURCE_STATE.pop('kma-ncst', None)
+at = lambda hhmm: server.datetime(2026, 10, 16, int(hhmm[:2]), int(hhmm[2:]), tzinfo=server.KST)
+assert server.kma_source('kma-ncst', server.KMA_ULTRA_NCST, at('1050'))['baseTime'] == '1000'
+assert server.kma_source('kma-ncst', server.KMA_ULTRA_NCST, at('1140'))['baseTime'] == '1000'
+assert probes == ['1000'], probes
+published['20261016'].discard('1100')
+assert server.kma_source('kma-ncst', server.KMA_ULTRA_NCST, at('1146'))['baseTime'] == '1000'
+assert server.kma_source('kma-ncst', server.KMA_ULTRA_NCST, at('1147'))['baseTime'] == '1000'
+assert probes == ['1000', '1100'], probes
+state = server.KMA_SOURCE_STATE['kma-ncst']
+assert state['backoff'] == server.KMA_PROBE_BACKOFF * 2 and state['probeAt'] > time.time()
+published['20261016'].add('1100')
+state['probeAt'] = 0
+assert server.kma_source('kma-ncst', server.KMA_ULTRA_NCST, at('1149'))['baseTime'] == '1100'
+assert state['backoff'] == server.KMA_PROBE_BACKOFF and probes == ['1000', '1100', '1100'], probes
+server.KMA_SOURCE_STATE.pop('kma-fcst', None)
+assert server.kma_source('kma-fcst', server.KMA_ULTRA_FCST, at('1250'))['baseTime'] == '1100'
+assert server.KMA_SOURCE_STATE['kma-fcst']['probeAt'] > time.time()
+
+# Case 18: a host that keeps failing trips its circuit breaker, later calls
+# fail fast, and one half-open probe decides whether it closes again.
+import socket
+probe_socket = socket.socket()
+probe_socket.bind(('127.0.0.1', 0))
+dead = f'http://127.0.0.1:{probe_socket.getsockname()[1]}'
+dead_netloc = server.urllib.parse.urlsplit(dead).netloc
+probe_socket.close()
+server.UPSTREAM_BREAKER_FAILURES = 2
+server.UPSTREAM_BREAKER_COOLDOWN = 0.2
+for _ in range(2):
+    try:
+        server.upstream_json(f'{dead}/api')
+        raise AssertionError('closed port should fail')
+    except ConnectionRefusedError:
+        pass
+started = time.time()
+try:
+    server.upstream_json(f'{dead}/api')
+    raise AssertionError('open breaker should fail fast')
+except server.UpstreamUnavailable:
+    pass
+assert time.time() - started < 0.05
+breaker = server.upstream_breaker_snapshot()[dead_netloc]
+assert breaker['state'] == 'open' and breaker['opened'] == 1 and breaker['rejected'] == 1, breaker
+time.sleep(0.25)
+try:
+    server.upstream_json(f'{dead}/api')
+    raise AssertionError('half-open probe should reach the host')
+except ConnectionRefusedError:
+    pass
+assert server.UPSTREAM_BREAKERS[dead_netloc]['cooldown'] == 0.4
+server.UPSTREAM_BREAKERS[dead_netloc]['retryAt'] = 0
+original_pooled = server.pooled_upstream_request
+server.pooled_upstream_request = lambda *args: b'{"ok": true}'
+assert server.upstream_json(f'{dead}/api') == {'ok': True}
+assert server.upstream_breaker_snapshot()[dead_netloc]['state'] == 'closed'
+assert server.UPSTREAM_BREAKERS[dead_netloc]['cooldown'] == 0.2
+server.pooled_upstream_request = original_pooled
+saturated_pool = server.upstream_pool('http', dead_netloc)
+for _ in range(server.UPSTREAM_HOST_CONCURRENCY):
+    saturated_pool['slots'].acquire()
+for _ in range(3):
+    try:
+        server.upstream_json(f'{dead}/api', timeout=0.01)
+        raise AssertionError('a full host pool should raise')
+    except server.UpstreamSaturated:
+        pass
+for _ in range(server.UPSTREAM_HOST_CONCURRENCY):
+    saturated_pool['slots'].release()
+breaker = server.upstream_breaker_snapshot()[dead_netloc]
+assert breaker['state'] == 'closed' and breaker['failures'] == 0, breaker
+fallback = server.subway_fallback_payload(False, server.UpstreamUnavailable('down'))
+assert {a['predictionSource'] for a in fallback['arrivals']} == {'TIMETABLE_ONLY'} and 'note' in fallback
+assert 'upstreams' in server.compact_metrics_for_admin()
+
+# Case 19: one request budget covers every upstream call; parts that miss it
+# are marked degraded and the rest is still returned in time.
+assert server.deadline_timeout(None, 8) == 8
+assert server.deadline_timeout(time.monotonic() + 2, 8) <= 2
+try:
+    server.deadline_timeout(time.monotonic() - 1, 8)
+    raise AssertionError('spent budget should raise')
+except TimeoutError:
+    pass
+server.REQUEST_DEADLINE = 0.3
+def late_forecast(url, params, deadline=None):
+    if url == server.KMA_ULTRA_FCST:
+        time.sleep(0.6)
+    return [{'category': 'T1H', 'obsrValue': '18.0'}]
+server.kma_request = late_forecast
+server.KMA_SOURCE_STATE.clear()
+started = time.time()
+weather = server.fetch_weather()
+assert time.time() - started < 0.5, time.time() - started
+assert weather['temperatureC'] == 18.0 and weather['degraded'] == ['forecast'] and weather['forecastNote'], weather
+def slow_positions(now=None, deadline=None):
+    time.sleep(0.6)
+    return []
+def quick_arrivals(url, method='GET', body=None, headers=None, timeout=8, deadline=None):
+    assert deadline is not None and timeout == 8
+    return {'realtimeArrivalList': []}
+server.fetch_line_realtime_positions = slow_positions
+server.upstream_json = quick_arrivals
+server.CACHE.pop('subway-arrivals-wolgot', None)
+server.CACHE.pop('subway-line-realtime-positions', None)
+started = time.time()
+subway = server.subway_arrivals_encoded()['payload']
+assert time.time() - started < 0.5, time.time() - started
+assert subway['degraded'] == ['positions'] and subway['positionNote'] and subway['arrivals'], subway
+def timed_out_arrivals(url, method='GET', body=None, headers=None, timeout=8, deadline=None):
+    raise TimeoutError('timed out')
+server.upstream_json = timed_out_arrivals
+server.CACHE.pop('subway-arrivals-wolgot', None)
+time.sleep(0.3)
+subway = server.subway_arrivals_encoded()['payload']
+assert subway['degraded'][0] == 'arrivals' and subway['note'], subway
+assert {a['predictionSource'] for a in subway['arrivals']} == {'TIMETABLE_ONLY'}
+
+# Case 20: a request verifies its portal cookie once, and a verified token is
+# remembered across requests until it expires or falls out of the LRU.
+original_sign_value = server.sign_value
+signatures = []
+def counting_sign_value(value):
+    signatures.append(value)
+    return original_sign_value(value)
+server.sign_value = counting_sign_value
+cookie = server.make_cookie({'id': 7, 'username': 'resident7'})
+signatures.clear()
+h = FakeHandler({'Cookie': f'{server.PORTAL_COOKIE_NAME}={cookie}'})
+assert server.is_authenticated(h)
+assert server.current_portal_user(h) == {'id': 7, 'username': 'resident7', 'role': 'resident'}
+assert server.metric_bucket_name(h) == 'resident'
+assert len(signatures) == 1, signatures
+h.headers = {'Cookie': f'{server.PORTAL_COOKIE_NAME}={cookie}'}
+assert server.current_portal_user(h)['id'] == 7 and len(signatures) == 1, signatures
+tampered = cookie[:-1] + ('1' if cookie[-1] == '0' else '0')
+assert server.current_portal_user(FakeHandler({'Cookie': f'{server.PORTAL_COOKIE_NAME}={tampered}'})) is None
+server.PORTAL_COOKIE_MAX_AGE = 1
+short_cookie = server.make_cookie({'id': 8, 'username': 'resident8'})
+assert server.current_portal_user(FakeHandler({'Cookie': f'{server.PORTAL_COOKIE_NAME}={short_cookie}'}))['id'] == 8
+assert short_cookie in server.PORTAL_TOKEN_CACHE
+time.sleep(1.05)
+assert server.current_portal_user(FakeHandler({'Cookie': f'{server.PORTAL_COOKIE_NAME}={short_cookie}'})) is None
+assert short_cookie not in server.PORTAL_TOKEN_CACHE
+server.PORTAL_TOKEN_CACHE_SIZE = 2
+for n in range(3):
+    server.verified_portal_token(server.make_cookie({'id': n, 'username': f'r{n}'}))
+assert len(server.PORTAL_TOKEN_CACHE) == 2
+server.sign_value = original_sign_value
+
+# Case 21: portal DB access reuses pooled connections, replaces stale ones,
+# and last_login_at updates are queued and written in one batch.
+db_connects = []
+statements = []
+class FakeCursor:
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        return False
+    def execute(self, sql, params):
+        statements.append((sql, params))
+    def fetchone(self):
+        return {'id': 3, 'username': 'resident3'}
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.healthy = True
+    def cursor(self):
+        return FakeCursor()
+    def ping(self, reconnect=False):
+        if not self.healthy:
+            raise ConnectionError('gone away')
+    def close(self):
+        self.closed = True
+def fake_connect():
+    db_connects.append(FakeConnection())
+    return db_connects[-1]
+server.get_db_connection = fake_connect
+for _ in range(3):
+    assert server.get_portal_account('resident3')['id'] == 3
+assert len(db_connects) == 1 and len(server.DB_POOL['idle']) == 1
+server.DB_POOL['idle'][0]['used'] -= server.DB_POOL_CHECK_AFTER
+db_connects[0].healthy = False
+server.get_portal_account('resident3')
+assert len(db_connects) == 2 and db_connects[0].closed
+server.DB_POOL['idle'][0]['created'] -= server.DB_POOL_MAX_LIFETIME
+server.get_portal_account('resident3')
+assert len(db_connects) == 3 and db_connects[1].closed
+try:
+    with server.pooled_db_connection():
+        raise RuntimeError('query failed')
+except RuntimeError:
+    pass
+assert db_connects[2].closed and not server.DB_POOL['idle']
+statements.clear()
+started = time.time()
+for account_id in (5, 4, 5):
+    server.mark_portal_login(account_id)
+assert time.time() - started < 0.05
+for _ in range(50):
+    if statements:
+        break
+    time.sleep(0.05)
+assert len(statements) == 1 and statements[0][1] == (4, 5), statements
+server.mark_portal_login(6)
+time.sleep(0.05)
+assert server.PORTAL_LOGIN_QUEUE.empty() and server.PORTAL_LOGIN_STATE['writer'].is_alive()
+server.flush_portal_logins()
+assert not server.PORTAL_LOGIN_STATE['writer'].is_alive()
+assert statements[-1][1] == (6,), statements
+assert server.compact_metrics_for_admin()['writers']['portalLogins'] == {'pending': 0, 'dropped': 0}
+
+# Case 22: password hashing runs in the bounded login pool, a saturated pool
+# is reported as busy rather than a wrong password, and logins are rate
+# limited per client address.
+import sys
+sys.modules['server'] = server
+login_originals = (server.get_portal_account, server.mark_portal_login, server.LOGIN_RATE_LIMIT, server.LOGIN_HASH_SLOTS, server.LOGIN_HASH_WAIT)
+marked_logins = []
+try:
+    encoded_password = 'pbkdf2_sha256$1000$salt$' + server.pbkdf2_digest('pw', 'salt', 1000)
+    assert server.verify_password('pw', encoded_password) and not server.verify_password('nope', encoded_password)
+    assert not server.verify_password('pw', 'md5$1$salt$x')
+    assert isinstance(server.LOGIN_HASH_STATE['executor'], server.ProcessPoolExecutor)
+    server.get_portal_account = lambda username: {'id': 9, 'username': username, 'password_hash': encoded_password}
+    server.mark_portal_login = marked_logins.append
+    def login(password, forwarded='203.0.113.7', headers=None):
+        body = f'username=resident9&password={password}'.encode()
+        h = FakeHandler({'Content-Length': str(len(body)), 'X-Forwarded-For': f'10.0.0.1, {forwarded}', **(headers or {})})
+        h.rfile = io.BytesIO(body)
+        h.client_address = ('127.0.0.1', 50000)
+        server.handle_login(h)
+        return h
+    server.LOGIN_RATE_LIMIT = 2
+    assert login('pw').status == 303 and marked_logins == [9]
+    assert login('nope').status == 200
+    limited = login('pw')
+    assert limited.status == 429 and int(limited.sent['Retry-After']) >= 1
+    assert login('pw', '198.51.100.2').status == 303
+    spoofed = FakeHandler({'X-Real-IP': '192.0.2.50'})
+    spoofed.client_address = ('127.0.0.1', 50001)
+    assert server.login_client_key(spoofed) == '127.0.0.1'
+    server.LOGIN_HASH_SLOTS = threading.BoundedSemaphore(1)
+    server.LOGIN_HASH_SLOTS.acquire()
+    server.LOGIN_HASH_WAIT = 0.05
+    busy = login('pw', '198.51.100.3')
+    assert busy.status == 503 and 'Retry-After' in busy.sent
+finally:
+    server.get_portal_account, server.mark_portal_login, server.LOGIN_RATE_LIMIT, server.LOGIN_HASH_SLOTS, server.LOGIN_HASH_WAIT = login_originals
+    server.LOGIN_ATTEMPTS.clear()
+    server.stop_login_hash_workers()
+    sys.modules.pop('server', None)
+assert server.LOGIN_HASH_STATE['executor'] is None
+
+# Case 23: subway events go out in batches; segments rotate by size and by day
+# into unique gzip files, and the exit flush keeps the batch being held.
+event_row = {'btrainNo': 'E1', 'updnLine': '상행', 'arvlMsg2': '월곶 도착'}
+batches = []
+original_write_batch = server.write_subway_event_batch
+def recording_write_batch(lines):
+    batches.append(len(lines))
+    original_write_batch(lines)
+server.write_subway_event_batch = recording_write_batch
+server.log_subway_events([event_row] * 3)
+time.sleep(0.8)
+assert batches == [3], batches
+assert len(server.SUBWAY_EVENT_LOG.read_text(encoding='utf-8').splitlines()) == 3
+server.SUBWAY_EVENT_LOG.unlink()
+server.SUBWAY_EVENT_LOG_STATE['segmentDate'] = None
+server.SUBWAY_EVENT_LOG_MAX_BYTES = 10
+for n in range(3):
+    original_write_batch([f'size-{n}-' + 'x' * 20 + '\n'])
+server.SUBWAY_EVENT_LOG_MAX_BYTES = 16 * 1024 * 1024
+server.SUBWAY_EVENT_LOG_STATE['segmentDate'] = '2000-01-01'
+original_write_batch(['next-day\n'])
+segments = sorted(server.DATA_DIR.glob('subway_events-*.jsonl.gz'))
+assert len(segments) == 3 and not list(server.DATA_DIR.glob('subway_events-*.jsonl')), segments
+contents = {gzip.open(path, 'rt', encoding='utf-8').read().split('-')[1] for path in segments}
+assert contents == {'0', '1', '2'}, contents
+assert [path for path in segments if '-20000101-' in path.name]
+assert server.SUBWAY_EVENT_LOG.read_text(encoding='utf-8') == 'next-day\n'
+server.log_subway_events([{**event_row, 'btrainNo': 'E-exit'}])
+time.sleep(0.1)
+assert server.SUBWAY_EVENT_QUEUE.empty() and server.SUBWAY_EVENT_LOG_STATE['writer'].is_alive()
+server.flush_subway_event_log()
+assert not server.SUBWAY_EVENT_LOG_STATE['writer'].is_alive()
+assert 'E-exit' in server.SUBWAY_EVENT_LOG.read_text(encoding='utf-8')
+server.write_subway_event_batch = original_write_batch
+assert server.compact_metrics_for_admin()['writers']['subwayEvents'] == {'pending': 0, 'dropped': 0}
+
+# Case 24: pool mode sheds load: API requests without a free slot get 503 at
+# once, and connections beyond the accept queue are refused by the acceptor.
+server.API_SLOTS = threading.BoundedSemaphore(1)
+server.API_SLOTS.acquire()
+h = FakeHandler()
+started = time.time()
+server.dispatch_api(h, '/api/portal/me', '')
+assert h.status == 503 and h.sent['Retry-After'] == str(server.SERVER_RETRY_AFTER_SECONDS)
+assert time.time() - started < 0.05
+server.API_SLOTS = None
+release_worker = threading.Event()
+class BlockingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        release_worker.wait(5)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+pooled = server.PooledHTTPServer(('127.0.0.1', 0), BlockingHandler, workers=1, queue_size=1)
+threading.Thread(target=pooled.serve_forever, daemon=True).start()
+pool_address = pooled.server_address
+busy_client = socket.create_connection(pool_address)
+busy_client.sendall(b'GET / HTTP/1.1\r\nHost: x\r\n\r\n')
+time.sleep(0.1)
+queued_client = socket.create_connection(pool_address)
+time.sleep(0.1)
+rejected_client = socket.create_connection(pool_address, timeout=2)
+rejected_client.sendall(b'GET / HTTP/1.1\r\nHost: x\r\n\r\n')
+response = rejected_client.recv(4096).decode('utf-8')
+assert response.startswith('HTTP/1.1 503') and f'Retry-After: {server.SERVER_RETRY_AFTER_SECONDS}' in response, response
+release_worker.set()
+for client in (busy_client, queued_client, rejected_client):
+    client.close()
+pooled.shutdown()
+pooled.server_close()
+
+# Case 25: the threaded and asyncio caches share one single-flight map, so a
+# key is filled once even when a thread and a coroutine miss it together.
+shared_fills = []
+def slow_thread_fill():
+    shared_fills.append('thread')
+    time.sleep(0.3)
+    return 'from-thread'
+async def slow_async_fill():
+    shared_fills.append('async')
+    await server.asyncio.sleep(0.3)
+    return 'from-async'
+async def mixed_flights():
+    loop = server.asyncio.get_running_loop()
+    thread_result = loop.run_in_executor(None, server.cached, 'mixed-a', slow_thread_fill, 60)
+    await server.asyncio.sleep(0.05)
+    assert await server.async_cached('mixed-a', slow_async_fill, 60) == 'from-thread'
+    assert await thread_result == 'from-thread'
+    async_result = server.asyncio.ensure_future(server.async_cached('mixed-b', slow_async_fill, 60))
+    await server.asyncio.sleep(0.05)
+    assert await loop.run_in_executor(None, server.cached, 'mixed-b', slow_thread_fill, 60) == 'from-async'
+    assert await async_result == 'from-async'
+server.asyncio.run(mixed_flights())
+assert shared_fills == ['thread', 'async'] and not server.CACHE_FLIGHTS, (shared_fills, server.CACHE_FLIGHTS)
+
+# Case 26: coroutines share the thread probe lock for KMA, so while a worker
+# thread probes, an async caller serves the previous base_time and counts it.
+stale_ncst = {'baseDate': '20000101', 'baseTime': '0000', 'items': [{'category': 'T1H'}]}
+server.KMA_SOURCE_STATE['kma-ncst'] = {'latest': stale_ncst, 'probeAt': 0, 'backoff': server.KMA_PROBE_BACKOFF}
+served_before = server.cache_stats_snapshot().get('weather-source:kma-ncst', {}).get('servedPrevious', 0)
+server.KMA_FETCH_LOCKS['kma-ncst'].acquire()
+try:
+    assert server.asyncio.run(server.async_kma_source('kma-ncst', server.KMA_ULTRA_NCST)) is stale_ncst
+finally:
+    server.KMA_FETCH_LOCKS['kma-ncst'].release()
+assert server.cache_stats_snapshot()['weather-source:kma-ncst']['servedPrevious'] == served_before + 1
+assert not hasattr(server, 'ASYNC_KMA_LOCKS')
+
+# Case 27: while a dashboard section is still loading, later requests share
+# its job instead of queueing another one on the dashboard executor.
+weather_loads = []
+release_weather = threading.Event()
+def stuck_weather():
+    weather_loads.append(1)
+    release_weather.wait(5)
+    return {'payload': {'late': True}}
+originals = (server.weather_encoded, server.DASHBOARD_DEADLINE)
+server.weather_encoded = stuck_weather
+server.DASHBOARD_DEADLINE = 0.1
+try:
+    for _ in range(3):
+        h = FakeHandler()
+        server.handle_dashboard(h)
+        assert server.json.loads(h.wfile.getvalue())['sections']['weather']['error']
+    assert weather_loads == [1], weather_loads
+    release_weather.set()
+    server.DASHBOARD_JOBS['weather'].result(timeout=2)
+finally:
+    server.weather_encoded, server.DASHBOARD_DEADLINE = originals
+
+# Case 28: coroutines waiting on a thread's flight are woken through the loop
+# and leave the default executor free for blocking routes.
+release_fill = threading.Event()
+def held_thread_fill():
+    release_fill.wait(5)
+    return 'thread-value'
+async def waiters_on_thread_flight():
+    loop = server.asyncio.get_running_loop()
+    loop.set_default_executor(server.ThreadPoolExecutor(max_workers=1))
+    filler = threading.Thread(target=server.cached, args=('thread-owned', held_thread_fill, 60))
+    filler.start()
+    time.sleep(0.05)
+    waiters = [server.asyncio.ensure_future(server.async_cached('thread-owned', slow_async_fill, 60)) for _ in range(4)]
+    await server.asyncio.sleep(0.05)
+    assert await server.asyncio.wait_for(loop.run_in_executor(None, lambda: 'free'), 1) == 'free'
+    release_fill.set()
+    assert await server.asyncio.gather(*waiters) == ['thread-value'] * 4
+    filler.join()
+server.asyncio.run(waiters_on_thread_flight())
+assert not server.CACHE_FLIGHTS
+
+# Case 29: asyncio stream subscribers are woken by the publisher instead of
+# polling, so a change reaches them right away.
+class StreamWriter:
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    async def drain(self):
+        pass
+async def async_stream_wakeup():
+    loop = server.asyncio.get_running_loop()
+    writer = StreamWriter()
+    last_id = server.subway_stream_event()[0]
+    stream = server.asyncio.ensure_future(server.async_subway_stream(FakeHandler({'Last-Event-ID': str(last_id)}), writer, {}))
+    await server.asyncio.sleep(0.05)
+    assert len(server.SUBWAY_STREAM_ASYNC_WAITERS) == 1
+    published = time.time()
+    await loop.run_in_executor(None, server.publish_subway_stream, server.encode_json_body({'arrivals': [{'trainNo': '29'}], 'trainPositions': []}))
+    while not any(b'event: subway' in chunk for chunk in writer.chunks) and time.time() - published < 2:
+        await server.asyncio.sleep(0.01)
+    assert time.time() - published < 0.5, writer.chunks
+    assert any(chunk.startswith(b'id: %d\n' % (last_id + 1)) for chunk in writer.chunks)
+    stream.cancel()
+    try:
+        await stream
+    except server.asyncio.CancelledError:
+        pass
+    assert not server.SUBWAY_STREAM_ASYNC_WAITERS
+original_subway_encoded = server.subway_arrivals_encoded
+def no_upstream(debug_enabled=False):
+    raise RuntimeError('no upstream in tests')
+server.subway_arrivals_encoded = no_upstream
+try:
+    server.asyncio.run(async_stream_wakeup())
+finally:
+    server.subway_arrivals_encoded = original_subway_encoded
+
+# Case 30: upstream GET redirects are followed for a few hops on both engines,
+# and the wait for a host slot comes out of the same per-call timeout.
+class RedirectingUpstream(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/slow'):
+            time.sleep(0.5)
+        if self.path.startswith('/moved') or self.path.startswith('/loop'):
+            self.send_response(302)
+            self.send_header('Location', '/api' if self.path.startswith('/moved') else '/loop')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except BrokenPipeError:
+            # The slow call's client has already given up.
+            pass
+
+    def log_message(self, *args):
+        pass
+redirecting = ThreadingHTTPServer(('127.0.0.1', 0), RedirectingUpstream)
+threading.Thread(target=redirecting.serve_forever, daemon=True).start()
+redirect_base = f'http://127.0.0.1:{redirecting.server_address[1]}'
+assert server.upstream_request(f'{redirect_base}/moved') == b'{"ok": true}'
+try:
+    server.upstream_request(f'{redirect_base}/loop')
+    raise AssertionError('a redirect loop should raise')
+except server.urllib.error.HTTPError as exc:
+    assert exc.code == 302 and 'too many redirects' in exc.reason, exc
+async def async_redirects():
+    assert await server.async_upstream_json(f'{redirect_base}/moved') == {'ok': True}
+    try:
+        await server.async_upstream_json(f'{redirect_base}/loop')
+        raise AssertionError('a redirect loop should raise')
+    except server.urllib.error.HTTPError as exc:
+        assert exc.code == 302
+server.asyncio.run(async_redirects())
+slot_pool = server.upstream_pool('http', redirecting.server_address[0] + f':{redirecting.server_address[1]}')
+slot_pool['slots'] = threading.BoundedSemaphore(1)
+slot_pool['slots'].acquire()
+threading.Timer(0.3, slot_pool['slots'].release).start()
+started = time.time()
+try:
+    server.pooled_upstream_request(f'{redirect_base}/slow', timeout=0.5)
+    raise AssertionError('slot wait plus a slow answer should exceed the budget')
+except TimeoutError:
+    pass
+assert time.time() - started < 0.65, time.time() - started
+redirecting.shutdown()
+
+print('server cache tests passed')
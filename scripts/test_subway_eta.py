@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import importlib.util
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
 
@@ -7,6 +9,10 @@ ROOT = Path(__file__).resolve().parents[1]
 spec = importlib.util.spec_from_file_location('server', ROOT / 'server.py')
 server = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(server)
+TMP_DATA = tempfile.TemporaryDirectory()
+server.DATA_DIR = Path(TMP_DATA.name)
+server.SUBWAY_EVENT_LOG = server.DATA_DIR / 'subway_events.jsonl'
+server.POST_WOLGOT_TRACKS_PATH = server.DATA_DIR / 'subway_post_wolgot_tracks.json'
 KST = server.KST
 NOW = datetime(2026, 8, 10, 20, 28, 0, tzinfo=KST)
 
@@ -30,12 +36,12 @@ def candidates(rows):
 
 # Case 1: fresh 송도 7번째 전역 keeps ~14 min.
 a, d = candidates([row('6938','상행','오이도행 - 달월방면','[7]번째 전역 (송도)','송도','2026-08-10 20:27:00')])
-assert a[0]['trainNo'] == '6938' and 12 <= a[0]['minutes'] <= 14, a
+assert a[0].trainNo == '6938' and 12 <= a[0].minutes <= 14, a
 
 # Case 2: stale 6805 removed; fallback may remain but train candidate is rejected.
 a, d = candidates([row('6805','하행','인천행 - 소래포구방면','[2]번째 전역 (오이도)','오이도','2026-08-10 20:23:00')])
 assert any(x['trainNo']=='6805' and x['candidateStatus']=='rejected' and x['freshnessValidation']=='STALE_POSITION_REJECTED' for x in d), d
-assert not any(x.get('trainNo')=='6805' for x in a), a
+assert not any(x.trainNo=='6805' for x in a), a
 
 # Case 3: stale 6589 removed.
 a, d = candidates([row('6589','하행','인천행 - 소래포구방면','[11]번째 전역 (야목)','야목','2026-08-10 20:20:00')])
@@ -43,54 +49,54 @@ assert any(x['trainNo']=='6589' and x['candidateStatus']=='rejected' for x in d)
 
 # Case 4: fresh far train can pass validation and sort later.
 a, d = candidates([row('6591','하행','인천행 - 소래포구방면','[23]번째 전역 (기흥)','기흥','2026-08-10 20:28:00')])
-assert any(x.get('trainNo')=='6591' and x.get('predictionSource')=='POSITION_REALTIME' for x in a), a
+assert any(x.trainNo=='6591' and x.predictionSource=='POSITION_REALTIME' for x in a), a
 
 # Case 5: timestamp correction subtracts 20s from 300s remaining.
 r = row('T5','하행','인천행 - 소래포구방면','[2]번째 전역 (오이도)','오이도','2026-08-10 20:27:40')
-c, info = server.build_subway_candidate(r, NOW, 0)
-assert 270 <= c['etaSeconds'] <= 285, c
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
+assert 270 <= c.etaSeconds <= 285, c
 
 # Case 6: 5 min old and 5 min remaining is not shown as 5 min; stale rejected.
 r = row('T6','하행','인천행 - 소래포구방면','[2]번째 전역 (오이도)','오이도','2026-08-10 20:23:00')
-c, info = server.build_subway_candidate(r, NOW, 0)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
 assert c is None and info['freshnessValidation'] == 'STALE_POSITION_REJECTED', info
 
 # Case 7: target already passed in current direction is rejected.
 r = row('T7','하행','인천행 - 소래포구방면','[3]번째 전역 (소래포구)','소래포구','2026-08-10 20:27:50')
-c, info = server.build_subway_candidate(r, NOW, 0)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
 assert c is None and info['routeValidation'] == 'INVALID_ROUTE_REJECTED', info
 
 # Case 8: terminal before target rejected.
 r = row('T8','하행','오이도행 - 정왕방면','[3]번째 전역 (정왕)','정왕','2026-08-10 20:27:50')
-c, info = server.build_subway_candidate(r, NOW, 0)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
 assert c is None and info['routeValidation'] == 'INVALID_ROUTE_REJECTED', info
 
 # Case 9: no exact timetable trainNo dataset yet: validation is marked heuristic, not silently claimed exact.
 r = row('T9','상행','오이도행 - 달월방면','[7]번째 전역 (송도)','송도','2026-08-10 20:27:00')
-c, info = server.build_subway_candidate(r, NOW, 0)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
 assert info['timetableMatch'] == 'heuristic_headway', info
 
 # Case 10: no realtime candidates => timetable fallback, no stale train.
 a, d = candidates([])
-assert any(x['predictionSource']=='TIMETABLE_ONLY' for x in a), a
+assert any(x.predictionSource=='TIMETABLE_ONLY' for x in a), a
 
 # Case 11: target-station arrival within 60s keeps the 곧 도착 label.
 r = row('T11','하행','인천행 - 소래포구방면','월곶 도착','월곶','2026-08-10 20:27:10', code='1')
-c, info = server.build_subway_candidate(r, NOW, 0)
-assert c is not None and not c['positionOnly'] and c['displayTime'] == '곧 도착', (c, info)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
+assert c is not None and not c.positionOnly and c.displayTime == '곧 도착', (c, info)
 
 # Case 11b: target-station arrival past the 60s label window is hidden from arrival cards,
 # but retained as a realtime-map position while still fresh.
 r = row('T11B','하행','인천행 - 소래포구방면','월곶 도착','월곶','2026-08-10 20:26:00', code='1')
-c, info = server.build_subway_candidate(r, NOW, 0)
-assert c is not None and c['positionOnly'] and c['displayTime'] == '' and c.get('trainPosition'), (c, info)
-assert c['trainPosition']['mapState'] == 'ESTIMATED_AFTER_WOLGOT', c
-assert c['trainPosition']['positionPrecision'] == 'estimated', c
-assert c['trainPosition']['logicalPosition'] > server.WOLGOT_INDEX, c
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
+assert c is not None and c.positionOnly and c.displayTime == '' and c.trainPosition, (c, info)
+assert c.trainPosition.mapState == 'ESTIMATED_AFTER_WOLGOT', c
+assert c.trainPosition.positionPrecision == 'estimated', c
+assert c.trainPosition.logicalPosition > server.WOLGOT_INDEX, c
 
 # Case 11c: truly stale station arrival event should not stay on the map either.
 r = row('T11C','하행','인천행 - 소래포구방면','월곶 도착','월곶','2026-08-10 20:24:00', code='1')
-c, info = server.build_subway_candidate(r, NOW, 0)
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
 assert c is None and info['freshnessValidation'] == 'STALE_STATION_EVENT_REJECTED', info
 
 # Case 11d: once a train is known at Wolgot, keep estimating it after the API row disappears.
@@ -100,17 +106,83 @@ a, d = server.parse_subway_arrivals(debug=True, now=NOW, rows_override=[r])
 later = NOW + server.timedelta(seconds=95)
 a, d = server.parse_subway_arrivals(debug=True, now=later, rows_override=[])
 pos = getattr(server.parse_subway_arrivals, 'last_position_only_candidates', [])
-assert any(x['trainNo'] == 'T11D' and x['trainPosition']['logicalPosition'] < server.WOLGOT_INDEX for x in pos), pos
+assert any(x.trainNo == 'T11D' and x.trainPosition.logicalPosition < server.WOLGOT_INDEX for x in pos), pos
 
 # Case 11e: known-terminal estimated train is removed after terminal arrival + 60s hold.
 much_later = NOW + server.timedelta(seconds=500)
 a, d = server.parse_subway_arrivals(debug=True, now=much_later, rows_override=[])
 pos = getattr(server.parse_subway_arrivals, 'last_position_only_candidates', [])
-assert not any(x['trainNo'] == 'T11D' for x in pos), pos
+assert not any(x.trainNo == 'T11D' for x in pos), pos
 
 # Case 12: previous-station entering is not target-station immediate.
 r = row('T12','하행','인천행 - 소래포구방면','전역 진입','달월','2026-08-10 20:27:00', code='4')
+c, info = server.build_subway_candidate(r, NOW, 0, collect_debug=True)
+assert c is not None and c.displayTime != '곧 도착' and c.minutes >= 1, (c, info)
+
+# Case 13: topology travel time equals the sum of its adjacent segments.
+topology = server.WOLGOT_TOPOLOGY
+for direction in ('상행', '하행'):
+    for start in (0, 20, server.WOLGOT_INDEX, len(server.WOLGOT_ROUTE) - 1):
+        lo, hi = sorted((start, server.WOLGOT_INDEX))
+        expected = sum(server.adjacent_segment_seconds(server.WOLGOT_ROUTE[i], server.WOLGOT_ROUTE[i + 1], direction) for i in range(lo, hi))
+        assert topology.travel_seconds(start, server.WOLGOT_INDEX, direction) == expected
+assert topology.positions['월곶'] == server.WOLGOT_INDEX and '없는역' not in topology.positions
+
+# Case 14: records stay internal and skip debug by default; the payload edge
+# emits plain JSON dicts.
+server.POST_WOLGOT_TRACKS.clear()
+r = row('T14','하행','인천행 - 소래포구방면','[2]번째 전역 (정왕)','정왕','2026-08-10 20:27:40')
 c, info = server.build_subway_candidate(r, NOW, 0)
-assert c is not None and c['displayTime'] != '곧 도착' and c['minutes'] >= 1, (c, info)
+assert info is None and isinstance(c, server.SubwayCandidate) and c.positionOnly is False, c
+payload = server.build_subway_payload(server.parse_subway_arrivals(now=NOW, rows_override=[r]), False, [])
+encoded = server.json.loads(server.json.dumps(payload, ensure_ascii=False))
+assert encoded['arrivals'] == payload['arrivals'] and all(type(a) is dict for a in payload['arrivals'])
+assert all(type(p) is dict for p in payload['trainPositions']) and payload['trainPositions'][0]['trainNo'] == 'T14'
+fallback = server.timetable_fallback('상행', NOW).as_dict()
+assert list(fallback) == list(server.SubwayCandidate.FIELDS) and fallback['positionOnly'] is None and fallback['trainPosition'] is None
+
+# Case 15: post-Wolgot track changes are debounced into one atomic write,
+# and the exit flush writes what is still pending at once.
+server.save_post_wolgot_tracks()
+renames = []
+original_replace = Path.replace
+def recording_replace(self, target):
+    renames.append((self.name, Path(target).name))
+    return original_replace(self, target)
+Path.replace = recording_replace
+server.POST_WOLGOT_FLUSH_DELAY = 0.2
+for n in range(5):
+    server.POST_WOLGOT_TRACKS[f'T15-{n}'] = {'trainNo': f'T15-{n}', 'lastSignalAt': NOW}
+    server.mark_post_wolgot_tracks_dirty()
+assert not renames
+time.sleep(0.4)
+assert renames == [('subway_post_wolgot_tracks.tmp', 'subway_post_wolgot_tracks.json')], renames
+saved = server.json.loads(server.POST_WOLGOT_TRACKS_PATH.read_text(encoding='utf-8'))
+assert {f'T15-{n}' for n in range(5)} <= set(saved) and saved['T15-0']['lastSignalAt'] == NOW.isoformat()
+assert not server.POST_WOLGOT_TRACKS_PATH.with_suffix('.tmp').exists()
+server.POST_WOLGOT_FLUSH_DELAY = 60
+server.POST_WOLGOT_TRACKS['T15-exit'] = {'trainNo': 'T15-exit', 'lastSignalAt': NOW}
+server.mark_post_wolgot_tracks_dirty()
+server.save_post_wolgot_tracks()
+assert len(renames) == 2 and server.POST_WOLGOT_TRACKS_STATE['timer'] is None
+assert 'T15-exit' in server.json.loads(server.POST_WOLGOT_TRACKS_PATH.read_text(encoding='utf-8'))
+Path.replace = original_replace
+
+# Case 16: a failed track write stays dirty and is retried by a new timer.
+failures = []
+def failing_replace(self, target):
+    failures.append(Path(target).name)
+    raise OSError('disk full')
+Path.replace = failing_replace
+server.POST_WOLGOT_FLUSH_DELAY = 0.2
+server.POST_WOLGOT_TRACKS['T16'] = {'trainNo': 'T16', 'lastSignalAt': NOW}
+server.mark_post_wolgot_tracks_dirty()
+server.save_post_wolgot_tracks()
+assert failures and server.POST_WOLGOT_TRACKS_STATE['dirty'] and server.POST_WOLGOT_TRACKS_STATE['timer'] is not None
+Path.replace = original_replace
+time.sleep(0.4)
+assert not server.POST_WOLGOT_TRACKS_STATE['dirty'] and server.POST_WOLGOT_TRACKS_STATE['timer'] is None
+assert 'T16' in server.json.loads(server.POST_WOLGOT_TRACKS_PATH.read_text(encoding='utf-8'))
+server.POST_WOLGOT_FLUSH_DELAY = 60
 
 print('subway ETA tests passed:', len(a), 'fallback/current candidates checked')
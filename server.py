@@ -1,26 +1,71 @@
 #!/usr/bin/env python3
+import asyncio
+import atexit
 import base64
+import copy
+import email.parser
+import email.utils
+import gzip
 import hashlib
 import hmac
 import html
+import http.client
+import io
 import json
+import mimetypes
+import operator
 import os
+import queue
 import re
+import shutil
+import signal
+import ssl
+import threading
 import time
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+import urllib.error
 import urllib.parse
-import urllib.request
-from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, fields
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
 
 import pymysql
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 BASE_DIR = Path(__file__).resolve().parent
 DATA_DIR = BASE_DIR / 'data'
 SUBWAY_EVENT_LOG = DATA_DIR / 'subway_events.jsonl'
+SUBWAY_EVENT_LOG_QUEUE_SIZE = int(os.getenv('SUBWAY_EVENT_LOG_QUEUE_SIZE', '5000'))
+SUBWAY_EVENT_LOG_MAX_BYTES = int(os.getenv('SUBWAY_EVENT_LOG_MAX_BYTES', str(16 * 1024 * 1024)))
+SUBWAY_EVENT_LOG_COMPRESS = os.getenv('SUBWAY_EVENT_LOG_COMPRESS', '1') == '1'
+SUBWAY_EVENT_QUEUE = queue.Queue(maxsize=SUBWAY_EVENT_LOG_QUEUE_SIZE)
+SUBWAY_EVENT_LOG_STATE = {'writer': None, 'segmentDate': None, 'dropped': 0}
+SUBWAY_EVENT_LOG_LOCK = threading.Lock()
+SUBWAY_EVENT_DROP_LOCK = threading.Lock()
+SUBWAY_EVENT_STOP = threading.Event()
 POST_WOLGOT_TRACKS_PATH = DATA_DIR / 'subway_post_wolgot_tracks.json'
+POST_WOLGOT_FLUSH_DELAY = float(os.getenv('POST_WOLGOT_FLUSH_DELAY_SECONDS', '5'))
 VISIT_METRICS_PATH = DATA_DIR / 'visit_metrics.json'
+BUS_ROUTE_CACHE_PATH = DATA_DIR / 'bus_station_routes.json'
+VISIT_METRICS_FLUSH_INTERVAL = int(os.getenv('VISIT_METRICS_FLUSH_SECONDS', '30'))
+VISIT_METRICS = {}
+VISIT_METRICS_STATE = {'loaded': False, 'dirty': False, 'flusher': None}
+VISIT_METRICS_LOCK = threading.Lock()
+VISIT_METRICS_FLUSH_LOCK = threading.Lock()
+STATIC_FINGERPRINT = os.getenv('STATIC_FINGERPRINT', '1') == '1'
+STATIC_ASSET_DIRS = ('styles', 'js', 'assets')
+STATIC_IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+STATIC_ASSETS = {}
 GG_BASE_ARRIVAL = 'https://apis.data.go.kr/6410000/busarrivalservice/v2/getBusArrivalListv2'
 GG_BASE_STATION = 'https://apis.data.go.kr/6410000/busstationservice/v2/getBusStationListv2'
 GG_BASE_STATION_ROUTES = 'https://apis.data.go.kr/6410000/busstationservice/v2/getBusStationViaRouteListv2'
@@ -29,17 +74,107 @@ SEOUL_SUBWAY_POSITION = 'http://swopenapi.seoul.go.kr/api/subway/{key}/json/real
 WINDY_POINT_FORECAST = 'https://api.windy.com/api/point-forecast/v2'
 KMA_ULTRA_NCST = os.getenv('KMA_ULTRA_NCST_URL', 'https://apihub.kma.go.kr/api/typ02/openApi/VilageFcstInfoService_2.0/getUltraSrtNcst')
 KMA_ULTRA_FCST = os.getenv('KMA_ULTRA_FCST_URL', 'https://apihub.kma.go.kr/api/typ02/openApi/VilageFcstInfoService_2.0/getUltraSrtFcst')
-WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL_SECONDS', '1800'))
+# The merged view is cheap to rebuild from the per-source caches below, so it
+# only lives for a minute; each source keeps its own refresh rate.
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL_SECONDS', '60'))
+WEATHER_CACHE_MAX_STALE = int(os.getenv('WEATHER_CACHE_MAX_STALE_SECONDS', '3600'))
+# KMA sources do not expire on a timer: a base_time is kept until the next one
+# is due (KMA_PUBLISH_DELAY_MINUTES past the hour), then probed with backoff.
+KMA_PUBLISH_DELAY_MINUTES = int(os.getenv('KMA_PUBLISH_DELAY_MINUTES', '45'))
+KMA_PROBE_BACKOFF = int(os.getenv('KMA_PROBE_BACKOFF_SECONDS', '60'))
+KMA_PROBE_MAX_BACKOFF = int(os.getenv('KMA_PROBE_MAX_BACKOFF_SECONDS', '600'))
+KMA_SOURCE_STATE = {}
+KMA_SOURCE_LOCK = threading.Lock()
+KMA_FETCH_LOCKS = {'kma-ncst': threading.Lock(), 'kma-fcst': threading.Lock()}
+WINDY_CACHE_TTL = int(os.getenv('WINDY_CACHE_TTL_SECONDS', str(3 * 60 * 60)))
+WINDY_CACHE_MAX_STALE = int(os.getenv('WINDY_CACHE_MAX_STALE_SECONDS', str(6 * 60 * 60)))
 WOLGOT_LAT = float(os.getenv('WOLGOT_LAT', '37.39'))
 WOLGOT_LON = float(os.getenv('WOLGOT_LON', '126.74'))
+UPSTREAM_USER_AGENT = 'update-tide-resident-portal/1.0'
+UPSTREAM_TIMEOUT = float(os.getenv('UPSTREAM_TIMEOUT_SECONDS', '8'))
+# Whole-request budget for views that combine several upstream calls; kept
+# under the 15s proxy timeout so a slow mix degrades instead of erroring.
+REQUEST_DEADLINE = float(os.getenv('REQUEST_DEADLINE_SECONDS', '12'))
+UPSTREAM_IDLE_PER_HOST = int(os.getenv('UPSTREAM_IDLE_PER_HOST', '4'))
+UPSTREAM_HOST_CONCURRENCY = int(os.getenv('UPSTREAM_HOST_CONCURRENCY', '6'))
+UPSTREAM_MAX_REDIRECTS = int(os.getenv('UPSTREAM_MAX_REDIRECTS', '3'))
+UPSTREAM_REDIRECT_CODES = (301, 302, 303, 307, 308)
+UPSTREAM_SSL_CONTEXT = ssl.create_default_context()
+UPSTREAM_POOLS = {}
+UPSTREAM_POOLS_LOCK = threading.Lock()
+UPSTREAM_BREAKER_FAILURES = int(os.getenv('UPSTREAM_BREAKER_FAILURES', '5'))
+UPSTREAM_BREAKER_COOLDOWN = float(os.getenv('UPSTREAM_BREAKER_COOLDOWN_SECONDS', '10'))
+UPSTREAM_BREAKER_MAX_COOLDOWN = float(os.getenv('UPSTREAM_BREAKER_MAX_COOLDOWN_SECONDS', '300'))
+UPSTREAM_BREAKERS = {}
+UPSTREAM_BREAKERS_LOCK = threading.Lock()
 KMA_NX = os.getenv('KMA_NX', '56')
 KMA_NY = os.getenv('KMA_NY', '123')
 CACHE_TTL = int(os.getenv('BUS_CACHE_TTL_SECONDS', '30'))
+BUS_CACHE_MAX_STALE = int(os.getenv('BUS_CACHE_MAX_STALE_SECONDS', '120'))
+BUS_FETCH_DEADLINE = float(os.getenv('BUS_FETCH_DEADLINE_SECONDS', '9'))
+BUS_ROUTE_CACHE_TTL = int(os.getenv('BUS_ROUTE_CACHE_TTL_SECONDS', str(6 * 60 * 60)))
+BUS_ROUTE_CACHE_MAX_STALE = int(os.getenv('BUS_ROUTE_CACHE_MAX_STALE_SECONDS', str(30 * 24 * 60 * 60)))
+BUS_ROUTE_RETRY_SECONDS = int(os.getenv('BUS_ROUTE_RETRY_SECONDS', '300'))
 SUBWAY_CACHE_TTL = int(os.getenv('SUBWAY_CACHE_TTL_SECONDS', '15'))
+SUBWAY_CACHE_MAX_STALE = int(os.getenv('SUBWAY_CACHE_MAX_STALE_SECONDS', '45'))
 SUBWAY_POSITION_CACHE_TTL = int(os.getenv('SUBWAY_POSITION_CACHE_TTL_SECONDS', '30'))
+SUBWAY_STREAM_INTERVAL = int(os.getenv('SUBWAY_STREAM_INTERVAL_SECONDS', '5'))
+SUBWAY_STREAM_HEARTBEAT = int(os.getenv('SUBWAY_STREAM_HEARTBEAT_SECONDS', '20'))
+SUBWAY_STREAM_MAX_SECONDS = int(os.getenv('SUBWAY_STREAM_MAX_SECONDS', '600'))
+SUBWAY_STREAM_IDLE_SECONDS = int(os.getenv('SUBWAY_STREAM_IDLE_SECONDS', '60'))
+SUBWAY_STREAM_RETRY_SECONDS = int(os.getenv('SUBWAY_STREAM_RETRY_SECONDS', '3'))
+SUBWAY_STREAM_MAX_CLIENTS = int(os.getenv('SUBWAY_STREAM_MAX_CLIENTS', '200'))
+SUBWAY_STREAM_POOL_MAX_SECONDS = int(os.getenv('SUBWAY_STREAM_POOL_MAX_SECONDS', '60'))
+SUBWAY_STREAM_STATE = {'eventId': 0, 'signature': None, 'data': None, 'subscribers': 0, 'refresher': None}
+SUBWAY_STREAM_CONDITION = threading.Condition()
+SUBWAY_STREAM_ASYNC_WAITERS = set()
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
 CACHE = {}
+CACHE_LOCK = threading.Lock()
+CACHE_FLIGHTS = {}
+CACHE_STATS = {}
+BUS_ROUTE_STORE = {}
+BUS_ROUTE_STORE_STATE = {'loaded': False}
+BUS_ROUTE_STORE_LOCK = threading.Lock()
+BUS_ROUTE_RETRY_AT = {}
+UPSTREAM_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv('UPSTREAM_WORKERS', '8')), thread_name_prefix='upstream')
+CACHE_REFRESH_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv('CACHE_REFRESH_WORKERS', '4')), thread_name_prefix='cache-refresh')
+# Separate from UPSTREAM_EXECUTOR: dashboard sections themselves fan out
+# into the upstream pool, and nesting them in one bounded pool can deadlock.
+DASHBOARD_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv('DASHBOARD_WORKERS', '8')), thread_name_prefix='dashboard')
+DASHBOARD_DEADLINE = float(os.getenv('DASHBOARD_DEADLINE_SECONDS', '8'))
+DASHBOARD_JOBS = {}
+DASHBOARD_JOBS_LOCK = threading.Lock()
+TIDE_CACHE_TTL = int(os.getenv('TIDE_CACHE_TTL_SECONDS', '60'))
 PORTAL_COOKIE_NAME = 'ire_resident_portal'
 PORTAL_COOKIE_MAX_AGE = 60 * 60 * 24 * 30
+PORTAL_TOKEN_CACHE_SIZE = int(os.getenv('PORTAL_TOKEN_CACHE_SIZE', '512'))
+PORTAL_TOKEN_CACHE = OrderedDict()
+PORTAL_TOKEN_CACHE_LOCK = threading.Lock()
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+DB_POOL_WAIT = float(os.getenv('DB_POOL_WAIT_SECONDS', '5'))
+DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME_SECONDS', '1800'))
+DB_POOL_CHECK_AFTER = int(os.getenv('DB_POOL_CHECK_AFTER_SECONDS', '30'))
+DB_POOL = {'idle': [], 'slots': threading.BoundedSemaphore(DB_POOL_SIZE), 'lock': threading.Lock()}
+PORTAL_LOGIN_QUEUE = queue.Queue(maxsize=int(os.getenv('PORTAL_LOGIN_QUEUE_SIZE', '1000')))
+PORTAL_LOGIN_STATE = {'writer': None, 'dropped': 0}
+PORTAL_LOGIN_LOCK = threading.Lock()
+PORTAL_LOGIN_STOP = threading.Event()
+# Password hashing gets its own worker processes and slot limit, so a login
+# storm queues behind itself instead of taking CPU from the API threads.
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS', '2'))
+LOGIN_HASH_SLOTS = threading.BoundedSemaphore(int(os.getenv('LOGIN_HASH_CONCURRENCY', str(LOGIN_HASH_WORKERS * 2))))
+LOGIN_HASH_WAIT = float(os.getenv('LOGIN_HASH_WAIT_SECONDS', '5'))
+LOGIN_HASH_STATE = {'executor': None}
+LOGIN_HASH_LOCK = threading.Lock()
+LOGIN_RATE_LIMIT = int(os.getenv('LOGIN_RATE_LIMIT', '10'))
+LOGIN_RATE_WINDOW = int(os.getenv('LOGIN_RATE_WINDOW_SECONDS', '60'))
+LOGIN_ATTEMPTS = {}
+LOGIN_ATTEMPTS_LOCK = threading.Lock()
+HTTP_KEEPALIVE_TIMEOUT = int(os.getenv('HTTP_KEEPALIVE_TIMEOUT_SECONDS', '15'))
+HTTP_MAX_REQUESTS_PER_CONNECTION = int(os.getenv('HTTP_MAX_REQUESTS_PER_CONNECTION', '100'))
+SERVER_RETRY_AFTER_SECONDS = int(os.getenv('SERVER_RETRY_AFTER_SECONDS', '5'))
+API_SLOTS = None
 DEFAULT_STATIONS = [
     {
         'mapNo': '1',
@@ -81,23 +216,371 @@ def json_response(handler, payload, status=200):
     handler.end_headers()
     handler.wfile.write(body)
 
+def compress_body(body):
+    if len(body) < COMPRESS_MIN_BYTES:
+        return {}
+    encodings = {'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        encodings['br'] = brotli.compress(body, quality=9)
+    return {name: data for name, data in encodings.items() if len(data) < len(body)}
+
+def encode_json_body(payload):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    return {
+        'payload': payload,
+        'body': body,
+        'etag': f'"{digest}"',
+        'encodings': {
+            name: {'body': data, 'etag': f'"{digest}-{name}"'}
+            for name, data in compress_body(body).items()
+        },
+    }
+
+def accepted_encodings(handler):
+    accepted = {}
+    for part in str(handler.headers.get('Accept-Encoding') or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+def negotiate_encoding(handler, available):
+    if not available:
+        return None
+    accepted = accepted_encodings(handler)
+    for name in ('br', 'gzip'):
+        if name in available and accepted.get(name, accepted.get('*', 0)) > 0:
+            return name
+    return None
+
+def etag_matches(handler, etag):
+    header = str(handler.headers.get('If-None-Match') or '').strip()
+    if not header:
+        return False
+    if header == '*':
+        return True
+    tags = [tag.strip() for tag in header.split(',')]
+    return etag in tags or f'W/{etag}' in tags
+
+def encoded_json_response(handler, encoded, status=200, cache_control='no-cache'):
+    # Cached payloads are encoded (and compressed) once per fill; clients
+    # revalidate with If-None-Match and get a header-only 304 while the fill
+    # is unchanged.
+    encoding = negotiate_encoding(handler, encoded.get('encodings'))
+    variant = encoded['encodings'][encoding] if encoding else encoded
+    if status == 200 and etag_matches(handler, variant['etag']):
+        handler.send_response(304)
+        handler.send_header('ETag', variant['etag'])
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        return
+    body = variant['body']
+    handler.send_response(status)
+    handler.send_header('Content-Type', 'application/json; charset=utf-8')
+    handler.send_header('Cache-Control', cache_control)
+    handler.send_header('ETag', variant['etag'])
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+def upstream_pool(scheme, netloc):
+    key = (scheme, netloc)
+    with UPSTREAM_POOLS_LOCK:
+        pool = UPSTREAM_POOLS.get(key)
+        if pool is None:
+            pool = UPSTREAM_POOLS[key] = {
+                'idle': [],
+                'slots': threading.BoundedSemaphore(UPSTREAM_HOST_CONCURRENCY),
+                'lock': threading.Lock(),
+            }
+        return pool
+
+def upstream_connection(scheme, netloc, timeout):
+    if scheme == 'https':
+        return http.client.HTTPSConnection(netloc, timeout=timeout, context=UPSTREAM_SSL_CONTEXT)
+    return http.client.HTTPConnection(netloc, timeout=timeout)
+
+def release_upstream_connection(pool, conn):
+    with pool['lock']:
+        if len(pool['idle']) < UPSTREAM_IDLE_PER_HOST:
+            pool['idle'].append(conn)
+            return
+    conn.close()
+
+class UpstreamUnavailable(Exception):
+    pass
+
+class UpstreamSaturated(TimeoutError):
+    # Our own per-host concurrency cap, not a sign that the host is down.
+    pass
+
+def upstream_breaker_allow(netloc):
+    # Closed: everything passes. Open: fail fast until the cooldown ends.
+    # Half-open: exactly one probe goes through; the rest keep failing fast.
+    now = time.time()
+    with UPSTREAM_BREAKERS_LOCK:
+        breaker = UPSTREAM_BREAKERS.setdefault(netloc, {
+            'state': 'closed', 'failures': 0, 'cooldown': UPSTREAM_BREAKER_COOLDOWN, 'retryAt': 0,
+            'probing': False, 'opened': 0, 'rejected': 0, 'lastError': '',
+        })
+        if breaker['state'] == 'closed':
+            return False
+        if breaker['state'] == 'open' and now >= breaker['retryAt']:
+            breaker['state'] = 'half-open'
+        if breaker['state'] == 'half-open' and not breaker['probing']:
+            breaker['probing'] = True
+            return True
+        breaker['rejected'] += 1
+        wait = max(0, breaker['retryAt'] - now)
+    raise UpstreamUnavailable(f'{netloc} circuit open, retrying in {wait:.0f}s')
+
+def upstream_breaker_record(netloc, ok, probe=False, error=None):
+    with UPSTREAM_BREAKERS_LOCK:
+        breaker = UPSTREAM_BREAKERS[netloc]
+        if probe:
+            breaker['probing'] = False
+        if ok is None:
+            return
+        if ok:
+            breaker['state'] = 'closed'
+            breaker['failures'] = 0
+            breaker['cooldown'] = UPSTREAM_BREAKER_COOLDOWN
+            return
+        breaker['failures'] += 1
+        breaker['lastError'] = str(error or '')[:200]
+        if probe:
+            # A failed probe means the host is still down: back off further.
+            breaker['cooldown'] = min(breaker['cooldown'] * 2, UPSTREAM_BREAKER_MAX_COOLDOWN)
+        elif breaker['state'] != 'closed' or breaker['failures'] < UPSTREAM_BREAKER_FAILURES:
+            return
+        breaker['state'] = 'open'
+        breaker['retryAt'] = time.time() + breaker['cooldown']
+        breaker['opened'] += 1
+
+def upstream_failure(exc):
+    # 4xx means the host answered; only transport errors and 5xx count.
+    if isinstance(exc, urllib.error.HTTPError):
+        return exc.code >= 500
+    return isinstance(exc, (OSError, http.client.HTTPException, asyncio.TimeoutError))
+
+def upstream_breaker_snapshot():
+    now = time.time()
+    with UPSTREAM_BREAKERS_LOCK:
+        return {
+            netloc: {
+                'state': b['state'],
+                'failures': b['failures'],
+                'opened': b['opened'],
+                'rejected': b['rejected'],
+                'retryInSeconds': round(max(0, b['retryAt'] - now), 1) if b['state'] != 'closed' else 0,
+                'lastError': b['lastError'],
+            }
+            for netloc, b in UPSTREAM_BREAKERS.items()
+        }
+
+def deadline_timeout(deadline, timeout):
+    # Clamp a per-call timeout to what is left of the request's budget.
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError('request deadline exceeded')
+    return min(timeout, remaining)
+
+def upstream_outcome(exc, clamped):
+    # Running out of our own budget or slots says nothing about the host.
+    if isinstance(exc, UpstreamSaturated) or (clamped and isinstance(exc, TimeoutError)):
+        return None
+    return not upstream_failure(exc)
+
+def upstream_redirect_url(exc, url, method, hop):
+    # http.client does not follow redirects the way urllib did. GET and HEAD
+    # follow a few hops, each through its own host's breaker and pool; any
+    # other 3xx surfaces as the HTTPError it is.
+    location = exc.headers.get('Location') if exc.code in UPSTREAM_REDIRECT_CODES and exc.headers else None
+    if not location or method not in ('GET', 'HEAD'):
+        raise exc
+    if hop >= UPSTREAM_MAX_REDIRECTS:
+        raise urllib.error.HTTPError(url, exc.code, f'too many redirects (limit {UPSTREAM_MAX_REDIRECTS})', exc.headers, None) from exc
+    return urllib.parse.urljoin(url, location)
+
+def upstream_slot_budget(call_deadline, netloc):
+    # Waiting for a host slot is charged to the same per-call timeout.
+    remaining = call_deadline - time.monotonic()
+    if remaining <= 0:
+        raise UpstreamSaturated(f'{netloc} concurrency limit reached')
+    return remaining
+
+def upstream_request(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    for hop in range(UPSTREAM_MAX_REDIRECTS + 1):
+        try:
+            return upstream_request_once(url, method, body, headers, timeout, deadline)
+        except urllib.error.HTTPError as exc:
+            url = upstream_redirect_url(exc, url, method, hop)
+
+def upstream_request_once(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    netloc = urllib.parse.urlsplit(url).netloc
+    budget = deadline_timeout(deadline, timeout)
+    probe = upstream_breaker_allow(netloc)
+    try:
+        data = pooled_upstream_request(url, method, body, headers, budget)
+    except Exception as exc:
+        upstream_breaker_record(netloc, upstream_outcome(exc, budget < timeout), probe, exc)
+        raise
+    upstream_breaker_record(netloc, True, probe)
+    return data
+
+def pooled_upstream_request(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT):
+    # All upstream APIs share per-host keep-alive pools, so repeated cache
+    # fills skip the TCP/TLS handshake; each host also gets a concurrency cap.
+    parsed = urllib.parse.urlsplit(url)
+    pool = upstream_pool(parsed.scheme, parsed.netloc)
+    target = parsed.path or '/'
+    if parsed.query:
+        target = f'{target}?{parsed.query}'
+    request_headers = {'User-Agent': UPSTREAM_USER_AGENT, 'Accept': 'application/json', **(headers or {})}
+    call_deadline = time.monotonic() + timeout
+    if not pool['slots'].acquire(timeout=timeout):
+        raise UpstreamSaturated(f'{parsed.netloc} concurrency limit reached')
+    try:
+        timeout = upstream_slot_budget(call_deadline, parsed.netloc)
+        for attempt in (0, 1):
+            with pool['lock']:
+                conn = pool['idle'].pop() if pool['idle'] else None
+            reused = conn is not None
+            if conn is None:
+                conn = upstream_connection(parsed.scheme, parsed.netloc, timeout)
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            try:
+                conn.request(method, target, body=body, headers=request_headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError):
+                conn.close()
+                # The host dropped an idle keep-alive socket; retry once fresh.
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                release_upstream_connection(pool, conn)
+            if resp.status >= 300:
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return data
+    finally:
+        pool['slots'].release()
+
+def upstream_json(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    return json.loads(upstream_request(url, method, body, headers, timeout, deadline).decode('utf-8'))
+
 def fetch_json(url, params):
     qs = urllib.parse.urlencode(params)
-    req = urllib.request.Request(
-        f'{url}?{qs}',
-        headers={'User-Agent': 'update-tide-resident-portal/1.0'}
-    )
-    with urllib.request.urlopen(req, timeout=8) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    return upstream_json(f'{url}?{qs}', timeout=8)
+
+def cache_stat(key, name):
+    with CACHE_LOCK:
+        stats = CACHE_STATS.setdefault(key, {'hits': 0, 'refreshes': 0, 'coalesced': 0, 'servedPrevious': 0, 'servedStale': 0, 'errors': 0})
+        stats[name] += 1
+
+def refresh_cache_entry(key, factory, flight, started):
+    cache_stat(key, 'refreshes')
+    try:
+        value = factory()
+        CACHE[key] = {'time': started, 'value': value}
+        flight['value'] = value
+        return value
+    except Exception as exc:
+        cache_stat(key, 'errors')
+        flight['error'] = exc
+        raise
+    finally:
+        settle_cache_flight(key, flight)
+
+def settle_cache_flight(key, flight):
+    with CACHE_LOCK:
+        CACHE_FLIGHTS.pop(key, None)
+        waiters, flight['waiters'] = flight['waiters'], None
+    flight['event'].set()
+    # Coroutines waiting on a thread's flight hold a loop future, not a thread.
+    for loop, waiter in waiters:
+        try:
+            loop.call_soon_threadsafe(wake_flight_waiter, waiter)
+        except RuntimeError:
+            pass
 
-def cached(key, factory, ttl=CACHE_TTL):
+def wake_flight_waiter(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+def refresh_cache_entry_quietly(key, factory, flight, started):
+    try:
+        refresh_cache_entry(key, factory, flight, started)
+    except Exception:
+        pass
+
+def cached(key, factory, ttl=CACHE_TTL, max_stale=None):
     now = time.time()
     hit = CACHE.get(key)
     if hit and now - hit['time'] < ttl:
+        cache_stat(key, 'hits')
+        return hit['value']
+    if hit and max_stale is not None and now - hit['time'] >= ttl + max_stale:
+        # Past the hard staleness bound the old value must not be served at all.
+        with CACHE_LOCK:
+            if CACHE.get(key) is hit:
+                CACHE.pop(key, None)
+        hit = None
+    # Single-flight: the first thread to see an expired entry refreshes it,
+    # everyone arriving meanwhile reuses that refresh instead of calling upstream.
+    with CACHE_LOCK:
+        flight = CACHE_FLIGHTS.get(key)
+        leader = flight is None
+        if leader:
+            flight = CACHE_FLIGHTS[key] = {'event': threading.Event(), 'value': None, 'error': None, 'waiters': []}
+    if not leader:
+        if hit:
+            cache_stat(key, 'servedPrevious')
+            return hit['value']
+        cache_stat(key, 'coalesced')
+        flight['event'].wait()
+        if flight['error'] is not None:
+            raise flight['error']
+        return flight['value']
+    if hit and max_stale:
+        # Stale-while-revalidate: answer from the last good value and let a
+        # background worker pay for the upstream round trip.
+        cache_stat(key, 'servedStale')
+        CACHE_REFRESH_EXECUTOR.submit(refresh_cache_entry_quietly, key, factory, flight, now)
         return hit['value']
-    value = factory()
-    CACHE[key] = {'time': now, 'value': value}
-    return value
+    return refresh_cache_entry(key, factory, flight, now)
+
+def cached_json(key, factory, ttl=CACHE_TTL, max_stale=None):
+    return cached(key, lambda: encode_json_body(factory()), ttl, max_stale)
+
+def cache_stats_snapshot():
+    with CACHE_LOCK:
+        return {key: dict(stats) for key, stats in CACHE_STATS.items()}
 
 def listify(value):
     if value is None:
@@ -107,28 +590,102 @@ def listify(value):
 def crowd_label(value):
     return {'1': '여유', '2': '보통', '3': '혼잡', '4': '매우 혼잡'}.get(str(value), '')
 
-def parse_arrivals(station):
-    key = os.getenv('GYEONGGI_BUS_API_KEY') or os.getenv('SEOUL_API_KEY')
-    if not key:
-        return {**station, 'arrivals': [], 'note': '버스 API 키가 설정되지 않았습니다.'}
-
-    route_rows = []
-    try:
-        route_data = fetch_json(GG_BASE_STATION_ROUTES, {
-            'serviceKey': key,
-            'stationId': station['stationId'],
-            'format': 'json'
-        })
-        route_body = route_data.get('response', {}).get('msgBody', {})
-        route_rows = listify(route_body.get('busRouteList'))
-    except Exception:
-        route_rows = []
+def bus_api_key():
+    return os.getenv('GYEONGGI_BUS_API_KEY') or os.getenv('SEOUL_API_KEY')
 
-    data = fetch_json(GG_BASE_ARRIVAL, {
+def bus_station_params(key, station):
+    return {
         'serviceKey': key,
         'stationId': station['stationId'],
         'format': 'json'
-    })
+    }
+
+def station_routes_from_data(route_data):
+    route_body = route_data.get('response', {}).get('msgBody', {})
+    rows = listify(route_body.get('busRouteList'))
+    header = route_data.get('response', {}).get('msgHeader', {})
+    # resultCode 4 is the API's "no result": a stop without routes is a real
+    # answer and is cached like any other list.
+    if not rows and str(header.get('resultCode')) not in ('0', '4'):
+        raise RuntimeError(header.get('resultMessage') or 'empty route list')
+    return rows
+
+def fetch_station_routes(key, station):
+    return station_routes_from_data(fetch_json(GG_BASE_STATION_ROUTES, bus_station_params(key, station)))
+
+def load_bus_route_store():
+    with BUS_ROUTE_STORE_LOCK:
+        if BUS_ROUTE_STORE_STATE['loaded']:
+            return
+        BUS_ROUTE_STORE_STATE['loaded'] = True
+        try:
+            if BUS_ROUTE_CACHE_PATH.exists():
+                BUS_ROUTE_STORE.update(json.loads(BUS_ROUTE_CACHE_PATH.read_text(encoding='utf-8')))
+        except Exception:
+            BUS_ROUTE_STORE.clear()
+        # Seed the in-memory cache with the fetch time from disk, so a restart
+        # keeps serving the stored list and only refreshes it when it is due.
+        for station_id, entry in BUS_ROUTE_STORE.items():
+            CACHE.setdefault(f'bus-station-routes:{station_id}', {'time': entry['time'], 'value': entry['routes']})
+
+def save_bus_route_store(station_id, routes, fetched_at):
+    with BUS_ROUTE_STORE_LOCK:
+        BUS_ROUTE_STORE[station_id] = {'time': fetched_at, 'routes': routes}
+        try:
+            DATA_DIR.mkdir(exist_ok=True)
+            tmp = BUS_ROUTE_CACHE_PATH.with_suffix('.tmp')
+            tmp.write_text(json.dumps(BUS_ROUTE_STORE, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+            tmp.replace(BUS_ROUTE_CACHE_PATH)
+        except Exception:
+            pass
+
+def station_routes_backing_off(station_id):
+    # After a failed refresh the stop is not retried before BUS_ROUTE_RETRY_AT;
+    # meanwhile it serves the last good list, or none.
+    now = time.time()
+    if now >= BUS_ROUTE_RETRY_AT.get(station_id, 0):
+        return None
+    hit = CACHE.get(f'bus-station-routes:{station_id}')
+    return hit['value'] if hit and now - hit['time'] < BUS_ROUTE_CACHE_TTL + BUS_ROUTE_CACHE_MAX_STALE else []
+
+def station_route_refresh_failed(station_id):
+    BUS_ROUTE_RETRY_AT[station_id] = time.time() + BUS_ROUTE_RETRY_SECONDS
+
+def station_route_rows(key, station):
+    # Route lists barely change; keep them for hours, refresh in the background
+    # and keep serving the last good list while the upstream call fails.
+    load_bus_route_store()
+    station_id = str(station['stationId'])
+    backing_off = station_routes_backing_off(station_id)
+    if backing_off is not None:
+        return backing_off
+    def factory():
+        fetched_at = time.time()
+        try:
+            routes = fetch_station_routes(key, station)
+        except Exception:
+            station_route_refresh_failed(station_id)
+            raise
+        BUS_ROUTE_RETRY_AT.pop(station_id, None)
+        save_bus_route_store(station_id, routes, fetched_at)
+        return routes
+    try:
+        return cached(f'bus-station-routes:{station_id}', factory, BUS_ROUTE_CACHE_TTL, BUS_ROUTE_CACHE_MAX_STALE)
+    except Exception:
+        return []
+
+def fetch_station_arrival_data(key, station):
+    return fetch_json(GG_BASE_ARRIVAL, bus_station_params(key, station))
+
+def parse_arrivals(station):
+    key = bus_api_key()
+    if not key:
+        return {**station, 'arrivals': [], 'note': '버스 API 키가 설정되지 않았습니다.'}
+    route_rows = station_route_rows(key, station)
+    data = fetch_station_arrival_data(key, station)
+    return build_station_arrivals(station, route_rows, data)
+
+def build_station_arrivals(station, route_rows, data):
     header = data.get('response', {}).get('msgHeader', {})
     body = data.get('response', {}).get('msgBody', {})
     rows = listify(body.get('busArrivalList'))
@@ -204,24 +761,62 @@ def parse_arrivals(station):
         'updatedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
     }
 
+def fetch_bus_stations(stations):
+    key = bus_api_key()
+    if not key:
+        return [parse_arrivals(s) for s in stations]
+    # Every station's route list and arrival list go out at once and share
+    # one deadline, so a cold fill costs about one upstream round trip.
+    deadline = time.monotonic() + BUS_FETCH_DEADLINE
+    jobs = [
+        (station, UPSTREAM_EXECUTOR.submit(station_route_rows, key, station), UPSTREAM_EXECUTOR.submit(fetch_station_arrival_data, key, station))
+        for station in stations
+    ]
+    results = []
+    failures = []
+    for station, routes_future, arrivals_future in jobs:
+        try:
+            data = arrivals_future.result(timeout=max(0, deadline - time.monotonic()))
+        except Exception as exc:
+            reason = '응답 시간 초과' if isinstance(exc, FutureTimeoutError) else str(exc)
+            failures.append(reason)
+            results.append({**station, 'arrivals': [], 'note': f'정류장 정보를 불러오지 못했습니다: {reason}'})
+            continue
+        try:
+            route_rows = routes_future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            route_rows = []
+        results.append(build_station_arrivals(station, route_rows, data))
+    if stations and len(failures) == len(stations):
+        raise RuntimeError(failures[0])
+    return results
+
+def bus_payload(stations):
+    return {
+        'title': '이레하이니스 주변 버스 도착',
+        'stations': stations,
+        'source': '경기도 버스도착정보 API',
+    }
+
+def bus_error_payload(exc):
+    return {
+        'title': '이레하이니스 주변 버스 도착',
+        'stations': [{**s, 'arrivals': []} for s in DEFAULT_STATIONS],
+        'note': f'버스 정보를 불러오지 못했습니다: {exc}',
+        'source': '경기도 버스도착정보 API',
+    }
+
+def bus_arrivals_encoded():
+    def factory():
+        return bus_payload(fetch_bus_stations(DEFAULT_STATIONS))
+    return cached_json('bus-arrivals-default', factory, CACHE_TTL, BUS_CACHE_MAX_STALE)
+
 def handle_bus_arrivals(handler):
     record_metric(handler, 'bus')
-    def factory():
-        stations = [parse_arrivals(s) for s in DEFAULT_STATIONS]
-        return {
-            'title': '이레하이니스 주변 버스 도착',
-            'stations': stations,
-            'source': '경기도 버스도착정보 API',
-        }
     try:
-        json_response(handler, cached('bus-arrivals-default', factory))
+        encoded_json_response(handler, bus_arrivals_encoded())
     except Exception as exc:
-        json_response(handler, {
-            'title': '이레하이니스 주변 버스 도착',
-            'stations': [{**s, 'arrivals': []} for s in DEFAULT_STATIONS],
-            'note': f'버스 정보를 불러오지 못했습니다: {exc}',
-            'source': '경기도 버스도착정보 API',
-        }, status=502)
+        json_response(handler, bus_error_payload(exc), status=502)
 
 
 KST = ZoneInfo('Asia/Seoul')
@@ -230,12 +825,136 @@ SUBWAY_FRESH_MAX_SECONDS = 180
 SUBWAY_PASSED_GRACE_SECONDS = 30
 POST_WOLGOT_TERMINAL_HOLD_SECONDS = 60
 WOLGOT_ROUTE = ['청량리', '왕십리', '서울숲', '압구정로데오', '강남구청', '선정릉', '선릉', '한티', '도곡', '구룡', '개포동', '대모산입구', '수서', '복정', '가천대', '태평', '모란', '야탑', '이매', '서현', '수내', '정자', '미금', '오리', '죽전', '보정', '구성', '신갈', '기흥', '상갈', '청명', '영통', '망포', '매탄권선', '수원시청', '매교', '수원', '고색', '오목천', '어천', '야목', '사리', '한대앞', '중앙', '고잔', '초지', '안산', '신길온천', '정왕', '오이도', '달월', '월곶', '소래포구', '인천논현', '호구포', '남동인더스파크', '원인재', '연수', '송도', '인하대', '숭의', '신포', '인천']
-WOLGOT_INDEX = WOLGOT_ROUTE.index('월곶')
+
+
+class SubwayTopology:
+    # Built once at import: station lookups are dict hits and travel time
+    # between any two stations is one subtraction of per-direction prefix sums.
+    def __init__(self, stations, anchor):
+        self.stations = list(stations)
+        self.positions = {name: idx for idx, name in enumerate(self.stations)}
+        self.anchor_index = self.positions[anchor]
+        self.west_index = self.positions['오이도']
+        self.city_index = self.positions['수원']
+        self.elapsed = {}
+        for direction in ('상행', '하행'):
+            totals = [0]
+            for idx in range(len(self.stations) - 1):
+                totals.append(totals[-1] + self.pair_seconds(idx, idx + 1, direction))
+            self.elapsed[direction] = totals
+
+    def pair_seconds(self, a, b, direction):
+        west_side = max(a, b) >= self.west_index
+        city_side = min(a, b) <= self.city_index
+        base = 150 if west_side else 125 if city_side else 135
+        if direction == '상행':
+            base = max(105, base - 8)
+        return base
+
+    def travel_seconds(self, start_idx, end_idx, direction):
+        totals = self.elapsed['상행' if direction == '상행' else '하행']
+        return abs(totals[end_idx] - totals[start_idx])
+
+
+class SubwayRecord:
+    # Slotted record for the subway path; as_dict() runs once per payload.
+    __slots__ = ()
+
+    def as_dict(self):
+        return dict(zip(self.FIELDS, self.VALUES(self)))
+
+
+@dataclass(slots=True, eq=False)
+class TrainPosition(SubwayRecord):
+    trainId: str | None = None
+    trainNo: str | None = None
+    direction: str | None = None
+    destination: str | None = None
+    currentStation: str | None = None
+    previousStation: str | None = None
+    nextStation: str | None = None
+    normalizedState: str | None = None
+    rawState: str | None = None
+    rawArrivalCode: str | None = None
+    positionTimestamp: str | None = None
+    serverTimestamp: str | None = None
+    positionAgeSeconds: int | None = None
+    segmentStartStation: str | None = None
+    segmentEndStation: str | None = None
+    segmentProgress: float | None = None
+    estimatedSegmentTravelSeconds: int | None = None
+    elapsedSeconds: int | None = None
+    logicalPosition: float | None = None
+    targetStation: str | None = None
+    etaSeconds: int | None = None
+    etaLabel: str | None = None
+    confidence: str | None = None
+    validationStatus: str | None = None
+    predictionSource: str | None = None
+    mapState: str | None = None
+    positionPrecision: str | None = None
+    lastRealtimeStation: str | None = None
+    routeValidation: str | None = None
+    routeReason: str | None = None
+    terminalStation: str | None = None
+    reachesWolgot: bool | None = None
+
+
+@dataclass(slots=True, eq=False)
+class SubwayCandidate(SubwayRecord):
+    direction: str | None = None
+    destination: str | None = None
+    trainLineNm: str | None = None
+    arrivalMessage: str | None = None
+    currentStation: str | None = None
+    arrivalCode: str | None = None
+    trainState: str | None = None
+    seconds: int | None = None
+    minutes: int | None = None
+    etaSeconds: int | None = None
+    displayTime: str | None = None
+    hasExactEta: bool | None = None
+    stationCount: int | None = None
+    scheduledTime: str | None = None
+    predictedArrivalTime: str | None = None
+    predictionSource: str | None = None
+    confidence: str | None = None
+    sourceLabel: str | None = None
+    positionAgeSeconds: int | None = None
+    positionEtaMinutes: int | None = None
+    scheduleBasis: str | None = None
+    trainNo: str | None = None
+    terminalStation: str | None = None
+    updatedAt: str | None = None
+    positionOnly: bool | None = None
+    mapState: str | None = None
+    positionPrecision: str | None = None
+    lastRealtimeStation: str | None = None
+    trainPosition: TrainPosition | None = None
+
+    def as_dict(self):
+        data = SubwayRecord.as_dict(self)
+        if self.trainPosition is not None:
+            data['trainPosition'] = self.trainPosition.as_dict()
+        return data
+
+
+for record_type in (TrainPosition, SubwayCandidate):
+    record_type.FIELDS = tuple(field.name for field in fields(record_type))
+    record_type.VALUES = operator.attrgetter(*record_type.FIELDS)
+
+
+WOLGOT_TOPOLOGY = SubwayTopology(WOLGOT_ROUTE, '월곶')
+WOLGOT_POSITIONS = WOLGOT_TOPOLOGY.positions
+WOLGOT_INDEX = WOLGOT_TOPOLOGY.anchor_index
 DIRECTION_TERMINALS = {
     '상행': {'오이도', '왕십리', '청량리', '죽전', '고색'},
     '하행': {'인천', '오이도'},
 }
 POST_WOLGOT_TRACKS = {}
+POST_WOLGOT_TRACKS_STATE = {'dirty': False, 'timer': None}
+POST_WOLGOT_TRACKS_LOCK = threading.Lock()
+POST_WOLGOT_TRACKS_WRITE_LOCK = threading.Lock()
 
 
 def load_post_wolgot_tracks():
@@ -253,30 +972,58 @@ def load_post_wolgot_tracks():
 
 
 def save_post_wolgot_tracks():
-    try:
-        DATA_DIR.mkdir(exist_ok=True)
-        serializable = {}
-        for key, track in POST_WOLGOT_TRACKS.items():
-            item = dict(track)
-            if hasattr(item.get('lastSignalAt'), 'isoformat'):
-                item['lastSignalAt'] = item['lastSignalAt'].isoformat()
-            serializable[key] = item
-        POST_WOLGOT_TRACKS_PATH.write_text(json.dumps(serializable, ensure_ascii=False, indent=2), encoding='utf-8')
-    except Exception:
-        pass
+    # The write lock keeps saves in order; the state lock is only held for the
+    # snapshot so marking tracks dirty never waits on disk I/O.
+    with POST_WOLGOT_TRACKS_WRITE_LOCK:
+        with POST_WOLGOT_TRACKS_LOCK:
+            timer = POST_WOLGOT_TRACKS_STATE['timer']
+            POST_WOLGOT_TRACKS_STATE['timer'] = None
+            if timer is not None:
+                timer.cancel()
+            if not POST_WOLGOT_TRACKS_STATE['dirty']:
+                return
+            POST_WOLGOT_TRACKS_STATE['dirty'] = False
+            serializable = {}
+            for key, track in dict(POST_WOLGOT_TRACKS).items():
+                item = dict(track)
+                if hasattr(item.get('lastSignalAt'), 'isoformat'):
+                    item['lastSignalAt'] = item['lastSignalAt'].isoformat()
+                serializable[key] = item
+        try:
+            DATA_DIR.mkdir(exist_ok=True)
+            # Write a sibling temp file and rename it so a crash mid-write
+            # leaves the previous tracks file intact.
+            tmp = POST_WOLGOT_TRACKS_PATH.with_suffix('.tmp')
+            tmp.write_text(json.dumps(serializable, ensure_ascii=False, separators=(',', ':')), encoding='utf-8')
+            tmp.replace(POST_WOLGOT_TRACKS_PATH)
+        except Exception:
+            mark_post_wolgot_tracks_dirty()
+
+
+def mark_post_wolgot_tracks_dirty():
+    with POST_WOLGOT_TRACKS_LOCK:
+        POST_WOLGOT_TRACKS_STATE['dirty'] = True
+        if POST_WOLGOT_TRACKS_STATE['timer'] is not None:
+            return
+        timer = threading.Timer(POST_WOLGOT_FLUSH_DELAY, save_post_wolgot_tracks)
+        timer.daemon = True
+        POST_WOLGOT_TRACKS_STATE['timer'] = timer
+    timer.start()
 
 
+atexit.register(save_post_wolgot_tracks)
+
 
 def wind_direction_label(degrees):
     labels = ['북풍', '북동풍', '동풍', '남동풍', '남풍', '남서풍', '서풍', '북서풍']
     return labels[int((degrees + 22.5) // 45) % 8]
 
 
-def fetch_windy_weather():
+def windy_request_body():
     key = os.getenv('WINDY_API_KEY')
     if not key:
         raise RuntimeError('Windy API key is not configured')
-    body = json.dumps({
+    return json.dumps({
         'lat': WOLGOT_LAT,
         'lon': WOLGOT_LON,
         'model': os.getenv('WINDY_MODEL', 'gfs'),
@@ -284,13 +1031,15 @@ def fetch_windy_weather():
         'levels': ['surface'],
         'key': key,
     }).encode('utf-8')
-    req = urllib.request.Request(
-        WINDY_POINT_FORECAST,
-        data=body,
-        headers={'Content-Type': 'application/json', 'User-Agent': 'update-tide-resident-portal/1.0'}
-    )
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode('utf-8'))
+
+
+def fetch_windy_weather():
+    body = windy_request_body()
+    data = upstream_json(WINDY_POINT_FORECAST, method='POST', body=body, headers={'Content-Type': 'application/json'}, timeout=10)
+    return windy_weather_from_data(data)
+
+
+def windy_weather_from_data(data):
     ts = data.get('ts') or []
     if not ts:
         raise RuntimeError('Windy returned no forecast timestamps')
@@ -349,11 +1098,39 @@ def fetch_windy_weather():
 def kma_base_datetime(now=None):
     current = now or datetime.now(KST)
     # 초단기 실황/예보는 보통 매시 30~40분 이후 안정적으로 열립니다.
-    base = current - timedelta(minutes=45)
+    base = current - timedelta(minutes=KMA_PUBLISH_DELAY_MINUTES)
+    return base.strftime('%Y%m%d'), base.strftime('%H00')
+
+
+def kma_previous_base(base_date, base_time):
+    base = datetime.strptime(base_date + base_time, '%Y%m%d%H%M') - timedelta(hours=1)
     return base.strftime('%Y%m%d'), base.strftime('%H00')
 
 
-def kma_request(url, params):
+def kma_source_plan(name, now=None):
+    base_date, base_time = kma_base_datetime(now)
+    with KMA_SOURCE_LOCK:
+        state = KMA_SOURCE_STATE.setdefault(name, {'latest': None, 'probeAt': 0, 'backoff': KMA_PROBE_BACKOFF})
+        latest = state['latest']
+        current = latest is not None and (latest['baseDate'], latest['baseTime']) == (base_date, base_time)
+        due = latest is None or (not current and time.time() >= state['probeAt'])
+    return latest, base_date, base_time, due
+
+
+def kma_source_settled(name, value=None, published=True):
+    with KMA_SOURCE_LOCK:
+        state = KMA_SOURCE_STATE[name]
+        if value is not None:
+            state['latest'] = value
+        if published:
+            state['probeAt'] = 0
+            state['backoff'] = KMA_PROBE_BACKOFF
+        else:
+            state['probeAt'] = time.time() + state['backoff']
+            state['backoff'] = min(state['backoff'] * 2, KMA_PROBE_MAX_BACKOFF)
+
+
+def kma_url(url, params):
     key = os.getenv('KMA_API_KEY') or os.getenv('KMA_SERVICE_KEY')
     if not key:
         raise RuntimeError('KMA API key is not configured')
@@ -366,9 +1143,14 @@ def kma_request(url, params):
         'ny': KMA_NY,
         **params,
     }, safe='%')
-    req = urllib.request.Request(f'{url}?{query}', headers={'User-Agent': 'update-tide-resident-portal/1.0'})
-    with urllib.request.urlopen(req, timeout=10) as resp:
-        data = json.loads(resp.read().decode('utf-8'))
+    return f'{url}?{query}'
+
+
+def kma_request(url, params, deadline=None):
+    return kma_items_from_data(upstream_json(kma_url(url, params), timeout=10, deadline=deadline))
+
+
+def kma_items_from_data(data):
     header = data.get('response', {}).get('header', {})
     if header.get('resultCode') not in (None, '00'):
         raise RuntimeError(header.get('resultMsg') or 'KMA API error')
@@ -400,11 +1182,57 @@ def kma_condition(pty, sky=None):
     return {'1': '맑음', '3': '구름 많음', '4': '흐림'}.get(str(sky), '맑음')
 
 
-def fetch_kma_weather():
-    base_date, base_time = kma_base_datetime()
-    ncst_items = kma_request(KMA_ULTRA_NCST, {'base_date': base_date, 'base_time': base_time})
+def fetch_kma_source(url, base_date, base_time, deadline=None):
+    items = kma_request(url, {'base_date': base_date, 'base_time': base_time}, deadline)
+    if not items:
+        raise RuntimeError(f'KMA {base_date} {base_time} is not published yet')
+    return {'baseDate': base_date, 'baseTime': base_time, 'items': items}
+
+
+def kma_source(name, url, now=None, deadline=None):
+    latest, base_date, base_time, due = kma_source_plan(name, now)
+    if not due:
+        cache_stat(f'weather-source:{name}', 'hits')
+        return latest
+    fetch_lock = KMA_FETCH_LOCKS[name]
+    # Only one thread probes; the rest keep serving the previous base_time.
+    if latest is not None:
+        acquired = fetch_lock.acquire(blocking=False)
+    else:
+        acquired = fetch_lock.acquire(timeout=deadline_timeout(deadline, UPSTREAM_TIMEOUT))
+    if not acquired:
+        if latest is None:
+            raise TimeoutError('request deadline exceeded')
+        cache_stat(f'weather-source:{name}', 'servedPrevious')
+        return latest
+    try:
+        latest, base_date, base_time, due = kma_source_plan(name, now)
+        if not due:
+            return latest
+        cache_stat(f'weather-source:{name}', 'refreshes')
+        try:
+            value = fetch_kma_source(url, base_date, base_time, deadline)
+        except Exception:
+            cache_stat(f'weather-source:{name}', 'errors')
+            if latest is None:
+                # Cold start just before publication: fall back one base_time.
+                value = fetch_kma_source(url, *kma_previous_base(base_date, base_time), deadline)
+                kma_source_settled(name, value, published=False)
+                return value
+            kma_source_settled(name, published=False)
+            return latest
+        kma_source_settled(name, value)
+        return value
+    finally:
+        fetch_lock.release()
+
+
+def kma_weather_from_sources(ncst, fcst):
+    return kma_weather_from_items(ncst['items'], fcst['items'], ncst['baseDate'], ncst['baseTime'])
+
+
+def kma_weather_from_items(ncst_items, fcst_items, base_date, base_time):
     ncst = kma_value_map(ncst_items, 'obsrValue')
-    fcst_items = kma_request(KMA_ULTRA_FCST, {'base_date': base_date, 'base_time': base_time})
     forecasts = {}
     for item in fcst_items:
         key = (item.get('fcstDate'), item.get('fcstTime'))
@@ -437,48 +1265,85 @@ def fetch_kma_weather():
     }
 
 
+def weather_unavailable_payload(exc):
+    return {
+        'location': '월곶동',
+        'model': 'KMA',
+        'isUnavailable': True,
+        'condition': None,
+        'temperatureC': None,
+        'windSpeedMs': None,
+        'windDirection': None,
+        'windGustMs': None,
+        'precipMm1h': None,
+        'humidity': None,
+        'source': '기상청 초단기실황/초단기예보',
+        'note': f'현재 기상청 실시간 날씨 연결이 되지 않습니다: {exc}',
+        'updatedAt': datetime.now(KST).isoformat(),
+    }
+
+
+def merge_windy_into_kma(kma, windy):
+    if kma.get('windGustMs') is None:
+        kma['windGustMs'] = windy.get('windGustMs')
+    kma['secondarySource'] = 'Windy/GFS 돌풍만 보조'
+    if kma.get('temperatureC') is not None and windy.get('temperatureC') is not None:
+        diff = round(abs(kma['temperatureC'] - windy['temperatureC']), 1)
+        if diff >= 3:
+            kma['modelTemperatureDiffC'] = diff
+    return kma
+
+
+def kma_weather_partial(ncst, fcst):
+    # The nowcast carries the headline numbers; without the forecast only the
+    # sky condition is missing, so that part is marked degraded instead.
+    if isinstance(ncst, Exception):
+        return weather_unavailable_payload(ncst)
+    if isinstance(fcst, Exception):
+        kma = kma_weather_from_sources(ncst, {'items': []})
+        kma['degraded'] = ['forecast']
+        kma['forecastNote'] = f'초단기예보를 제때 받지 못해 하늘 상태 없이 표시합니다: {fcst}'
+        return kma
+    return kma_weather_from_sources(ncst, fcst)
+
 def fetch_weather():
-    try:
-        kma = fetch_kma_weather()
-    except Exception as exc:
-        return {
-            'location': '월곶동',
-            'model': 'KMA',
-            'isUnavailable': True,
-            'condition': None,
-            'temperatureC': None,
-            'windSpeedMs': None,
-            'windDirection': None,
-            'windGustMs': None,
-            'precipMm1h': None,
-            'humidity': None,
-            'source': '기상청 초단기실황/초단기예보',
-            'note': f'현재 기상청 실시간 날씨 연결이 되지 않습니다: {exc}',
-            'updatedAt': datetime.now(KST).isoformat(),
-        }
-    try:
-        windy = fetch_windy_weather()
-        if kma.get('windGustMs') is None:
-            kma['windGustMs'] = windy.get('windGustMs')
-        kma['secondarySource'] = 'Windy/GFS 돌풍만 보조'
-        if kma.get('temperatureC') is not None and windy.get('temperatureC') is not None:
-            diff = round(abs(kma['temperatureC'] - windy['temperatureC']), 1)
-            if diff >= 3:
-                kma['modelTemperatureDiffC'] = diff
-    except Exception:
-        pass
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    ncst_job = UPSTREAM_EXECUTOR.submit(kma_source, 'kma-ncst', KMA_ULTRA_NCST, None, deadline)
+    fcst_job = UPSTREAM_EXECUTOR.submit(kma_source, 'kma-fcst', KMA_ULTRA_FCST, None, deadline)
+    windy_job = UPSTREAM_EXECUTOR.submit(cached, 'weather-source:windy', fetch_windy_weather, WINDY_CACHE_TTL, WINDY_CACHE_MAX_STALE)
+    sources = []
+    for job in (ncst_job, fcst_job):
+        try:
+            sources.append(job.result(timeout=max(0, deadline - time.monotonic())))
+        except FutureTimeoutError:
+            sources.append(TimeoutError('request deadline exceeded'))
+        except Exception as exc:
+            sources.append(exc)
+    kma = kma_weather_partial(*sources)
+    if kma.get('isUnavailable'):
+        return kma
+    # Windy only contributes gusts. If it is still filling, this view goes out
+    # without it and the next rebuild picks it up from its cache.
+    if windy_job.done() and windy_job.exception() is None:
+        merge_windy_into_kma(kma, windy_job.result())
     return kma
 
+def weather_error_payload(exc):
+    return {
+        'location': '월곶 이레하이니스',
+        'note': f'날씨 정보를 불러오지 못했습니다: {exc}',
+        'source': 'Windy Point Forecast API',
+    }
+
+def weather_encoded():
+    return cached_json('weather-wolgot-kma', fetch_weather, WEATHER_CACHE_TTL, WEATHER_CACHE_MAX_STALE)
+
 def handle_weather(handler):
     record_metric(handler, 'ocean')
     try:
-        json_response(handler, cached('weather-wolgot-kma', fetch_weather, WEATHER_CACHE_TTL))
+        encoded_json_response(handler, weather_encoded())
     except Exception as exc:
-        json_response(handler, {
-            'location': '월곶 이레하이니스',
-            'note': f'날씨 정보를 불러오지 못했습니다: {exc}',
-            'source': 'Windy Point Forecast API',
-        }, status=502)
+        json_response(handler, weather_error_payload(exc), status=502)
 
 def minutes_from_hhmm(value):
     hour, minute = [int(part) for part in value.split(':')[:2]]
@@ -500,6 +1365,11 @@ def parse_kst_timestamp(value, now=None):
     if not value:
         return None
     text = str(value).strip()
+    try:
+        # fromisoformat takes both separators and is far cheaper than strptime.
+        return datetime.fromisoformat(text[:19]).replace(tzinfo=KST)
+    except ValueError:
+        pass
     for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S'):
         try:
             return datetime.strptime(text[:19], fmt).replace(tzinfo=KST)
@@ -589,22 +1459,16 @@ def normalize_subway_state(code, message):
     return 'UNKNOWN'
 
 def adjacent_segment_seconds(start_station, end_station, direction):
-    try:
-        a = WOLGOT_ROUTE.index(start_station)
-        b = WOLGOT_ROUTE.index(end_station)
-    except ValueError:
+    a = WOLGOT_POSITIONS.get(start_station)
+    b = WOLGOT_POSITIONS.get(end_station)
+    if a is None or b is None:
         return 135 if direction == '하행' else 120
-    west_side = max(a, b) >= WOLGOT_ROUTE.index('오이도')
-    city_side = min(a, b) <= WOLGOT_ROUTE.index('수원')
-    base = 150 if west_side else 125 if city_side else 135
-    if direction == '상행':
-        base = max(105, base - 8)
-    return base
+    return WOLGOT_TOPOLOGY.pair_seconds(a, b, direction)
 
 def infer_position_segment(direction, current_station, station_count, normalized_state):
-    if current_station not in WOLGOT_ROUTE:
+    idx = WOLGOT_POSITIONS.get(current_station)
+    if idx is None:
         return None
-    idx = WOLGOT_ROUTE.index(current_station)
     if current_station == '월곶' or normalized_state in ('ARRIVED', 'STOPPED'):
         return current_station, current_station, 0.0, idx
     # Seoul API 월곶 station endpoint reports upstream stations approaching 월곶.
@@ -615,17 +1479,18 @@ def infer_position_segment(direction, current_station, station_count, normalized
     return current_station, WOLGOT_ROUTE[next_idx], None, None
 
 def build_train_position(candidate, debug, now, observed_at, station_count):
-    current_station = candidate.get('currentStation') or ''
-    direction = candidate.get('direction') or ''
-    normalized = normalize_subway_state(candidate.get('arrivalCode'), candidate.get('arrivalMessage'))
+    current_station = candidate.currentStation or ''
+    direction = candidate.direction or ''
+    normalized = normalize_subway_state(candidate.arrivalCode, candidate.arrivalMessage)
     segment = infer_position_segment(direction, current_station, station_count, normalized)
     if not segment:
-        debug['positionValidation'] = 'POSITION_REJECTED_NO_TOPOLOGY'
+        if debug is not None:
+            debug['positionValidation'] = 'POSITION_REJECTED_NO_TOPOLOGY'
         return None
     start, end, forced_progress, forced_logical = segment
-    start_idx = WOLGOT_ROUTE.index(start)
-    end_idx = WOLGOT_ROUTE.index(end)
-    duration = adjacent_segment_seconds(start, end, direction)
+    start_idx = WOLGOT_POSITIONS[start]
+    end_idx = WOLGOT_POSITIONS[end]
+    duration = WOLGOT_TOPOLOGY.pair_seconds(start_idx, end_idx, direction)
     elapsed = max(0, (now - observed_at).total_seconds())
     if forced_progress is not None:
         progress = forced_progress
@@ -638,60 +1503,61 @@ def build_train_position(candidate, debug, now, observed_at, station_count):
     else:
         progress = max(0.05, min(0.9, elapsed / duration))
     logical = forced_logical if forced_logical is not None else start_idx + (end_idx - start_idx) * progress
-    age = candidate.get('positionAgeSeconds')
+    age = candidate.positionAgeSeconds
     stale = age is not None and age > SUBWAY_FRESH_MAX_SECONDS
-    route_ok, route_status, route_reason = route_validation(direction, current_station, candidate.get('destination'))
+    route_ok, route_status, route_reason = route_validation(direction, current_station, candidate.destination)
     validation = 'accepted' if route_ok and not stale else 'rejected'
-    position = {
-        'trainId': candidate.get('trainNo') or f"{direction}-{current_station}-{candidate.get('destination','')}",
-        'trainNo': candidate.get('trainNo') or '',
-        'direction': direction,
-        'destination': candidate.get('destination') or '',
-        'currentStation': current_station,
-        'previousStation': start,
-        'nextStation': end,
-        'normalizedState': normalized,
-        'rawState': candidate.get('trainState') or '',
-        'rawArrivalCode': candidate.get('arrivalCode') or '',
-        'positionTimestamp': observed_at.isoformat(),
-        'serverTimestamp': now.isoformat(),
-        'positionAgeSeconds': age,
-        'segmentStartStation': start,
-        'segmentEndStation': end,
-        'segmentProgress': round(progress, 3),
-        'estimatedSegmentTravelSeconds': duration,
-        'elapsedSeconds': round(elapsed),
-        'logicalPosition': round(logical, 3),
-        'targetStation': '월곶',
-        'etaSeconds': candidate.get('etaSeconds'),
-        'etaLabel': candidate.get('displayTime'),
-        'confidence': candidate.get('confidence'),
-        'validationStatus': validation,
-        'predictionSource': candidate.get('predictionSource'),
-        'mapState': candidate.get('mapState') or 'REALTIME_TRACKED',
-        'positionPrecision': candidate.get('positionPrecision') or 'realtime',
-        'lastRealtimeStation': candidate.get('lastRealtimeStation') or '',
-        'routeValidation': route_status,
-        'routeReason': route_reason,
-    }
-    debug.update({
-        'normalizedState': normalized,
-        'segmentStart': start,
-        'segmentEnd': end,
-        'estimatedSegmentTravelSeconds': duration,
-        'elapsedSeconds': round(elapsed),
-        'calculatedProgress': round(progress, 3),
-        'logicalPosition': round(logical, 3),
-        'positionValidation': validation,
-    })
-    return position if validation == 'accepted' else None
+    position = None if validation != 'accepted' else TrainPosition(
+        trainId=candidate.trainNo or f"{direction}-{current_station}-{candidate.destination}",
+        trainNo=candidate.trainNo or '',
+        direction=direction,
+        destination=candidate.destination or '',
+        currentStation=current_station,
+        previousStation=start,
+        nextStation=end,
+        normalizedState=normalized,
+        rawState=candidate.trainState or '',
+        rawArrivalCode=candidate.arrivalCode or '',
+        positionTimestamp=observed_at.isoformat(),
+        serverTimestamp=now.isoformat(),
+        positionAgeSeconds=age,
+        segmentStartStation=start,
+        segmentEndStation=end,
+        segmentProgress=round(progress, 3),
+        estimatedSegmentTravelSeconds=duration,
+        elapsedSeconds=round(elapsed),
+        logicalPosition=round(logical, 3),
+        targetStation='월곶',
+        etaSeconds=candidate.etaSeconds,
+        etaLabel=candidate.displayTime,
+        confidence=candidate.confidence,
+        validationStatus=validation,
+        predictionSource=candidate.predictionSource,
+        mapState=candidate.mapState or 'REALTIME_TRACKED',
+        positionPrecision=candidate.positionPrecision or 'realtime',
+        lastRealtimeStation=candidate.lastRealtimeStation or '',
+        routeValidation=route_status,
+        routeReason=route_reason,
+    )
+    if debug is not None:
+        debug.update({
+            'normalizedState': normalized,
+            'segmentStart': start,
+            'segmentEnd': end,
+            'estimatedSegmentTravelSeconds': duration,
+            'elapsedSeconds': round(elapsed),
+            'calculatedProgress': round(progress, 3),
+            'logicalPosition': round(logical, 3),
+            'positionValidation': validation,
+        })
+    return position
 
 
 def realtime_position_direction(current_station, terminal_station, raw_direction=''):
     current_station = str(current_station or '').strip()
     terminal_station = terminal_name(terminal_station)
-    if current_station in WOLGOT_ROUTE and terminal_station in WOLGOT_ROUTE:
-        return '상행' if WOLGOT_ROUTE.index(terminal_station) < WOLGOT_ROUTE.index(current_station) else '하행'
+    if current_station in WOLGOT_POSITIONS and terminal_station in WOLGOT_POSITIONS:
+        return '상행' if WOLGOT_POSITIONS[terminal_station] < WOLGOT_POSITIONS[current_station] else '하행'
     return {'0': '상행', '1': '하행', '상행': '상행', '하행': '하행'}.get(str(raw_direction), '')
 
 
@@ -709,7 +1575,7 @@ def build_line_position_from_realtime(row, now):
     terminal_station = str(row.get('statnTnm') or '').strip()
     direction = realtime_position_direction(current_station, terminal_station, row.get('updnLine'))
     train_no = str(row.get('trainNo') or '').strip()
-    if not current_station or current_station not in WOLGOT_ROUTE or direction not in ('상행', '하행'):
+    if not current_station or current_station not in WOLGOT_POSITIONS or direction not in ('상행', '하행'):
         return None
     observed_at = parse_kst_timestamp(row.get('recptnDt'), now) or now
     age_sec = max(0, (now - observed_at).total_seconds())
@@ -721,9 +1587,9 @@ def build_line_position_from_realtime(row, now):
     if not segment:
         return None
     start, end, forced_progress, forced_logical = segment
-    start_idx = WOLGOT_ROUTE.index(start)
-    end_idx = WOLGOT_ROUTE.index(end)
-    duration = adjacent_segment_seconds(start, end, direction)
+    start_idx = WOLGOT_POSITIONS[start]
+    end_idx = WOLGOT_POSITIONS[end]
+    duration = WOLGOT_TOPOLOGY.pair_seconds(start_idx, end_idx, direction)
     elapsed = max(0, (now - observed_at).total_seconds())
     if forced_progress is not None:
         progress = forced_progress
@@ -739,68 +1605,69 @@ def build_line_position_from_realtime(row, now):
     destination = f'{terminal_station}행' if terminal_station else ''
     eta_seconds = None
     eta_label = train_no
-    if terminal_station in WOLGOT_ROUTE:
-        terminal_idx = WOLGOT_ROUTE.index(terminal_station)
-        current_idx = WOLGOT_ROUTE.index(current_station)
+    if terminal_station in WOLGOT_POSITIONS:
+        terminal_idx = WOLGOT_POSITIONS[terminal_station]
+        current_idx = WOLGOT_POSITIONS[current_station]
         reaches_wolgot = (direction == '하행' and current_idx <= WOLGOT_INDEX <= terminal_idx) or (direction == '상행' and current_idx >= WOLGOT_INDEX >= terminal_idx)
         if reaches_wolgot:
-            route_to_wolgot = WOLGOT_ROUTE[current_idx:WOLGOT_INDEX + 1] if direction == '하행' else WOLGOT_ROUTE[WOLGOT_INDEX:current_idx + 1][::-1]
-            remaining = 0
-            for a, b in zip(route_to_wolgot, route_to_wolgot[1:]):
-                remaining += adjacent_segment_seconds(a, b, direction)
+            remaining = WOLGOT_TOPOLOGY.travel_seconds(current_idx, WOLGOT_INDEX, direction)
             # If the train is already moving through the first segment, discount
             # roughly by its inferred segment progress.
-            if route_to_wolgot and len(route_to_wolgot) > 1:
-                first_duration = adjacent_segment_seconds(route_to_wolgot[0], route_to_wolgot[1], direction)
+            if current_idx != WOLGOT_INDEX:
+                first_duration = WOLGOT_TOPOLOGY.pair_seconds(current_idx, current_idx + (1 if direction == '하행' else -1), direction)
                 remaining = max(0, remaining - first_duration * progress)
             eta_seconds = round(remaining)
             eta_label = format_display_minutes(round(eta_seconds / 60))
-    return {
-        'trainId': train_no or f"{direction}-{current_station}-{terminal_station}",
-        'trainNo': train_no,
-        'direction': direction,
-        'destination': destination,
-        'currentStation': current_station,
-        'previousStation': start,
-        'nextStation': end,
-        'normalizedState': normalized,
-        'rawState': realtime_position_state_label(row.get('trainSttus')),
-        'rawArrivalCode': str(row.get('trainSttus') or ''),
-        'positionTimestamp': observed_at.isoformat(),
-        'serverTimestamp': now.isoformat(),
-        'positionAgeSeconds': round(age_sec),
-        'segmentStartStation': start,
-        'segmentEndStation': end,
-        'segmentProgress': round(progress, 3),
-        'estimatedSegmentTravelSeconds': duration,
-        'elapsedSeconds': round(elapsed),
-        'logicalPosition': round(logical, 3),
-        'targetStation': '월곶',
-        'etaSeconds': eta_seconds,
-        'etaLabel': eta_label,
-        'confidence': 'high' if fresh_status == 'FRESH_STRONG' else 'medium',
-        'validationStatus': 'accepted',
-        'predictionSource': 'LINE_REALTIME_POSITION',
-        'mapState': 'REALTIME_TRACKED',
-        'positionPrecision': 'realtime',
-        'lastRealtimeStation': current_station,
-        'routeValidation': 'ROUTE_OK',
-        'routeReason': '수인분당선 전체 실시간 위치 API',
-        'terminalStation': terminal_station,
-        'reachesWolgot': eta_seconds is not None,
-    }
+    return TrainPosition(
+        trainId=train_no or f"{direction}-{current_station}-{terminal_station}",
+        trainNo=train_no,
+        direction=direction,
+        destination=destination,
+        currentStation=current_station,
+        previousStation=start,
+        nextStation=end,
+        normalizedState=normalized,
+        rawState=realtime_position_state_label(row.get('trainSttus')),
+        rawArrivalCode=str(row.get('trainSttus') or ''),
+        positionTimestamp=observed_at.isoformat(),
+        serverTimestamp=now.isoformat(),
+        positionAgeSeconds=round(age_sec),
+        segmentStartStation=start,
+        segmentEndStation=end,
+        segmentProgress=round(progress, 3),
+        estimatedSegmentTravelSeconds=duration,
+        elapsedSeconds=round(elapsed),
+        logicalPosition=round(logical, 3),
+        targetStation='월곶',
+        etaSeconds=eta_seconds,
+        etaLabel=eta_label,
+        confidence='high' if fresh_status == 'FRESH_STRONG' else 'medium',
+        validationStatus='accepted',
+        predictionSource='LINE_REALTIME_POSITION',
+        mapState='REALTIME_TRACKED',
+        positionPrecision='realtime',
+        lastRealtimeStation=current_station,
+        routeValidation='ROUTE_OK',
+        routeReason='수인분당선 전체 실시간 위치 API',
+        terminalStation=terminal_station,
+        reachesWolgot=eta_seconds is not None,
+    )
 
 
-def fetch_line_realtime_positions(now=None):
-    now = now or datetime.now(KST)
+def subway_position_url():
     key = os.getenv('SEOUL_API_KEY') or 'sample'
     line = os.getenv('SUBWAY_POSITION_LINE_NAME', '수인분당선')
     encoded_line = urllib.parse.quote(line)
-    url = SEOUL_SUBWAY_POSITION.format(key=urllib.parse.quote(key, safe=''), line=encoded_line)
-    req = urllib.request.Request(url, headers={'User-Agent': 'update-tide-resident-portal/1.0'})
-    with urllib.request.urlopen(req, timeout=8) as resp:
-        data = json.loads(resp.read().decode('utf-8'))
-    rows = data.get('realtimePositionList') or []
+    return SEOUL_SUBWAY_POSITION.format(key=urllib.parse.quote(key, safe=''), line=encoded_line)
+
+
+def fetch_line_realtime_positions(now=None, deadline=None):
+    data = upstream_json(subway_position_url(), timeout=8, deadline=deadline)
+    return line_positions_from_rows(data.get('realtimePositionList') or [], now)
+
+
+def line_positions_from_rows(rows, now=None):
+    now = now or datetime.now(KST)
     positions = []
     for row in rows:
         position = build_line_position_from_realtime(row, now)
@@ -810,35 +1677,35 @@ def fetch_line_realtime_positions(now=None):
 
 
 def line_position_to_arrival(position):
-    return {
-        'direction': position.get('direction') or '',
-        'destination': position.get('destination') or '',
-        'trainLineNm': position.get('destination') or '',
-        'arrivalMessage': '전체 열차 위치 기반 월곶 도착 추정',
-        'currentStation': position.get('currentStation') or '',
-        'arrivalCode': position.get('rawArrivalCode') or '',
-        'trainState': position.get('rawState') or '실시간 위치',
-        'seconds': 0,
-        'minutes': round((position.get('etaSeconds') or 0) / 60) if position.get('etaSeconds') is not None else None,
-        'etaSeconds': position.get('etaSeconds'),
-        'displayTime': position.get('etaLabel') or '',
-        'hasExactEta': False,
-        'stationCount': None,
-        'scheduledTime': '',
-        'predictedArrivalTime': '',
-        'predictionSource': 'LINE_REALTIME_POSITION',
-        'confidence': position.get('confidence') or 'medium',
-        'sourceLabel': '전체 위치 기반',
-        'positionAgeSeconds': position.get('positionAgeSeconds'),
-        'positionEtaMinutes': round((position.get('etaSeconds') or 0) / 60) if position.get('etaSeconds') is not None else None,
-        'scheduleBasis': '수인분당선 전체 실시간 위치 기반 추정',
-        'trainNo': position.get('trainNo') or '',
-        'terminalStation': position.get('terminalStation') or '',
-        'updatedAt': (position.get('positionTimestamp') or '')[:19],
-        'mapState': position.get('mapState') or 'REALTIME_TRACKED',
-        'positionPrecision': position.get('positionPrecision') or 'realtime',
-        'lastRealtimeStation': position.get('lastRealtimeStation') or position.get('currentStation') or '',
-    }
+    return SubwayCandidate(
+        direction=position.direction or '',
+        destination=position.destination or '',
+        trainLineNm=position.destination or '',
+        arrivalMessage='전체 열차 위치 기반 월곶 도착 추정',
+        currentStation=position.currentStation or '',
+        arrivalCode=position.rawArrivalCode or '',
+        trainState=position.rawState or '실시간 위치',
+        seconds=0,
+        minutes=round((position.etaSeconds or 0) / 60) if position.etaSeconds is not None else None,
+        etaSeconds=position.etaSeconds,
+        displayTime=position.etaLabel or '',
+        hasExactEta=False,
+        stationCount=None,
+        scheduledTime='',
+        predictedArrivalTime='',
+        predictionSource='LINE_REALTIME_POSITION',
+        confidence=position.confidence or 'medium',
+        sourceLabel='전체 위치 기반',
+        positionAgeSeconds=position.positionAgeSeconds,
+        positionEtaMinutes=round((position.etaSeconds or 0) / 60) if position.etaSeconds is not None else None,
+        scheduleBasis='수인분당선 전체 실시간 위치 기반 추정',
+        trainNo=position.trainNo or '',
+        terminalStation=position.terminalStation or '',
+        updatedAt=(position.positionTimestamp or '')[:19],
+        mapState=position.mapState or 'REALTIME_TRACKED',
+        positionPrecision=position.positionPrecision or 'realtime',
+        lastRealtimeStation=position.lastRealtimeStation or position.currentStation or '',
+    )
 
 def subway_state_label(code, message):
     code = str(code or '')
@@ -877,9 +1744,9 @@ def post_wolgot_track_key(train_no, direction, destination):
 
 def post_wolgot_route(direction, destination):
     dest = terminal_name(destination)
-    if not dest or dest not in WOLGOT_ROUTE or direction not in ('상행', '하행'):
+    if not dest or dest not in WOLGOT_POSITIONS or direction not in ('상행', '하행'):
         return None
-    terminal_idx = WOLGOT_ROUTE.index(dest)
+    terminal_idx = WOLGOT_POSITIONS[dest]
     step = post_wolgot_step(direction)
     if (terminal_idx - WOLGOT_INDEX) * step < 0:
         return None
@@ -900,13 +1767,13 @@ def post_wolgot_segment_plan(direction, destination):
 
 
 def update_post_wolgot_track(candidate, observed_at):
-    train_no = candidate.get('trainNo') or ''
-    direction = candidate.get('direction') or ''
-    destination = candidate.get('destination') or ''
-    if not train_no or candidate.get('currentStation') != '월곶':
+    train_no = candidate.trainNo or ''
+    direction = candidate.direction or ''
+    destination = candidate.destination or ''
+    if not train_no or candidate.currentStation != '월곶':
         return None
     key = post_wolgot_track_key(train_no, direction, destination)
-    POST_WOLGOT_TRACKS[key] = {
+    track = {
         'key': key,
         'trainNo': train_no,
         'direction': direction,
@@ -916,7 +1783,9 @@ def update_post_wolgot_track(candidate, observed_at):
         'lastSignalAt': observed_at,
         'hasKnownTerminal': bool(post_wolgot_segment_plan(direction, destination)),
     }
-    save_post_wolgot_tracks()
+    if POST_WOLGOT_TRACKS.get(key) != track:
+        POST_WOLGOT_TRACKS[key] = track
+        mark_post_wolgot_tracks_dirty()
     return key
 
 
@@ -946,7 +1815,7 @@ def build_estimated_after_wolgot_candidate(track, now):
         route_validation_status = 'ROUTE_OK'
         route_reason = '월곶 이후 종착역까지 추정 이동'
         if not plan['segments'] or elapsed >= total:
-            logical = WOLGOT_ROUTE.index(terminal)
+            logical = WOLGOT_POSITIONS[terminal]
             segment_start = segment_end = terminal
             map_state = 'ARRIVED_AT_TERMINAL'
         else:
@@ -957,72 +1826,72 @@ def build_estimated_after_wolgot_candidate(track, now):
                     segment_start, segment_end, duration, offset = start, end, seg_duration, seg_offset
                     break
             progress = min(1, max(0, (elapsed - offset) / max(1, duration)))
-            start_idx = WOLGOT_ROUTE.index(segment_start)
-            end_idx = WOLGOT_ROUTE.index(segment_end)
+            start_idx = WOLGOT_POSITIONS[segment_start]
+            end_idx = WOLGOT_POSITIONS[segment_end]
             logical = start_idx + (end_idx - start_idx) * progress
-    position = {
-        'trainId': train_no or f"{direction}-after-wolgot-{destination}",
-        'trainNo': train_no,
-        'direction': direction,
-        'destination': destination,
-        'currentStation': segment_start,
-        'previousStation': segment_start,
-        'nextStation': segment_end,
-        'normalizedState': map_state,
-        'rawState': '월곶 이후 추정 위치',
-        'rawArrivalCode': '',
-        'positionTimestamp': last_signal.isoformat(),
-        'serverTimestamp': now.isoformat(),
-        'positionAgeSeconds': round(elapsed),
-        'segmentStartStation': segment_start,
-        'segmentEndStation': segment_end,
-        'segmentProgress': round(progress, 3),
-        'estimatedSegmentTravelSeconds': adjacent_segment_seconds(segment_start, segment_end, direction),
-        'elapsedSeconds': round(elapsed),
-        'logicalPosition': round(logical, 3),
-        'targetStation': '월곶',
-        'etaSeconds': None,
-        'etaLabel': '',
-        'confidence': 'estimated',
-        'validationStatus': 'accepted',
-        'predictionSource': 'POST_WOLGOT_ESTIMATED',
-        'mapState': map_state,
-        'positionPrecision': 'estimated',
-        'lastRealtimeStation': '월곶',
-        'routeValidation': route_validation_status,
-        'routeReason': route_reason,
-    }
-    return {
-        'direction': direction,
-        'destination': destination,
-        'trainLineNm': destination,
-        'arrivalMessage': '월곶 이후 추정 위치',
-        'currentStation': segment_start,
-        'arrivalCode': '',
-        'trainState': '월곶 이후 추정 위치',
-        'seconds': 0,
-        'minutes': None,
-        'etaSeconds': None,
-        'displayTime': '',
-        'hasExactEta': False,
-        'stationCount': None,
-        'scheduledTime': '',
-        'predictedArrivalTime': '',
-        'predictionSource': 'POST_WOLGOT_ESTIMATED',
-        'confidence': 'estimated',
-        'sourceLabel': '추정 위치',
-        'positionAgeSeconds': round(elapsed),
-        'positionEtaMinutes': None,
-        'scheduleBasis': '월곶 마지막 실시간 신호 기반 추정',
-        'trainNo': train_no,
-        'terminalStation': track.get('terminalStation') or '',
-        'updatedAt': last_signal.strftime('%Y-%m-%d %H:%M:%S'),
-        'positionOnly': True,
-        'mapState': map_state,
-        'positionPrecision': 'estimated',
-        'lastRealtimeStation': '월곶',
-        'trainPosition': position,
-    }
+    position = TrainPosition(
+        trainId=train_no or f"{direction}-after-wolgot-{destination}",
+        trainNo=train_no,
+        direction=direction,
+        destination=destination,
+        currentStation=segment_start,
+        previousStation=segment_start,
+        nextStation=segment_end,
+        normalizedState=map_state,
+        rawState='월곶 이후 추정 위치',
+        rawArrivalCode='',
+        positionTimestamp=last_signal.isoformat(),
+        serverTimestamp=now.isoformat(),
+        positionAgeSeconds=round(elapsed),
+        segmentStartStation=segment_start,
+        segmentEndStation=segment_end,
+        segmentProgress=round(progress, 3),
+        estimatedSegmentTravelSeconds=adjacent_segment_seconds(segment_start, segment_end, direction),
+        elapsedSeconds=round(elapsed),
+        logicalPosition=round(logical, 3),
+        targetStation='월곶',
+        etaSeconds=None,
+        etaLabel='',
+        confidence='estimated',
+        validationStatus='accepted',
+        predictionSource='POST_WOLGOT_ESTIMATED',
+        mapState=map_state,
+        positionPrecision='estimated',
+        lastRealtimeStation='월곶',
+        routeValidation=route_validation_status,
+        routeReason=route_reason,
+    )
+    return SubwayCandidate(
+        direction=direction,
+        destination=destination,
+        trainLineNm=destination,
+        arrivalMessage='월곶 이후 추정 위치',
+        currentStation=segment_start,
+        arrivalCode='',
+        trainState='월곶 이후 추정 위치',
+        seconds=0,
+        minutes=None,
+        etaSeconds=None,
+        displayTime='',
+        hasExactEta=False,
+        stationCount=None,
+        scheduledTime='',
+        predictedArrivalTime='',
+        predictionSource='POST_WOLGOT_ESTIMATED',
+        confidence='estimated',
+        sourceLabel='추정 위치',
+        positionAgeSeconds=round(elapsed),
+        positionEtaMinutes=None,
+        scheduleBasis='월곶 마지막 실시간 신호 기반 추정',
+        trainNo=train_no,
+        terminalStation=track.get('terminalStation') or '',
+        updatedAt=last_signal.strftime('%Y-%m-%d %H:%M:%S'),
+        positionOnly=True,
+        mapState=map_state,
+        positionPrecision='estimated',
+        lastRealtimeStation='월곶',
+        trainPosition=position,
+    )
 
 
 def prune_and_build_post_wolgot_positions(now, active_keys=None):
@@ -1034,9 +1903,8 @@ def prune_and_build_post_wolgot_positions(now, active_keys=None):
         candidate = build_estimated_after_wolgot_candidate(POST_WOLGOT_TRACKS[key], now)
         if candidate:
             candidates.append(candidate)
-        else:
-            POST_WOLGOT_TRACKS.pop(key, None)
-    save_post_wolgot_tracks()
+        elif POST_WOLGOT_TRACKS.pop(key, None) is not None:
+            mark_post_wolgot_tracks_dirty()
     return candidates
 
 
@@ -1045,8 +1913,8 @@ def estimate_remaining_seconds(direction, station_count, current_station=''):
         seconds_per_station = 120 if direction == '상행' else 150
         return max(60, int(station_count) * seconds_per_station)
     current_station = str(current_station or '').strip()
-    if current_station in WOLGOT_ROUTE:
-        diff = abs(WOLGOT_ROUTE.index(current_station) - WOLGOT_INDEX)
+    if current_station in WOLGOT_POSITIONS:
+        diff = abs(WOLGOT_POSITIONS[current_station] - WOLGOT_INDEX)
         if diff:
             seconds_per_station = 120 if direction == '상행' else 150
             return diff * seconds_per_station
@@ -1056,9 +1924,9 @@ def estimate_remaining_seconds(direction, station_count, current_station=''):
 def route_validation(direction, current_station, destination):
     current_station = str(current_station or '').strip()
     dest = terminal_name(destination)
-    if current_station and current_station in WOLGOT_ROUTE:
-        cur_idx = WOLGOT_ROUTE.index(current_station)
-        dest_idx = WOLGOT_ROUTE.index(dest) if dest in WOLGOT_ROUTE else None
+    if current_station and current_station in WOLGOT_POSITIONS:
+        cur_idx = WOLGOT_POSITIONS[current_station]
+        dest_idx = WOLGOT_POSITIONS.get(dest)
         if direction == '상행' and cur_idx > WOLGOT_INDEX:
             if dest_idx is not None and dest_idx > WOLGOT_INDEX:
                 return False, 'INVALID_ROUTE_REJECTED', '상행 종착역이 월곶 이전에 끝나지 않음'
@@ -1084,30 +1952,132 @@ def freshness_status(position_age_sec):
     return False, 'STALE_POSITION_REJECTED', f'stale {round(position_age_sec)}s >180s'
 
 
+def subway_event_segment_date():
+    if SUBWAY_EVENT_LOG_STATE['segmentDate'] is None and SUBWAY_EVENT_LOG.exists():
+        modified = datetime.fromtimestamp(SUBWAY_EVENT_LOG.stat().st_mtime, tz=KST)
+        SUBWAY_EVENT_LOG_STATE['segmentDate'] = modified.strftime('%Y-%m-%d')
+    return SUBWAY_EVENT_LOG_STATE['segmentDate']
+
+
+def compress_subway_event_segment(path):
+    gz_path = path.with_name(path.name + '.gz')
+    with path.open('rb') as src, gzip.open(gz_path, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    path.unlink()
+
+
+def closed_subway_event_segment(day):
+    # A size and a day rotation can land in the same second; never reuse a
+    # name that is already taken by a segment or its .gz.
+    base = f'{SUBWAY_EVENT_LOG.stem}-{day}-{datetime.now(KST).strftime("%H%M%S")}'
+    n = 0
+    while True:
+        closed = SUBWAY_EVENT_LOG.with_name(f'{base}-{n}{SUBWAY_EVENT_LOG.suffix}' if n else f'{base}{SUBWAY_EVENT_LOG.suffix}')
+        if not closed.exists() and not closed.with_name(closed.name + '.gz').exists():
+            return closed
+        n += 1
+
+
+def rotate_subway_event_log(today):
+    segment_date = subway_event_segment_date()
+    if not SUBWAY_EVENT_LOG.exists():
+        SUBWAY_EVENT_LOG_STATE['segmentDate'] = today
+        return
+    if segment_date == today and SUBWAY_EVENT_LOG.stat().st_size < SUBWAY_EVENT_LOG_MAX_BYTES:
+        return
+    closed = closed_subway_event_segment((segment_date or today).replace('-', ''))
+    SUBWAY_EVENT_LOG.replace(closed)
+    SUBWAY_EVENT_LOG_STATE['segmentDate'] = today
+    if SUBWAY_EVENT_LOG_COMPRESS:
+        compress_subway_event_segment(closed)
+
+
+def write_subway_event_batch(lines):
+    if not lines:
+        return
+    with SUBWAY_EVENT_LOG_LOCK:
+        try:
+            DATA_DIR.mkdir(exist_ok=True)
+            rotate_subway_event_log(datetime.now(KST).strftime('%Y-%m-%d'))
+            with SUBWAY_EVENT_LOG.open('a', encoding='utf-8') as f:
+                f.write(''.join(lines))
+        except Exception:
+            pass
+
+
+def drain_subway_event_queue(lines, limit):
+    while len(lines) < limit:
+        try:
+            lines.append(SUBWAY_EVENT_QUEUE.get_nowait())
+        except queue.Empty:
+            break
+    return lines
+
+
+def subway_event_writer_loop():
+    while not SUBWAY_EVENT_STOP.is_set():
+        try:
+            lines = [SUBWAY_EVENT_QUEUE.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        # Give a refresh burst a moment to land so it goes out as one write;
+        # a stop request cuts the wait short and the batch is still written.
+        SUBWAY_EVENT_STOP.wait(0.5)
+        write_subway_event_batch(drain_subway_event_queue(lines, 1000))
+
+
+def ensure_subway_event_writer():
+    if SUBWAY_EVENT_LOG_STATE['writer'] is not None:
+        return
+    with SUBWAY_EVENT_LOG_LOCK:
+        if SUBWAY_EVENT_LOG_STATE['writer'] is not None:
+            return
+        thread = threading.Thread(target=subway_event_writer_loop, name='subway-event-log', daemon=True)
+        SUBWAY_EVENT_LOG_STATE['writer'] = thread
+    thread.start()
+
+
+def flush_subway_event_log():
+    # Let the writer finish the batch it is holding before draining the rest.
+    SUBWAY_EVENT_STOP.set()
+    writer = SUBWAY_EVENT_LOG_STATE['writer']
+    if writer is not None:
+        writer.join(timeout=5)
+    while not SUBWAY_EVENT_QUEUE.empty():
+        write_subway_event_batch(drain_subway_event_queue([], 1000))
+
+
+atexit.register(flush_subway_event_log)
+
+
 def log_subway_events(rows):
+    # Request threads only enqueue; the writer thread owns the file.
     try:
-        DATA_DIR.mkdir(exist_ok=True)
         now = datetime.now(KST).isoformat()
-        with SUBWAY_EVENT_LOG.open('a', encoding='utf-8') as f:
-            for row in rows:
-                event = {
-                    'loggedAt': now,
-                    'trainNo': row.get('btrainNo') or '',
-                    'station': row.get('statnNm') or '월곶',
-                    'direction': row.get('updnLine') or '',
-                    'line': row.get('trainLineNm') or '',
-                    'message': row.get('arvlMsg2') or '',
-                    'currentStation': row.get('arvlMsg3') or '',
-                    'arrivalCode': row.get('arvlCd') or '',
-                    'seconds': row.get('barvlDt') or '',
-                    'receivedAt': row.get('recptnDt') or '',
-                }
-                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+        for row in rows:
+            event = {
+                'loggedAt': now,
+                'trainNo': row.get('btrainNo') or '',
+                'station': row.get('statnNm') or '월곶',
+                'direction': row.get('updnLine') or '',
+                'line': row.get('trainLineNm') or '',
+                'message': row.get('arvlMsg2') or '',
+                'currentStation': row.get('arvlMsg3') or '',
+                'arrivalCode': row.get('arvlCd') or '',
+                'seconds': row.get('barvlDt') or '',
+                'receivedAt': row.get('recptnDt') or '',
+            }
+            try:
+                SUBWAY_EVENT_QUEUE.put_nowait(json.dumps(event, ensure_ascii=False) + '\n')
+            except queue.Full:
+                with SUBWAY_EVENT_DROP_LOCK:
+                    SUBWAY_EVENT_LOG_STATE['dropped'] += 1
+        ensure_subway_event_writer()
     except Exception:
         pass
 
 
-def build_subway_candidate(row, now, sequence=0):
+def build_subway_candidate(row, now, sequence=0, collect_debug=False):
     direction = str(row.get('updnLine') or '')
     line = str(row.get('trainLineNm') or '')
     destination = extract_destination(line)
@@ -1122,26 +2092,31 @@ def build_subway_candidate(row, now, sequence=0):
     station_match = re.search(r'\[(\d+)\]\s*번째 전역', message)
     station_count = int(station_match.group(1)) if station_match else None
     schedule = next_wolgot_schedule(direction, now=now, sequence=sequence)
-    debug = {
-        'trainNo': train_no,
-        'currentStation': current_station,
-        'direction': direction,
-        'destination': destination,
-        'terminalStation': row.get('bstatnNm') or '',
-        'positionTimestamp': observed_at.isoformat(),
-        'serverTimestamp': now.isoformat(),
-        'positionAgeSeconds': round(age_sec),
-        'targetStation': '월곶',
-        'targetStationTimetableArrival': schedule['time'],
-        'remainingStationCount': station_count,
-        'arrivalCode': arrival_code,
-        'message': message,
-    }
+    # The per-row debug dict is only built when the caller asked for it.
+    debug = None
+    if collect_debug:
+        debug = {
+            'trainNo': train_no,
+            'currentStation': current_station,
+            'direction': direction,
+            'destination': destination,
+            'terminalStation': row.get('bstatnNm') or '',
+            'positionTimestamp': observed_at.isoformat(),
+            'serverTimestamp': now.isoformat(),
+            'positionAgeSeconds': round(age_sec),
+            'targetStation': '월곶',
+            'targetStationTimetableArrival': schedule['time'],
+            'remainingStationCount': station_count,
+            'arrivalCode': arrival_code,
+            'message': message,
+        }
 
     route_ok, route_status, route_reason = route_validation(direction, current_station, destination)
-    debug.update({'routeValidation': route_status, 'routeReason': route_reason})
+    if debug is not None:
+        debug.update({'routeValidation': route_status, 'routeReason': route_reason})
     if not route_ok:
-        debug.update({'candidateStatus': 'rejected', 'rejectionReason': route_reason})
+        if debug is not None:
+            debug.update({'candidateStatus': 'rejected', 'rejectionReason': route_reason})
         return None, debug
 
     is_target_station_event = current_station == '월곶' or message.startswith('월곶')
@@ -1151,6 +2126,7 @@ def build_subway_candidate(row, now, sequence=0):
     exact_eta_sec = seconds if seconds > 0 else (0 if is_immediate else None)
 
     position_only = False
+    remaining_travel_sec = exact_eta_sec
     if exact_eta_sec is not None:
         # Split station-board wording freshness from realtime position freshness.
         # After the short label window, do not keep saying "곧 도착/도착", but
@@ -1158,56 +2134,65 @@ def build_subway_candidate(row, now, sequence=0):
         station_label_fresh_limit = 60 if is_immediate else SUBWAY_FRESH_MAX_SECONDS
         station_fresh_limit = SUBWAY_FRESH_MAX_SECONDS
         if age_sec > station_fresh_limit:
-            debug.update({
-                'estimatedRemainingTravelSeconds': exact_eta_sec,
-                'predictedAbsoluteArrivalTime': observed_at.isoformat(),
-                'currentEtaSeconds': round(-age_sec if is_immediate else exact_eta_sec - age_sec),
-                'freshnessValidation': 'STALE_STATION_EVENT_REJECTED',
-                'freshnessReason': f'station event stale {round(age_sec)}s >{station_fresh_limit}s',
-                'timetableMatch': 'not_required_for_station_realtime',
-                'candidateStatus': 'rejected',
-                'rejectionReason': '오래된 도착/진입 이벤트',
-            })
+            if debug is not None:
+                debug.update({
+                    'estimatedRemainingTravelSeconds': exact_eta_sec,
+                    'predictedAbsoluteArrivalTime': observed_at.isoformat(),
+                    'currentEtaSeconds': round(-age_sec if is_immediate else exact_eta_sec - age_sec),
+                    'freshnessValidation': 'STALE_STATION_EVENT_REJECTED',
+                    'freshnessReason': f'station event stale {round(age_sec)}s >{station_fresh_limit}s',
+                    'timetableMatch': 'not_required_for_station_realtime',
+                    'candidateStatus': 'rejected',
+                    'rejectionReason': '오래된 도착/진입 이벤트',
+                })
             return None, debug
         position_only = is_immediate and age_sec > station_label_fresh_limit
         predicted_arrival = now + timedelta(seconds=max(0, exact_eta_sec - age_sec if seconds > 0 else 0))
         source = 'STATION_REALTIME_POSITION_ONLY' if position_only else 'STATION_REALTIME'
         has_exact_eta = not position_only
         confidence = 'high'
-        debug.update({
-            'estimatedRemainingTravelSeconds': exact_eta_sec,
-            'predictedAbsoluteArrivalTime': predicted_arrival.isoformat(),
-            'currentEtaSeconds': round(max(0, exact_eta_sec - age_sec if seconds > 0 else 0)),
-            'freshnessValidation': 'STATION_REALTIME_EVENT',
-            'timetableMatch': 'not_required_for_station_realtime',
-            'candidateStatus': 'accepted_position_only' if position_only else 'accepted',
-            'rejectionReason': '',
-        })
+        if debug is not None:
+            debug.update({
+                'estimatedRemainingTravelSeconds': exact_eta_sec,
+                'predictedAbsoluteArrivalTime': predicted_arrival.isoformat(),
+                'currentEtaSeconds': round(max(0, exact_eta_sec - age_sec if seconds > 0 else 0)),
+                'freshnessValidation': 'STATION_REALTIME_EVENT',
+                'timetableMatch': 'not_required_for_station_realtime',
+                'candidateStatus': 'accepted_position_only' if position_only else 'accepted',
+                'rejectionReason': '',
+            })
     else:
         fresh_ok, fresh_status, fresh_reason = freshness_status(age_sec)
-        debug.update({'freshnessValidation': fresh_status, 'freshnessReason': fresh_reason})
+        if debug is not None:
+            debug.update({'freshnessValidation': fresh_status, 'freshnessReason': fresh_reason})
         if not fresh_ok:
-            debug.update({'candidateStatus': 'rejected', 'rejectionReason': fresh_reason})
+            if debug is not None:
+                debug.update({'candidateStatus': 'rejected', 'rejectionReason': fresh_reason})
             return None, debug
-        remaining_sec = estimate_remaining_seconds(direction, station_count, current_station)
-        debug['estimatedRemainingTravelSeconds'] = remaining_sec
+        remaining_sec = remaining_travel_sec = estimate_remaining_seconds(direction, station_count, current_station)
+        if debug is not None:
+            debug['estimatedRemainingTravelSeconds'] = remaining_sec
         if remaining_sec is None:
-            debug.update({'candidateStatus': 'rejected', 'rejectionReason': '남은 이동시간 계산 불가'})
+            if debug is not None:
+                debug.update({'candidateStatus': 'rejected', 'rejectionReason': '남은 이동시간 계산 불가'})
             return None, debug
         predicted_arrival = observed_at + timedelta(seconds=remaining_sec)
         eta_sec = (predicted_arrival - now).total_seconds()
-        debug.update({
-            'predictedAbsoluteArrivalTime': predicted_arrival.isoformat(),
-            'currentEtaSeconds': round(eta_sec),
-            'timetableMatch': 'heuristic_headway',
-        })
+        if debug is not None:
+            debug.update({
+                'predictedAbsoluteArrivalTime': predicted_arrival.isoformat(),
+                'currentEtaSeconds': round(eta_sec),
+                'timetableMatch': 'heuristic_headway',
+            })
         if eta_sec < -SUBWAY_PASSED_GRACE_SECONDS:
-            debug.update({'candidateStatus': 'rejected', 'rejectionReason': f'예상 도착시각 경과 {round(eta_sec)}s'})
+            if debug is not None:
+                debug.update({'candidateStatus': 'rejected', 'rejectionReason': f'예상 도착시각 경과 {round(eta_sec)}s'})
             return None, debug
         source = 'POSITION_REALTIME' if fresh_status == 'FRESH_STRONG' else 'HYBRID_REALTIME_TIMETABLE'
         has_exact_eta = False
         confidence = 'high' if fresh_status == 'FRESH_STRONG' else 'medium'
-        debug.update({'candidateStatus': 'accepted', 'rejectionReason': ''})
+        if debug is not None:
+            debug.update({'candidateStatus': 'accepted', 'rejectionReason': ''})
 
     eta_sec = max(0, (predicted_arrival - now).total_seconds())
     minutes = max(0, round(eta_sec / 60))
@@ -1218,36 +2203,36 @@ def build_subway_candidate(row, now, sequence=0):
     else:
         # Keep source details in predictionSource/debug; user-facing ETA should stay simple.
         display_time = format_display_minutes(minutes)
-    candidate = {
-        'direction': direction,
-        'destination': destination,
-        'trainLineNm': line,
-        'arrivalMessage': message,
-        'currentStation': current_station,
-        'arrivalCode': arrival_code,
-        'trainState': state,
-        'seconds': seconds,
-        'minutes': minutes,
-        'etaSeconds': round(eta_sec),
-        'displayTime': display_time,
-        'hasExactEta': has_exact_eta,
-        'stationCount': station_count,
-        'scheduledTime': schedule['time'],
-        'predictedArrivalTime': predicted_arrival.strftime('%H:%M:%S'),
-        'predictionSource': source,
-        'confidence': confidence,
-        'sourceLabel': '실시간' if source in ('STATION_REALTIME', 'POSITION_REALTIME') else ('위치만 표시' if source == 'STATION_REALTIME_POSITION_ONLY' else '실시간 보정'),
-        'positionAgeSeconds': round(age_sec),
-        'positionEtaMinutes': round((debug.get('estimatedRemainingTravelSeconds') or 0) / 60) if debug.get('estimatedRemainingTravelSeconds') else None,
-        'scheduleBasis': schedule['basis'],
-        'trainNo': train_no,
-        'terminalStation': row.get('bstatnNm') or '',
-        'updatedAt': row.get('recptnDt') or '',
-        'positionOnly': position_only,
-        'mapState': 'ARRIVED_AT_WOLGOT' if is_immediate and not position_only else ('ESTIMATED_AFTER_WOLGOT' if position_only else 'REALTIME_TRACKED'),
-        'positionPrecision': 'realtime' if not position_only else 'estimated',
-        'lastRealtimeStation': current_station if current_station == '월곶' else '',
-    }
+    candidate = SubwayCandidate(
+        direction=direction,
+        destination=destination,
+        trainLineNm=line,
+        arrivalMessage=message,
+        currentStation=current_station,
+        arrivalCode=arrival_code,
+        trainState=state,
+        seconds=seconds,
+        minutes=minutes,
+        etaSeconds=round(eta_sec),
+        displayTime=display_time,
+        hasExactEta=has_exact_eta,
+        stationCount=station_count,
+        scheduledTime=schedule['time'],
+        predictedArrivalTime=predicted_arrival.strftime('%H:%M:%S'),
+        predictionSource=source,
+        confidence=confidence,
+        sourceLabel='실시간' if source in ('STATION_REALTIME', 'POSITION_REALTIME') else ('위치만 표시' if source == 'STATION_REALTIME_POSITION_ONLY' else '실시간 보정'),
+        positionAgeSeconds=round(age_sec),
+        positionEtaMinutes=round(remaining_travel_sec / 60) if remaining_travel_sec else None,
+        scheduleBasis=schedule['basis'],
+        trainNo=train_no,
+        terminalStation=row.get('bstatnNm') or '',
+        updatedAt=row.get('recptnDt') or '',
+        positionOnly=position_only,
+        mapState='ARRIVED_AT_WOLGOT' if is_immediate and not position_only else ('ESTIMATED_AFTER_WOLGOT' if position_only else 'REALTIME_TRACKED'),
+        positionPrecision='realtime' if not position_only else 'estimated',
+        lastRealtimeStation=current_station if current_station == '월곶' else '',
+    )
     if is_target_station_event and current_station == '월곶':
         track_key = update_post_wolgot_track(candidate, observed_at)
         if position_only and track_key and track_key in POST_WOLGOT_TRACKS:
@@ -1256,51 +2241,52 @@ def build_subway_candidate(row, now, sequence=0):
                 return estimated_candidate, debug
     position = build_train_position(candidate, debug, now, observed_at, station_count)
     if position:
-        candidate['trainPosition'] = position
+        candidate.trainPosition = position
     return candidate, debug
 
 
 def timetable_fallback(direction, now, sequence=0):
     schedule = next_wolgot_schedule(direction, now=now, sequence=sequence)
-    return {
-        'direction': direction,
-        'destination': schedule['destination'],
-        'trainLineNm': schedule['destination'],
-        'arrivalMessage': '실시간 후보 없음',
-        'currentStation': '',
-        'arrivalCode': '',
-        'trainState': '시간표 기준',
-        'seconds': 0,
-        'minutes': schedule['minutes'],
-        'etaSeconds': schedule['minutes'] * 60,
-        'displayTime': format_display_minutes(schedule['minutes'], '시간표 기준 '),
-        'hasExactEta': False,
-        'stationCount': None,
-        'scheduledTime': schedule['time'],
-        'predictedArrivalTime': schedule['arrivalAt'].strftime('%H:%M:%S'),
-        'predictionSource': 'TIMETABLE_ONLY',
-        'confidence': 'fallback',
-        'sourceLabel': '시간표 기준',
-        'positionAgeSeconds': None,
-        'positionEtaMinutes': None,
-        'scheduleBasis': schedule['basis'],
-        'trainNo': '',
-        'terminalStation': '',
-        'updatedAt': now.strftime('%Y-%m-%d %H:%M:%S'),
-    }
+    return SubwayCandidate(
+        direction=direction,
+        destination=schedule['destination'],
+        trainLineNm=schedule['destination'],
+        arrivalMessage='실시간 후보 없음',
+        currentStation='',
+        arrivalCode='',
+        trainState='시간표 기준',
+        seconds=0,
+        minutes=schedule['minutes'],
+        etaSeconds=schedule['minutes'] * 60,
+        displayTime=format_display_minutes(schedule['minutes'], '시간표 기준 '),
+        hasExactEta=False,
+        stationCount=None,
+        scheduledTime=schedule['time'],
+        predictedArrivalTime=schedule['arrivalAt'].strftime('%H:%M:%S'),
+        predictionSource='TIMETABLE_ONLY',
+        confidence='fallback',
+        sourceLabel='시간표 기준',
+        positionAgeSeconds=None,
+        positionEtaMinutes=None,
+        scheduleBasis=schedule['basis'],
+        trainNo='',
+        terminalStation='',
+        updatedAt=now.strftime('%Y-%m-%d %H:%M:%S'),
+    )
+
+
+def subway_arrival_url():
+    key = os.getenv('SEOUL_API_KEY') or 'sample'
+    station = os.getenv('SUBWAY_STATION_NAME', '월곶')
+    encoded_station = urllib.parse.quote(station)
+    return SEOUL_SUBWAY_ARRIVAL.format(key=urllib.parse.quote(key, safe=''), station=encoded_station)
 
 
-def parse_subway_arrivals(debug=False, now=None, rows_override=None):
+def parse_subway_arrivals(debug=False, now=None, rows_override=None, deadline=None):
     now = now or datetime.now(KST)
     load_post_wolgot_tracks()
     if rows_override is None:
-        key = os.getenv('SEOUL_API_KEY') or 'sample'
-        station = os.getenv('SUBWAY_STATION_NAME', '월곶')
-        encoded_station = urllib.parse.quote(station)
-        url = SEOUL_SUBWAY_ARRIVAL.format(key=urllib.parse.quote(key, safe=''), station=encoded_station)
-        req = urllib.request.Request(url, headers={'User-Agent': 'update-tide-resident-portal/1.0'})
-        with urllib.request.urlopen(req, timeout=8) as resp:
-            data = json.loads(resp.read().decode('utf-8'))
+        data = upstream_json(subway_arrival_url(), timeout=8, deadline=deadline)
         rows = data.get('realtimeArrivalList') or []
         log_subway_events(rows)
     else:
@@ -1314,21 +2300,22 @@ def parse_subway_arrivals(debug=False, now=None, rows_override=None):
         direction = str(row.get('updnLine') or '')
         sequence = direction_seen.get(direction, 0)
         direction_seen[direction] = sequence + 1
-        candidate, info = build_subway_candidate(row, now, sequence=sequence)
-        debug_rows.append(info)
+        candidate, info = build_subway_candidate(row, now, sequence=sequence, collect_debug=debug)
+        if debug:
+            debug_rows.append(info)
         if candidate:
-            if candidate.get('trainNo'):
-                active_post_wolgot_keys.add(post_wolgot_track_key(candidate.get('trainNo'), candidate.get('direction'), candidate.get('destination')))
-            if candidate.get('positionOnly'):
+            if candidate.trainNo:
+                active_post_wolgot_keys.add(post_wolgot_track_key(candidate.trainNo, candidate.direction, candidate.destination))
+            if candidate.positionOnly:
                 position_only_candidates.append(candidate)
             else:
                 arrivals.append(candidate)
-    arrivals.sort(key=lambda x: (x['direction'], x.get('etaSeconds', 999999)))
+    arrivals.sort(key=lambda x: (x.direction, x.etaSeconds))
     # If no reliable realtime candidate exists for a direction, show explicit timetable fallback.
     for direction in ('상행', '하행'):
-        if not any(a['direction'] == direction for a in arrivals):
+        if not any(a.direction == direction for a in arrivals):
             arrivals.append(timetable_fallback(direction, now, 0))
-    arrivals.sort(key=lambda x: (x['direction'], x.get('etaSeconds', 999999)))
+    arrivals.sort(key=lambda x: (x.direction, x.etaSeconds))
     position_only_candidates.extend(prune_and_build_post_wolgot_positions(now, active_post_wolgot_keys))
     if position_only_candidates:
         setattr(parse_subway_arrivals, 'last_position_only_candidates', position_only_candidates)
@@ -1336,75 +2323,223 @@ def parse_subway_arrivals(debug=False, now=None, rows_override=None):
         setattr(parse_subway_arrivals, 'last_position_only_candidates', [])
     return (arrivals, debug_rows) if debug else arrivals
 
-def handle_subway_arrivals(handler, query=None):
-    record_metric(handler, 'subway')
-    query = query or {}
-    debug_enabled = query.get('debug', ['0'])[0] in ('1', 'true', 'yes') or os.getenv('SUBWAY_DEBUG') == '1'
+def subway_debug_enabled(query):
+    return query.get('debug', ['0'])[0] in ('1', 'true', 'yes') or os.getenv('SUBWAY_DEBUG') == '1'
+
+def build_subway_payload(parsed, debug_enabled, line_positions=None, position_error=None):
+    arrivals, debug_rows = parsed if debug_enabled else (parsed, None)
+    position_only_candidates = getattr(parse_subway_arrivals, 'last_position_only_candidates', [])
+    train_positions = [a.trainPosition for a in [*arrivals, *position_only_candidates] if a.trainPosition]
+    position_note = None
+    try:
+        if position_error is not None:
+            # Surface the fetch failure through the same note as a merge failure.
+            raise position_error
+        wolgot_line_positions = [p for p in line_positions if p.reachesWolgot and p.etaSeconds is not None]
+        for direction in ('상행', '하행'):
+            direction_line_positions = sorted(
+                [p for p in wolgot_line_positions if p.direction == direction],
+                key=lambda p: p.etaSeconds or 999999,
+            )
+            if direction_line_positions:
+                arrivals = [a for a in arrivals if not (a.direction == direction and a.predictionSource == 'TIMETABLE_ONLY')]
+                direction_arrivals = [a for a in arrivals if a.direction == direction]
+                seen_arrival_trains = {a.trainNo for a in direction_arrivals if a.trainNo}
+                for position in direction_line_positions:
+                    if len(direction_arrivals) >= 2:
+                        break
+                    train_no = position.trainNo
+                    if train_no and train_no in seen_arrival_trains:
+                        continue
+                    arrival = line_position_to_arrival(position)
+                    arrivals.append(arrival)
+                    direction_arrivals.append(arrival)
+                    if train_no:
+                        seen_arrival_trains.add(train_no)
+        arrivals.sort(key=lambda x: (x.direction or '', x.etaSeconds if x.etaSeconds is not None else 999999))
+        seen_train_numbers = {p.trainNo for p in train_positions if p.trainNo}
+        train_positions.extend(p for p in line_positions if not p.trainNo or p.trainNo not in seen_train_numbers)
+    except Exception as exc:
+        position_note = f'전체 열차 위치 API는 현재 사용할 수 없어 월곶 도착 정보만 표시합니다: {exc}'
+    payload = {
+        'title': '월곶역 수인분당선 도착',
+        'stationName': '월곶역',
+        'lineName': '수인분당선',
+        'walkingInfo': '이레하이니스에서 월곶역까지 도보 약 8~12분',
+        'arrivals': [a.as_dict() for a in arrivals],
+        'trainPositions': [p.as_dict() for p in train_positions],
+        'stationTopology': WOLGOT_ROUTE,
+        'anchorStation': '월곶',
+        'source': '서울 열린데이터광장 지하철 실시간 도착정보 API',
+        'positionSource': '서울 열린데이터광장 지하철 실시간 열차위치 API · 30초 캐시',
+        'predictionPolicy': 'station realtime ETA > whole-line realtime position > post-Wolgot estimated state > timetable fallback',
+    }
+    if position_note:
+        payload['positionNote'] = position_note
+    if debug_enabled:
+        payload['debug'] = debug_rows
+    return payload
+
+def subway_error_payload(exc):
+    return {
+        'title': '월곶역 수인분당선 도착',
+        'stationName': '월곶역',
+        'lineName': '수인분당선',
+        'walkingInfo': '이레하이니스에서 월곶역까지 도보 약 8~12분',
+        'arrivals': [],
+        'note': f'지하철 정보를 불러오지 못했습니다: {exc}',
+        'source': '서울 열린데이터광장 지하철 실시간 도착정보 API',
+    }
+
+def subway_fallback_payload(debug_enabled, exc, line_positions=None, position_error=None):
+    # Realtime arrivals are down or out of time: answer from the timetable.
+    parsed = parse_subway_arrivals(debug=debug_enabled, rows_override=[])
+    if line_positions is None and position_error is None:
+        position_error = exc
+    payload = subway_partial_payload(parsed, debug_enabled, line_positions, position_error)
+    payload['note'] = f'실시간 도착 정보를 받을 수 없어 시간표 기준으로 표시합니다: {exc}'
+    payload['degraded'] = ['arrivals', *payload.get('degraded', [])]
+    return payload
+
+def subway_partial_payload(parsed, debug_enabled, line_positions, position_error):
+    payload = build_subway_payload(parsed, debug_enabled, line_positions, position_error)
+    if position_error is not None:
+        payload['degraded'] = ['positions']
+    return payload
+
+def subway_arrivals_encoded(debug_enabled=False):
     def factory():
-        parsed = parse_subway_arrivals(debug=debug_enabled)
-        arrivals, debug_rows = parsed if debug_enabled else (parsed, None)
-        position_only_candidates = getattr(parse_subway_arrivals, 'last_position_only_candidates', [])
-        train_positions = [a.get('trainPosition') for a in [*arrivals, *position_only_candidates] if a.get('trainPosition')]
-        position_note = None
+        # Both subway calls start together and share one budget; whatever is
+        # missing at the deadline is marked degraded instead of failing.
+        deadline = time.monotonic() + REQUEST_DEADLINE
+        positions_job = UPSTREAM_EXECUTOR.submit(cached, 'subway-line-realtime-positions', lambda: fetch_line_realtime_positions(deadline=deadline), SUBWAY_POSITION_CACHE_TTL)
+        arrival_error = None
         try:
-            line_positions = cached('subway-line-realtime-positions', fetch_line_realtime_positions, SUBWAY_POSITION_CACHE_TTL)
-            wolgot_line_positions = [p for p in line_positions if p.get('reachesWolgot') and p.get('etaSeconds') is not None]
-            for direction in ('상행', '하행'):
-                direction_line_positions = sorted(
-                    [p for p in wolgot_line_positions if p.get('direction') == direction],
-                    key=lambda p: p.get('etaSeconds') or 999999,
-                )
-                if direction_line_positions:
-                    arrivals = [a for a in arrivals if not (a.get('direction') == direction and a.get('predictionSource') == 'TIMETABLE_ONLY')]
-                    direction_arrivals = [a for a in arrivals if a.get('direction') == direction]
-                    seen_arrival_trains = {a.get('trainNo') for a in direction_arrivals if a.get('trainNo')}
-                    for position in direction_line_positions:
-                        if len(direction_arrivals) >= 2:
-                            break
-                        train_no = position.get('trainNo')
-                        if train_no and train_no in seen_arrival_trains:
-                            continue
-                        arrival = line_position_to_arrival(position)
-                        arrivals.append(arrival)
-                        direction_arrivals.append(arrival)
-                        if train_no:
-                            seen_arrival_trains.add(train_no)
-            arrivals.sort(key=lambda x: (x.get('direction') or '', x.get('etaSeconds') if x.get('etaSeconds') is not None else 999999))
-            seen_train_numbers = {p.get('trainNo') for p in train_positions if p.get('trainNo')}
-            train_positions.extend(p for p in line_positions if not p.get('trainNo') or p.get('trainNo') not in seen_train_numbers)
+            parsed = parse_subway_arrivals(debug=debug_enabled, deadline=deadline)
+        except (UpstreamUnavailable, TimeoutError) as exc:
+            parsed, arrival_error = None, exc
+        line_positions, position_error = None, None
+        try:
+            line_positions = positions_job.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            position_error = TimeoutError('request deadline exceeded')
         except Exception as exc:
-            position_note = f'전체 열차 위치 API는 현재 사용할 수 없어 월곶 도착 정보만 표시합니다: {exc}'
-        payload = {
-            'title': '월곶역 수인분당선 도착',
-            'stationName': '월곶역',
-            'lineName': '수인분당선',
-            'walkingInfo': '이레하이니스에서 월곶역까지 도보 약 8~12분',
-            'arrivals': arrivals,
-            'trainPositions': train_positions,
-            'stationTopology': WOLGOT_ROUTE,
-            'anchorStation': '월곶',
-            'source': '서울 열린데이터광장 지하철 실시간 도착정보 API',
-            'positionSource': '서울 열린데이터광장 지하철 실시간 열차위치 API · 30초 캐시',
-            'predictionPolicy': 'station realtime ETA > whole-line realtime position > post-Wolgot estimated state > timetable fallback',
-        }
-        if position_note:
-            payload['positionNote'] = position_note
-        if debug_enabled:
-            payload['debug'] = debug_rows
-        return payload
+            position_error = exc
+        if arrival_error is not None:
+            return subway_fallback_payload(debug_enabled, arrival_error, line_positions, position_error)
+        return subway_partial_payload(parsed, debug_enabled, line_positions, position_error)
+    cache_key = 'subway-arrivals-wolgot-debug' if debug_enabled else 'subway-arrivals-wolgot'
+    return cached_json(cache_key, factory, SUBWAY_CACHE_TTL, SUBWAY_CACHE_MAX_STALE)
+
+def handle_subway_arrivals(handler, query=None):
+    record_metric(handler, 'subway')
     try:
-        cache_key = 'subway-arrivals-wolgot-debug' if debug_enabled else 'subway-arrivals-wolgot'
-        json_response(handler, cached(cache_key, factory, SUBWAY_CACHE_TTL))
+        encoded_json_response(handler, subway_arrivals_encoded(subway_debug_enabled(query or {})))
     except Exception as exc:
-        json_response(handler, {
-            'title': '월곶역 수인분당선 도착',
-            'stationName': '월곶역',
-            'lineName': '수인분당선',
-            'walkingInfo': '이레하이니스에서 월곶역까지 도보 약 8~12분',
-            'arrivals': [],
-            'note': f'지하철 정보를 불러오지 못했습니다: {exc}',
-            'source': '서울 열린데이터광장 지하철 실시간 도착정보 API',
-        }, status=502)
+        json_response(handler, subway_error_payload(exc), status=502)
+
+def subway_stream_signature(payload):
+    # Only what the map and arrival list render counts as a change.
+    snapshot = {'arrivals': payload.get('arrivals'), 'trainPositions': payload.get('trainPositions')}
+    return hashlib.sha256(json.dumps(snapshot, ensure_ascii=False, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+def publish_subway_stream(encoded):
+    signature = subway_stream_signature(encoded['payload'])
+    with SUBWAY_STREAM_CONDITION:
+        if signature == SUBWAY_STREAM_STATE['signature']:
+            return False
+        SUBWAY_STREAM_STATE['eventId'] += 1
+        SUBWAY_STREAM_STATE['signature'] = signature
+        SUBWAY_STREAM_STATE['data'] = encoded['body']
+        SUBWAY_STREAM_CONDITION.notify_all()
+        # asyncio subscribers are woken on their own loop.
+        for loop, changed in SUBWAY_STREAM_ASYNC_WAITERS:
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass
+    return True
+
+def subway_stream_refresh_loop():
+    idle_since = None
+    while True:
+        with SUBWAY_STREAM_CONDITION:
+            if SUBWAY_STREAM_STATE['subscribers'] > 0:
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time.time()
+            elif time.time() - idle_since >= SUBWAY_STREAM_IDLE_SECONDS:
+                SUBWAY_STREAM_STATE['refresher'] = None
+                return
+        if idle_since is None:
+            try:
+                publish_subway_stream(subway_arrivals_encoded())
+            except Exception:
+                pass
+        time.sleep(SUBWAY_STREAM_INTERVAL)
+
+def add_subway_stream_subscriber(delta):
+    with SUBWAY_STREAM_CONDITION:
+        if delta > 0 and SUBWAY_STREAM_STATE['subscribers'] >= SUBWAY_STREAM_MAX_CLIENTS:
+            return False
+        SUBWAY_STREAM_STATE['subscribers'] += delta
+        if delta > 0 and SUBWAY_STREAM_STATE['refresher'] is None:
+            thread = threading.Thread(target=subway_stream_refresh_loop, name='subway-stream-refresh', daemon=True)
+            SUBWAY_STREAM_STATE['refresher'] = thread
+            thread.start()
+    return True
+
+def subway_stream_event():
+    with SUBWAY_STREAM_CONDITION:
+        event_id, data = SUBWAY_STREAM_STATE['eventId'], SUBWAY_STREAM_STATE['data']
+    if data is None:
+        return event_id, None
+    return event_id, b'id: %d\nevent: subway\ndata: %s\n\n' % (event_id, data)
+
+def last_subway_stream_event_id(handler, query):
+    value = handler.headers.get('Last-Event-ID') or (query.get('lastEventId') or [''])[0]
+    try:
+        return int(value)
+    except ValueError:
+        return 0
+
+def send_subway_stream_headers(handler):
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+    handler.send_header('Cache-Control', 'no-cache')
+    handler.send_header('X-Accel-Buffering', 'no')
+    handler.send_header('Connection', 'close')
+    handler.end_headers()
+    handler.wfile.write(b'retry: %d\n\n' % (SUBWAY_STREAM_RETRY_SECONDS * 1000))
+
+def handle_subway_stream(handler, query):
+    if not add_subway_stream_subscriber(1):
+        return send_overloaded(handler)
+    handler.close_connection = True
+    record_metric(handler, 'subway')
+    try:
+        # Pool workers default to a short keep-alive timeout; a stream only
+        # writes, so give a slow reader until the next heartbeat.
+        handler.connection.settimeout(SUBWAY_STREAM_HEARTBEAT)
+        send_subway_stream_headers(handler)
+        handler.wfile.flush()
+        last_id = last_subway_stream_event_id(handler, query)
+        deadline = time.time() + SUBWAY_STREAM_MAX_SECONDS
+        while time.time() < deadline:
+            with SUBWAY_STREAM_CONDITION:
+                if SUBWAY_STREAM_STATE['eventId'] == last_id:
+                    SUBWAY_STREAM_CONDITION.wait(SUBWAY_STREAM_HEARTBEAT)
+            event_id, chunk = subway_stream_event()
+            if chunk is not None and event_id != last_id:
+                last_id = event_id
+                handler.wfile.write(chunk)
+            else:
+                handler.wfile.write(b': ping\n\n')
+            handler.wfile.flush()
+    except OSError:
+        pass
+    finally:
+        add_subway_stream_subscriber(-1)
 
 def handle_bus_station_search(handler, query):
     key = os.getenv('GYEONGGI_BUS_API_KEY') or os.getenv('SEOUL_API_KEY')
@@ -1419,6 +2554,102 @@ def handle_bus_station_search(handler, query):
     except Exception as exc:
         json_response(handler, {'keyword': keyword, 'stations': [], 'note': str(exc)}, 502)
 
+def static_url(rel_path):
+    asset = STATIC_ASSETS.get(rel_path)
+    return f'{rel_path}?v={asset["hash"]}' if asset else rel_path
+
+def rewrite_static_references(text, pattern, prefix=''):
+    def replace(match):
+        rel_path = match.group('path')
+        if rel_path not in STATIC_ASSETS:
+            return match.group(0)
+        return f'{match.group("head")}{prefix}{static_url(rel_path)}{match.group("tail")}'
+    return re.sub(pattern, replace, text)
+
+def static_asset_entry(rel_path, body):
+    content_type = mimetypes.guess_type(rel_path)[0] or 'application/octet-stream'
+    compressible = content_type.startswith('text/') or content_type in ('application/javascript', 'image/svg+xml')
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type = f'{content_type}; charset=utf-8'
+    return {
+        'body': body,
+        'hash': hashlib.sha256(body).hexdigest()[:12],
+        'contentType': content_type,
+        'encodings': compress_body(body) if compressible else {},
+    }
+
+def load_static_assets():
+    assets = {}
+    stylesheets = []
+    for dirname in STATIC_ASSET_DIRS:
+        root = BASE_DIR / dirname
+        if not root.is_dir():
+            continue
+        for path in sorted(root.rglob('*')):
+            if not path.is_file() or path.name.startswith('.'):
+                continue
+            rel_path = path.relative_to(BASE_DIR).as_posix()
+            if path.suffix == '.css':
+                stylesheets.append(rel_path)
+                continue
+            assets[rel_path] = static_asset_entry(rel_path, path.read_bytes())
+    STATIC_ASSETS.clear()
+    STATIC_ASSETS.update(assets)
+    # Stylesheets reference images, so they are hashed after their url(...)
+    # targets are rewritten; an icon change then busts the stylesheet too.
+    for rel_path in stylesheets:
+        text = (BASE_DIR / rel_path).read_text(encoding='utf-8')
+        text = rewrite_static_references(
+            text,
+            r"(?P<head>url\(['\"]?\.\./)(?P<path>(?:assets|js|styles)/[^'\")?#]+)(?:\?[^'\")#]*)?(?P<tail>['\"]?\))",
+        )
+        STATIC_ASSETS[rel_path] = static_asset_entry(rel_path, text.encode('utf-8'))
+    index_path = BASE_DIR / 'index.html'
+    if index_path.exists():
+        html_text = rewrite_static_references(
+            index_path.read_text(encoding='utf-8'),
+            r'(?P<head>(?:href|src)=")(?P<path>(?:styles|js|assets)/[^"?#]+)(?:\?[^"#]*)?(?P<tail>")',
+        )
+        STATIC_ASSETS['index.html'] = {'body': html_text.encode('utf-8'), 'contentType': 'text/html; charset=utf-8'}
+
+def send_index_page(handler):
+    if 'index.html' not in STATIC_ASSETS:
+        load_static_assets()
+    body = STATIC_ASSETS['index.html']['body']
+    handler.send_response(200)
+    handler.send_header('Content-Type', 'text/html; charset=utf-8')
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+def send_static_asset(handler, rel_path, query):
+    asset = STATIC_ASSETS[rel_path]
+    # Only the exact fingerprinted URL is immutable; bare or outdated ?v= URLs
+    # still revalidate so an old link never pins stale content.
+    versioned = urllib.parse.parse_qs(query).get('v', [''])[0] == asset['hash']
+    cache_control = STATIC_IMMUTABLE_CACHE_CONTROL if versioned else 'no-cache'
+    encoding = negotiate_encoding(handler, asset['encodings'])
+    etag = f'"{asset["hash"]}-{encoding}"' if encoding else f'"{asset["hash"]}"'
+    if etag_matches(handler, etag):
+        handler.send_response(304)
+        handler.send_header('ETag', etag)
+        handler.send_header('Cache-Control', cache_control)
+        handler.send_header('Vary', 'Accept-Encoding')
+        handler.end_headers()
+        return
+    body = asset['encodings'][encoding] if encoding else asset['body']
+    handler.send_response(200)
+    handler.send_header('Content-Type', asset['contentType'])
+    handler.send_header('Cache-Control', cache_control)
+    handler.send_header('ETag', etag)
+    handler.send_header('Vary', 'Accept-Encoding')
+    if encoding:
+        handler.send_header('Content-Encoding', encoding)
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    if handler.command != 'HEAD':
+        handler.wfile.write(body)
+
 def get_db_connection():
     return pymysql.connect(
         host=os.getenv('DB_HOST', '127.0.0.1'),
@@ -1431,30 +2662,200 @@ def get_db_connection():
         autocommit=True,
     )
 
+def pbkdf2_digest(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations, dklen=32).hex()
+
+def login_hash_worker_init():
+    # Shutdown signals sent to the whole group are handled by the server,
+    # which then stops its pool; the workers must not die underneath it.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+def login_hash_executor():
+    with LOGIN_HASH_LOCK:
+        if LOGIN_HASH_STATE['executor'] is None:
+            try:
+                LOGIN_HASH_STATE['executor'] = ProcessPoolExecutor(max_workers=LOGIN_HASH_WORKERS, initializer=login_hash_worker_init)
+            except (OSError, NotImplementedError):
+                # No working process support here; threads still bound the work.
+                LOGIN_HASH_STATE['executor'] = ThreadPoolExecutor(max_workers=LOGIN_HASH_WORKERS, thread_name_prefix='login-hash')
+        return LOGIN_HASH_STATE['executor']
+
+def stop_login_hash_workers():
+    # The workers ignore shutdown signals, so the server has to stop them.
+    with LOGIN_HASH_LOCK:
+        executor, LOGIN_HASH_STATE['executor'] = LOGIN_HASH_STATE['executor'], None
+    if executor is not None:
+        executor.shutdown(cancel_futures=True)
+
+def start_login_hash_workers():
+    # Fork the hashing workers at startup, before the server threads exist.
+    try:
+        login_hash_executor().submit(pbkdf2_digest, '', 'warmup', 1).result()
+    except Exception:
+        pass
+
+def login_hash(password, salt, iterations):
+    if not LOGIN_HASH_SLOTS.acquire(timeout=LOGIN_HASH_WAIT):
+        raise TimeoutError('login hashing is saturated')
+    try:
+        executor = login_hash_executor()
+        try:
+            return executor.submit(pbkdf2_digest, password, salt, iterations).result()
+        except BrokenProcessPool:
+            with LOGIN_HASH_LOCK:
+                if LOGIN_HASH_STATE['executor'] is executor:
+                    LOGIN_HASH_STATE['executor'] = None
+            raise
+    finally:
+        LOGIN_HASH_SLOTS.release()
+
 def verify_password(password, encoded):
     try:
         algo, iterations, salt, expected = str(encoded or '').split('$', 3)
         if algo != 'pbkdf2_sha256':
             return False
-        digest = hashlib.pbkdf2_hmac('sha256', str(password or '').encode(), salt.encode(), int(iterations), dklen=32).hex()
-        return hmac.compare_digest(digest, expected)
+        iterations = int(iterations)
     except Exception:
         return False
+    # Hashing failures propagate, so a busy server is not reported as a bad password.
+    return hmac.compare_digest(login_hash(str(password or ''), salt, iterations), expected)
+
+def login_client_key(handler):
+    peer = (getattr(handler, 'client_address', None) or ('',))[0]
+    # Behind the local reverse proxy every peer is loopback; use the address
+    # the proxy appended to X-Forwarded-For. Other client-supplied headers
+    # are not trusted.
+    if peer in ('127.0.0.1', '::1'):
+        forwarded = str(handler.headers.get('X-Forwarded-For') or '').split(',')[-1].strip()
+        return forwarded or peer
+    return peer
+
+def login_rate_limited(client_key):
+    now = time.time()
+    with LOGIN_ATTEMPTS_LOCK:
+        if len(LOGIN_ATTEMPTS) > 10000:
+            for key in [k for k, (start, _) in LOGIN_ATTEMPTS.items() if now - start >= LOGIN_RATE_WINDOW]:
+                del LOGIN_ATTEMPTS[key]
+        start, count = LOGIN_ATTEMPTS.get(client_key, (now, 0))
+        if now - start >= LOGIN_RATE_WINDOW:
+            start, count = now, 0
+        if count >= LOGIN_RATE_LIMIT:
+            return max(1, int(start + LOGIN_RATE_WINDOW - now) + 1)
+        LOGIN_ATTEMPTS[client_key] = (start, count + 1)
+    return 0
+
+def close_db_connection(entry):
+    try:
+        entry['conn'].close()
+    except Exception:
+        pass
+
+def checkout_db_connection():
+    # Idle connections past their lifetime are dropped; ones idle for a while
+    # are pinged first, so a server-side wait_timeout never reaches a login.
+    while True:
+        now = time.monotonic()
+        with DB_POOL['lock']:
+            entry = DB_POOL['idle'].pop() if DB_POOL['idle'] else None
+        if entry is None:
+            return {'conn': get_db_connection(), 'created': now, 'used': now}
+        if now - entry['created'] >= DB_POOL_MAX_LIFETIME:
+            close_db_connection(entry)
+            continue
+        if now - entry['used'] >= DB_POOL_CHECK_AFTER:
+            try:
+                entry['conn'].ping(reconnect=False)
+            except Exception:
+                close_db_connection(entry)
+                continue
+        return entry
+
+@contextmanager
+def pooled_db_connection():
+    if not DB_POOL['slots'].acquire(timeout=DB_POOL_WAIT):
+        raise TimeoutError('database connection pool exhausted')
+    entry = None
+    try:
+        entry = checkout_db_connection()
+        yield entry['conn']
+    except Exception:
+        # The connection may be mid-result or broken; never hand it out again.
+        if entry is not None:
+            close_db_connection(entry)
+            entry = None
+        raise
+    finally:
+        if entry is not None:
+            entry['used'] = time.monotonic()
+            with DB_POOL['lock']:
+                DB_POOL['idle'].append(entry)
+        DB_POOL['slots'].release()
 
 def get_portal_account(username):
-    with get_db_connection() as conn:
+    with pooled_db_connection() as conn:
         with conn.cursor() as cur:
             cur.execute('SELECT * FROM resident_portal_accounts WHERE username=%s AND enabled=1 LIMIT 1', (username,))
             return cur.fetchone()
 
-def mark_portal_login(account_id):
+def write_portal_logins(account_ids):
+    if not account_ids:
+        return
+    ids = sorted(account_ids)
     try:
-        with get_db_connection() as conn:
+        with pooled_db_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute('UPDATE resident_portal_accounts SET last_login_at=CURRENT_TIMESTAMP WHERE id=%s', (account_id,))
+                placeholders = ','.join(['%s'] * len(ids))
+                cur.execute(f'UPDATE resident_portal_accounts SET last_login_at=CURRENT_TIMESTAMP WHERE id IN ({placeholders})', tuple(ids))
     except Exception:
         pass
 
+def drain_portal_login_queue(account_ids):
+    while True:
+        try:
+            account_ids.add(PORTAL_LOGIN_QUEUE.get_nowait())
+        except queue.Empty:
+            return account_ids
+
+def portal_login_writer_loop():
+    while not PORTAL_LOGIN_STOP.is_set():
+        try:
+            account_ids = {PORTAL_LOGIN_QUEUE.get(timeout=0.5)}
+        except queue.Empty:
+            continue
+        # A login burst after a password rotation goes out as one UPDATE;
+        # on shutdown the held ids are written straight away.
+        PORTAL_LOGIN_STOP.wait(0.2)
+        write_portal_logins(drain_portal_login_queue(account_ids))
+
+def ensure_portal_login_writer():
+    if PORTAL_LOGIN_STATE['writer'] is not None:
+        return
+    with PORTAL_LOGIN_LOCK:
+        if PORTAL_LOGIN_STATE['writer'] is not None:
+            return
+        thread = threading.Thread(target=portal_login_writer_loop, name='portal-login-writer', daemon=True)
+        PORTAL_LOGIN_STATE['writer'] = thread
+    thread.start()
+
+def flush_portal_logins():
+    PORTAL_LOGIN_STOP.set()
+    writer = PORTAL_LOGIN_STATE['writer']
+    if writer is not None:
+        writer.join(timeout=5)
+    write_portal_logins(drain_portal_login_queue(set()))
+
+atexit.register(flush_portal_logins)
+
+def mark_portal_login(account_id):
+    # The login response does not wait for this bookkeeping write.
+    try:
+        PORTAL_LOGIN_QUEUE.put_nowait(account_id)
+    except queue.Full:
+        with PORTAL_LOGIN_LOCK:
+            PORTAL_LOGIN_STATE['dropped'] += 1
+    ensure_portal_login_writer()
+
 def auth_secret():
     return (os.getenv('PORTAL_AUTH_SECRET') or os.getenv('SESSION_SECRET') or 'dev-secret-change-me').encode()
 
@@ -1479,9 +2880,27 @@ def is_authenticated(handler):
 
 
 def current_portal_payload(handler):
-    token = parse_cookies(handler.headers.get('Cookie')).get(PORTAL_COOKIE_NAME)
+    # A keep-alive handler serves many requests, so the parsed session is tied
+    # to this request's headers object rather than to the handler itself.
+    session = getattr(handler, 'portal_session', None)
+    if session is None or session['headers'] is not handler.headers:
+        token = parse_cookies(handler.headers.get('Cookie')).get(PORTAL_COOKIE_NAME)
+        session = handler.portal_session = {'headers': handler.headers, 'payload': verified_portal_token(token)}
+    payload = session['payload']
+    if payload is None or int(payload.get('exp', 0)) <= int(time.time()):
+        return None
+    return payload
+
+def verified_portal_token(token):
     if not token or '.' not in token:
         return None
+    with PORTAL_TOKEN_CACHE_LOCK:
+        payload = PORTAL_TOKEN_CACHE.get(token)
+        if payload is not None:
+            if int(payload.get('exp', 0)) > int(time.time()):
+                PORTAL_TOKEN_CACHE.move_to_end(token)
+                return payload
+            PORTAL_TOKEN_CACHE.pop(token, None)
     body, sig = token.rsplit('.', 1)
     if not hmac.compare_digest(sign_value(body), sig):
         return None
@@ -1489,9 +2908,15 @@ def current_portal_payload(handler):
         payload = json.loads(base64.urlsafe_b64decode(body + '=' * (-len(body) % 4)).decode())
         if int(payload.get('exp', 0)) <= int(time.time()):
             return None
-        return payload
     except Exception:
         return None
+    # Only tokens that verified are remembered, so junk cookies cannot evict them.
+    with PORTAL_TOKEN_CACHE_LOCK:
+        PORTAL_TOKEN_CACHE[token] = payload
+        PORTAL_TOKEN_CACHE.move_to_end(token)
+        while len(PORTAL_TOKEN_CACHE) > PORTAL_TOKEN_CACHE_SIZE:
+            PORTAL_TOKEN_CACHE.popitem(last=False)
+    return payload
 
 def current_portal_user(handler):
     payload = current_portal_payload(handler)
@@ -1515,8 +2940,45 @@ def save_visit_metrics(metrics):
         tmp = VISIT_METRICS_PATH.with_suffix('.tmp')
         tmp.write_text(json.dumps(metrics, ensure_ascii=False, indent=2, sort_keys=True))
         tmp.replace(VISIT_METRICS_PATH)
+        return True
     except Exception:
-        pass
+        return False
+
+def ensure_visit_metrics_loaded():
+    # Caller holds VISIT_METRICS_LOCK.
+    if not VISIT_METRICS_STATE['loaded']:
+        VISIT_METRICS.clear()
+        VISIT_METRICS.update(load_visit_metrics())
+        VISIT_METRICS_STATE['loaded'] = True
+    return VISIT_METRICS
+
+def flush_visit_metrics():
+    with VISIT_METRICS_FLUSH_LOCK:
+        with VISIT_METRICS_LOCK:
+            if not VISIT_METRICS_STATE['dirty']:
+                return
+            snapshot = copy.deepcopy(VISIT_METRICS)
+            VISIT_METRICS_STATE['dirty'] = False
+        if not save_visit_metrics(snapshot):
+            with VISIT_METRICS_LOCK:
+                VISIT_METRICS_STATE['dirty'] = True
+
+def visit_metrics_flush_loop():
+    while True:
+        time.sleep(VISIT_METRICS_FLUSH_INTERVAL)
+        flush_visit_metrics()
+
+def ensure_visit_metrics_flusher():
+    if VISIT_METRICS_STATE['flusher'] is not None:
+        return
+    with VISIT_METRICS_LOCK:
+        if VISIT_METRICS_STATE['flusher'] is not None:
+            return
+        thread = threading.Thread(target=visit_metrics_flush_loop, name='visit-metrics-flush', daemon=True)
+        VISIT_METRICS_STATE['flusher'] = thread
+    thread.start()
+
+atexit.register(flush_visit_metrics)
 
 def metric_bucket_name(handler):
     user = current_portal_user(handler)
@@ -1529,17 +2991,32 @@ def record_metric(handler, section, kind='api'):
         if role == 'admin':
             return
         today = datetime.now(KST).strftime('%Y-%m-%d')
-        metrics = load_visit_metrics()
-        for scope in (metrics.setdefault('total', {}), metrics.setdefault('daily', {}).setdefault(today, {})):
-            role_bucket = scope.setdefault(role, {})
-            key = f'{kind}:{section}'
-            role_bucket[key] = int(role_bucket.get(key, 0)) + 1
-        save_visit_metrics(metrics)
+        key = f'{kind}:{section}'
+        # Counters live in memory; the file is rewritten by the flusher thread
+        # every VISIT_METRICS_FLUSH_INTERVAL seconds and once more at exit.
+        with VISIT_METRICS_LOCK:
+            metrics = ensure_visit_metrics_loaded()
+            for scope in (metrics.setdefault('total', {}), metrics.setdefault('daily', {}).setdefault(today, {})):
+                role_bucket = scope.setdefault(role, {})
+                role_bucket[key] = int(role_bucket.get(key, 0)) + 1
+            VISIT_METRICS_STATE['dirty'] = True
+        ensure_visit_metrics_flusher()
     except Exception:
         pass
 
+def background_writer_snapshot():
+    with SUBWAY_EVENT_DROP_LOCK:
+        subway_dropped = SUBWAY_EVENT_LOG_STATE['dropped']
+    with PORTAL_LOGIN_LOCK:
+        login_dropped = PORTAL_LOGIN_STATE['dropped']
+    return {
+        'subwayEvents': {'pending': SUBWAY_EVENT_QUEUE.qsize(), 'dropped': subway_dropped},
+        'portalLogins': {'pending': PORTAL_LOGIN_QUEUE.qsize(), 'dropped': login_dropped},
+    }
+
 def compact_metrics_for_admin():
-    metrics = load_visit_metrics()
+    with VISIT_METRICS_LOCK:
+        metrics = copy.deepcopy(ensure_visit_metrics_loaded())
     daily = metrics.get('daily', {})
     days = sorted(daily.keys())[-14:]
     sections = [
@@ -1547,6 +3024,7 @@ def compact_metrics_for_admin():
         ('api:ocean', '바다·날씨 API'),
         ('api:bus', '버스정류장 API'),
         ('api:subway', '월곶역 지하철 API'),
+        ('api:dashboard', '대시보드 API'),
     ]
     roles = ['resident', 'admin', 'anonymous']
     return {
@@ -1554,6 +3032,9 @@ def compact_metrics_for_admin():
         'sections': [{'key': k, 'label': v} for k, v in sections],
         'total': metrics.get('total', {}),
         'daily': [{'date': d, 'counts': daily.get(d, {})} for d in days],
+        'cache': cache_stats_snapshot(),
+        'upstreams': upstream_breaker_snapshot(),
+        'writers': background_writer_snapshot(),
         'updatedAt': datetime.now(KST).isoformat(timespec='seconds'),
     }
 
@@ -1563,18 +3044,70 @@ def handle_portal_me(handler):
         return json_response(handler, {'authenticated': False}, 401)
     return json_response(handler, {'authenticated': True, 'username': user['username'], 'role': user['role']})
 
+def load_tide_files():
+    tide = {}
+    for name, file_name in (('today', 'tide_today.json'), ('tomorrow', 'tide_tomorrow.json')):
+        path = DATA_DIR / file_name
+        tide[name] = json.loads(path.read_text()) if path.exists() else None
+    if tide['today'] is None:
+        fallback = DATA_DIR / 'tide.json'
+        if not fallback.exists():
+            raise FileNotFoundError('조수 데이터 파일이 없습니다.')
+        tide = {'today': json.loads(fallback.read_text()), 'tomorrow': None}
+    return tide
+
+def dashboard_section(cache_key, load, error_payload=None):
+    try:
+        section = {'data': load(), 'error': None}
+    except Exception as exc:
+        section = {'data': error_payload(exc) if error_payload else None, 'error': str(exc)}
+    entry = CACHE.get(cache_key)
+    section['updatedAt'] = datetime.fromtimestamp(entry['time'], KST).isoformat(timespec='seconds') if entry else None
+    return section
+
+def dashboard_job(name, cache_key, load, error_payload=None):
+    # Requests arriving while a section is still loading share its future, so
+    # slow upstreams cannot queue more than one job per section.
+    with DASHBOARD_JOBS_LOCK:
+        future = DASHBOARD_JOBS.get(name)
+        if future is None or future.done():
+            future = DASHBOARD_JOBS[name] = DASHBOARD_EXECUTOR.submit(dashboard_section, cache_key, load, error_payload)
+    return future
+
+def handle_dashboard(handler):
+    record_metric(handler, 'dashboard')
+    user = current_portal_user(handler)
+    jobs = {
+        'tide': dashboard_job('tide', 'tide-files', lambda: cached('tide-files', load_tide_files, TIDE_CACHE_TTL)),
+        'bus': dashboard_job('bus', 'bus-arrivals-default', lambda: bus_arrivals_encoded()['payload'], bus_error_payload),
+        'subway': dashboard_job('subway', 'subway-arrivals-wolgot', lambda: subway_arrivals_encoded()['payload'], subway_error_payload),
+        'weather': dashboard_job('weather', 'weather-wolgot-kma', lambda: weather_encoded()['payload'], weather_error_payload),
+    }
+    deadline = time.time() + DASHBOARD_DEADLINE
+    sections = {}
+    for name, future in jobs.items():
+        try:
+            sections[name] = future.result(timeout=max(0, deadline - time.time()))
+        except FutureTimeoutError:
+            # The fill keeps running and lands in CACHE for the next request.
+            sections[name] = {'data': None, 'error': '응답 시간 초과', 'updatedAt': None}
+    me = {'authenticated': True, 'username': user['username'], 'role': user['role']} if user else {'authenticated': False}
+    sections['me'] = {'data': me, 'error': None, 'updatedAt': None}
+    # The body carries the caller's own "me" section.
+    encoded_json_response(handler, encode_json_body({'sections': sections}), cache_control='private, no-cache')
+
 def handle_admin_metrics(handler):
     user = current_portal_user(handler)
     if not user or user.get('role') != 'admin':
         return json_response(handler, {'note': 'admin only'}, 403)
     return json_response(handler, compact_metrics_for_admin())
 
-def send_login_page(handler, error=''):
+def send_login_page(handler, error='', status=200, retry_after=None):
     err = f'<p class="login-error">{html.escape(error)}</p>' if error else ''
     body = (
         '<!doctype html><html lang="ko"><head><meta charset="utf-8">'
         '<meta name="viewport" content="width=device-width,initial-scale=1">'
-        '<title>입주자 로그인</title><link rel="stylesheet" href="/update-tide/styles/ocean.css?v=auth2">'
+        f'<title>입주자 로그인</title><link rel="stylesheet" href="/update-tide/{static_url("styles/ocean.css")}">'
         '</head><body class="portal-login-body"><main class="portal-login"><div class="portal-login-card">'
         '<div class="login-kicker">월곶 이레하이니스</div><h1>입주자 포털 로그인</h1>'
         '<p>입주자 공용 계정으로 로그인하면 이 브라우저에서 자동 로그인됩니다.</p>'
@@ -1584,54 +3117,117 @@ def send_login_page(handler, error=''):
         '<button>로그인</button></form></div></main></body></html>'
     )
     data = body.encode('utf-8')
-    handler.send_response(200)
+    handler.send_response(status)
     handler.send_header('Content-Type', 'text/html; charset=utf-8')
+    if retry_after:
+        handler.send_header('Retry-After', str(retry_after))
     handler.send_header('Content-Length', str(len(data)))
     handler.end_headers()
     handler.wfile.write(data)
 
+def send_redirect(handler, location, cookie=None):
+    # Keep-alive clients need an explicit empty body length on redirects.
+    handler.send_response(303)
+    handler.send_header('Location', location)
+    if cookie:
+        handler.send_header('Set-Cookie', cookie)
+    handler.send_header('Content-Length', '0')
+    handler.end_headers()
+
 def handle_login(handler):
     length = int(handler.headers.get('Content-Length') or 0)
     params = urllib.parse.parse_qs(handler.rfile.read(length).decode('utf-8', 'replace'))
     username = (params.get('username') or [''])[0].strip()
     password = (params.get('password') or [''])[0]
+    retry_after = login_rate_limited(login_client_key(handler))
+    if retry_after:
+        return send_login_page(handler, '로그인 시도가 너무 많습니다. 잠시 후 다시 시도해 주세요.', 429, retry_after)
     try:
         account = get_portal_account(username)
         if not account or not verify_password(password, account.get('password_hash')):
             return send_login_page(handler, '아이디 또는 비밀번호가 맞지 않습니다.')
         mark_portal_login(account['id'])
         cookie = make_cookie(account)
-        handler.send_response(303)
-        handler.send_header('Location', '/update-tide/')
-        handler.send_header('Set-Cookie', f'{PORTAL_COOKIE_NAME}={cookie}; Max-Age={PORTAL_COOKIE_MAX_AGE}; Path=/update-tide/; HttpOnly; SameSite=Lax')
-        handler.end_headers()
+        send_redirect(handler, '/update-tide/', f'{PORTAL_COOKIE_NAME}={cookie}; Max-Age={PORTAL_COOKIE_MAX_AGE}; Path=/update-tide/; HttpOnly; SameSite=Lax')
+    except TimeoutError:
+        send_login_page(handler, '로그인 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해 주세요.', 503, SERVER_RETRY_AFTER_SECONDS)
     except Exception:
         send_login_page(handler, '로그인 처리 중 오류가 발생했습니다.')
 
 def handle_logout(handler):
-    handler.send_response(303)
-    handler.send_header('Location', '/update-tide/login')
-    handler.send_header('Set-Cookie', f'{PORTAL_COOKIE_NAME}=; Max-Age=0; Path=/update-tide/; HttpOnly; SameSite=Lax')
+    send_redirect(handler, '/update-tide/login', f'{PORTAL_COOKIE_NAME}=; Max-Age=0; Path=/update-tide/; HttpOnly; SameSite=Lax')
+
+API_ROUTES = {
+    '/api/portal/me': lambda handler, query: handle_portal_me(handler),
+    '/api/admin/metrics': lambda handler, query: handle_admin_metrics(handler),
+    '/api/bus/arrivals': lambda handler, query: handle_bus_arrivals(handler),
+    '/api/bus/stations': handle_bus_station_search,
+    '/api/dashboard': lambda handler, query: handle_dashboard(handler),
+    '/api/subway/arrivals': handle_subway_arrivals,
+    '/api/weather': lambda handler, query: handle_weather(handler),
+}
+
+def send_overloaded(handler):
+    body = json.dumps({'note': '요청이 많아 잠시 후 다시 시도해 주세요.'}, ensure_ascii=False).encode('utf-8')
+    handler.send_response(503)
+    handler.send_header('Content-Type', 'application/json; charset=utf-8')
+    handler.send_header('Cache-Control', 'no-store')
+    handler.send_header('Retry-After', str(SERVER_RETRY_AFTER_SECONDS))
+    handler.send_header('Content-Length', str(len(body)))
     handler.end_headers()
+    handler.wfile.write(body)
+
+def dispatch_api(handler, path, query_string):
+    route = API_ROUTES[path]
+    query = urllib.parse.parse_qs(query_string)
+    if API_SLOTS is None:
+        return route(handler, query)
+    # In pool mode upstream-bound API work only gets its own slots, so a hung
+    # upstream can never occupy the workers that serve static files. Waiting
+    # for a slot would itself hold a worker, so a full set is refused at once.
+    if not API_SLOTS.acquire(blocking=False):
+        return send_overloaded(handler)
+    try:
+        return route(handler, query)
+    finally:
+        API_SLOTS.release()
 
 class Handler(SimpleHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Idle keep-alive sockets are dropped after this many seconds.
+    timeout = HTTP_KEEPALIVE_TIMEOUT
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(BASE_DIR), **kwargs)
 
+    def setup(self):
+        super().setup()
+        self.requests_served = 0
+
+    def handle_one_request(self):
+        super().handle_one_request()
+        self.requests_served += 1
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'cache-control':
+            self.cache_control_sent = True
+        super().send_header(keyword, value)
+
     def end_headers(self):
-        self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        if not getattr(self, 'cache_control_sent', False):
+            self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
+        self.cache_control_sent = False
+        if self.requests_served + 1 >= HTTP_MAX_REQUESTS_PER_CONNECTION:
+            self.send_header('Connection', 'close')
         super().end_headers()
 
     def do_GET(self):
         parsed = urllib.parse.urlparse(self.path)
         path = parsed.path
         if path == '/update-tide':
-            self.send_response(303)
-            self.send_header('Location', '/update-tide/')
-            self.end_headers()
-            return
+            return send_redirect(self, '/update-tide/')
         if path.startswith('/update-tide/'):
             path = path[len('/update-tide'):]
             self.path = urllib.parse.urlunparse(parsed._replace(path=path))
@@ -1639,27 +3235,21 @@ class Handler(SimpleHTTPRequestHandler):
             return send_login_page(self)
         if path in ('/logout', '/logout/'):
             return handle_logout(self)
-        if path == '/api/portal/me':
-            return handle_portal_me(self)
-        if path == '/api/admin/metrics':
-            return handle_admin_metrics(self)
-        if path == '/api/bus/arrivals':
-            return handle_bus_arrivals(self)
-        if path == '/api/bus/stations':
-            return handle_bus_station_search(self, urllib.parse.parse_qs(parsed.query))
-        if path == '/api/subway/arrivals':
-            return handle_subway_arrivals(self, urllib.parse.parse_qs(parsed.query))
-        if path == '/api/weather':
-            return handle_weather(self)
+        if path == '/api/subway/stream':
+            # Long-lived, so it stays out of the API slots.
+            return handle_subway_stream(self, urllib.parse.parse_qs(parsed.query))
+        if path in API_ROUTES:
+            return dispatch_api(self, path, parsed.query)
         if path == '/' or path.endswith('/index.html'):
             if not is_authenticated(self):
-                self.send_response(303)
-                self.send_header('Location', '/update-tide/login')
-                self.end_headers()
-                return
+                return send_redirect(self, '/update-tide/login')
             record_metric(self, 'home', 'page')
+            if STATIC_FINGERPRINT:
+                return send_index_page(self)
         if path.startswith('/data/tide') and path.endswith('.json'):
             record_metric(self, 'ocean')
+        if STATIC_FINGERPRINT and path.lstrip('/') in STATIC_ASSETS and path.lstrip('/') != 'index.html':
+            return send_static_asset(self, path.lstrip('/'), parsed.query)
         return super().do_GET()
 
     def do_POST(self):
@@ -1675,10 +3265,708 @@ class Handler(SimpleHTTPRequestHandler):
 class ReusableThreadingHTTPServer(ThreadingHTTPServer):
     allow_reuse_address = True
 
+class PooledHandler(Handler):
+    # Workers are a fixed budget here, so idle keep-alive sockets are let go
+    # quickly instead of pinning a worker for the full keep-alive window.
+    timeout = int(os.getenv('SERVER_POOL_KEEPALIVE_SECONDS', '2'))
+
+class PooledHTTPServer(HTTPServer):
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, workers=32, queue_size=64):
+        super().__init__(server_address, handler_class)
+        self.pending = queue.Queue(maxsize=queue_size)
+        self.workers = []
+        for index in range(workers):
+            thread = threading.Thread(target=self.worker_loop, name=f'http-worker-{index}', daemon=True)
+            thread.start()
+            self.workers.append(thread)
+
+    def process_request(self, request, client_address):
+        try:
+            self.pending.put_nowait((request, client_address))
+        except queue.Full:
+            self.reject_request(request)
+
+    def worker_loop(self):
+        while True:
+            request, client_address = self.pending.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def reject_request(self, request):
+        # Answered from the accept thread without parsing, so shedding load
+        # stays cheap exactly when the workers are saturated.
+        body = json.dumps({'note': '요청이 많아 잠시 후 다시 시도해 주세요.'}, ensure_ascii=False).encode('utf-8')
+        head = (
+            'HTTP/1.1 503 Service Unavailable\r\n'
+            f'Retry-After: {SERVER_RETRY_AFTER_SECONDS}\r\n'
+            'Content-Type: application/json; charset=utf-8\r\n'
+            'Cache-Control: no-store\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Connection: close\r\n\r\n'
+        ).encode('ascii')
+        try:
+            request.setblocking(False)
+            try:
+                request.recv(65536)
+            except (BlockingIOError, OSError):
+                pass
+            request.setblocking(True)
+            request.settimeout(1)
+            request.sendall(head + body)
+        except OSError:
+            pass
+        self.shutdown_request(request)
+
+ASYNC_UPSTREAM_POOLS = {}
+ASYNC_UPSTREAM_SLOTS = {}
+ASYNC_FILE_ROOTS = ('data',) + STATIC_ASSET_DIRS
+
+
+async def async_refresh_cache_entry(key, factory, flight, started):
+    cache_stat(key, 'refreshes')
+    try:
+        value = await factory()
+        CACHE[key] = {'time': started, 'value': value}
+        flight['value'] = value
+        return value
+    except BaseException as exc:
+        if isinstance(exc, Exception):
+            cache_stat(key, 'errors')
+        flight['error'] = exc if isinstance(exc, Exception) else RuntimeError(f'{key} refresh was cancelled')
+        raise
+    finally:
+        settle_cache_flight(key, flight)
+
+
+def consume_flight_result(task):
+    if not task.cancelled():
+        task.exception()
+
+
+async def async_cached(key, factory, ttl=CACHE_TTL, max_stale=None):
+    # Same contract as cached() and the same CACHE_FLIGHTS map, so a key is
+    # never filled twice at once by a coroutine and an executor thread. An
+    # async flight is an asyncio task; threads wait on its Event as usual.
+    now = time.time()
+    hit = CACHE.get(key)
+    if hit and now - hit['time'] < ttl:
+        cache_stat(key, 'hits')
+        return hit['value']
+    if hit and max_stale is not None and now - hit['time'] >= ttl + max_stale:
+        with CACHE_LOCK:
+            if CACHE.get(key) is hit:
+                CACHE.pop(key, None)
+        hit = None
+    with CACHE_LOCK:
+        flight = CACHE_FLIGHTS.get(key)
+        leader = flight is None
+        if leader:
+            flight = CACHE_FLIGHTS[key] = {'event': threading.Event(), 'value': None, 'error': None, 'waiters': []}
+    if leader:
+        flight['task'] = asyncio.ensure_future(async_refresh_cache_entry(key, factory, flight, now))
+        flight['task'].add_done_callback(consume_flight_result)
+    if hit and (max_stale or not leader):
+        cache_stat(key, 'servedStale' if leader else 'servedPrevious')
+        return hit['value']
+    if not leader:
+        cache_stat(key, 'coalesced')
+    task = flight.get('task')
+    if task is not None:
+        return await asyncio.shield(task)
+    # An executor thread is filling this key through cached(); it wakes this
+    # coroutine through the loop when the flight settles.
+    loop = asyncio.get_running_loop()
+    waiter = loop.create_future()
+    with CACHE_LOCK:
+        pending = flight['waiters'] is not None
+        if pending:
+            flight['waiters'].append((loop, waiter))
+    if pending:
+        await waiter
+    if flight['error'] is not None:
+        raise flight['error']
+    return flight['value']
+
+
+async def async_cached_json(key, factory, ttl=CACHE_TTL, max_stale=None):
+    async def fill():
+        return encode_json_body(await factory())
+    return await async_cached(key, fill, ttl, max_stale)
+
+
+async def read_http_headers(reader):
+    lines = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionResetError('connection closed while reading headers')
+        if line in (b'\r\n', b'\n'):
+            break
+        lines.append(line)
+        if len(lines) > 100:
+            raise ValueError('too many headers')
+    return email.parser.Parser(_class=http.client.HTTPMessage).parsestr(b''.join(lines).decode('iso-8859-1'))
+
+
+async def read_chunked_body(reader):
+    chunks = []
+    while True:
+        size_line = await reader.readline()
+        size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+        if size == 0:
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            return b''.join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+async def read_http_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError('upstream closed the connection')
+    version, status, reason = (status_line.decode('iso-8859-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+    headers = await read_http_headers(reader)
+    keep_alive = version == 'HTTP/1.1' and str(headers.get('Connection') or '').lower() != 'close'
+    if str(headers.get('Transfer-Encoding') or '').lower() == 'chunked':
+        body = await read_chunked_body(reader)
+    elif headers.get('Content-Length') is not None:
+        body = await reader.readexactly(int(headers['Content-Length']))
+    else:
+        body = await reader.read()
+        keep_alive = False
+    return int(status), reason, headers, body, keep_alive
+
+
+def async_upstream_slots(netloc):
+    slots = ASYNC_UPSTREAM_SLOTS.get(netloc)
+    if slots is None:
+        slots = ASYNC_UPSTREAM_SLOTS[netloc] = asyncio.Semaphore(UPSTREAM_HOST_CONCURRENCY)
+    return slots
+
+
+async def async_upstream_request(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    for hop in range(UPSTREAM_MAX_REDIRECTS + 1):
+        try:
+            return await async_upstream_request_once(url, method, body, headers, timeout, deadline)
+        except urllib.error.HTTPError as exc:
+            url = upstream_redirect_url(exc, url, method, hop)
+
+
+async def async_upstream_request_once(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    netloc = urllib.parse.urlsplit(url).netloc
+    budget = deadline_timeout(deadline, timeout)
+    probe = upstream_breaker_allow(netloc)
+    try:
+        data = await async_pooled_upstream_request(url, method, body, headers, budget)
+    except asyncio.CancelledError:
+        # The caller gave up; that says nothing about the host.
+        upstream_breaker_record(netloc, None, probe)
+        raise
+    except Exception as exc:
+        upstream_breaker_record(netloc, upstream_outcome(exc, budget < timeout), probe, exc)
+        raise
+    upstream_breaker_record(netloc, True, probe)
+    return data
+
+
+async def async_pooled_upstream_request(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT):
+    parsed = urllib.parse.urlsplit(url)
+    secure = parsed.scheme == 'https'
+    port = parsed.port or (443 if secure else 80)
+    target = parsed.path or '/'
+    if parsed.query:
+        target = f'{target}?{parsed.query}'
+    request_headers = {
+        'Host': parsed.netloc,
+        'User-Agent': UPSTREAM_USER_AGENT,
+        'Accept': 'application/json',
+        'Connection': 'keep-alive',
+        **(headers or {}),
+    }
+    if body is not None:
+        request_headers['Content-Length'] = str(len(body))
+    head = f'{method} {target} HTTP/1.1\r\n' + ''.join(f'{k}: {v}\r\n' for k, v in request_headers.items()) + '\r\n'
+    payload = head.encode('iso-8859-1') + (body or b'')
+    idle = ASYNC_UPSTREAM_POOLS.setdefault((parsed.scheme, parsed.netloc), [])
+    slots = async_upstream_slots(parsed.netloc)
+    call_deadline = time.monotonic() + timeout
+    try:
+        await asyncio.wait_for(slots.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise UpstreamSaturated(f'{parsed.netloc} concurrency limit reached') from None
+    try:
+        timeout = upstream_slot_budget(call_deadline, parsed.netloc)
+        for attempt in (0, 1):
+            conn = None
+            while idle and conn is None:
+                candidate = idle.pop()
+                if candidate[0].at_eof():
+                    candidate[1].close()
+                else:
+                    conn = candidate
+            reused = conn is not None
+            if conn is None:
+                conn = await asyncio.wait_for(
+                    asyncio.open_connection(parsed.hostname, port, ssl=UPSTREAM_SSL_CONTEXT if secure else None),
+                    timeout,
+                )
+            reader, writer = conn
+            try:
+                writer.write(payload)
+                await writer.drain()
+                status, reason, resp_headers, data, keep_alive = await asyncio.wait_for(read_http_response(reader), timeout)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            if keep_alive and len(idle) < UPSTREAM_IDLE_PER_HOST:
+                idle.append(conn)
+            else:
+                writer.close()
+            if status >= 300:
+                raise urllib.error.HTTPError(url, status, reason, resp_headers, None)
+            return data
+    finally:
+        slots.release()
+
+
+async def async_upstream_json(url, method='GET', body=None, headers=None, timeout=UPSTREAM_TIMEOUT, deadline=None):
+    return json.loads((await async_upstream_request(url, method, body, headers, timeout, deadline)).decode('utf-8'))
+
+
+async def async_fetch_json(url, params):
+    return await async_upstream_json(f'{url}?{urllib.parse.urlencode(params)}', timeout=8)
+
+
+async def async_station_route_rows(key, station):
+    load_bus_route_store()
+    station_id = str(station['stationId'])
+    backing_off = station_routes_backing_off(station_id)
+    if backing_off is not None:
+        return backing_off
+    async def factory():
+        fetched_at = time.time()
+        try:
+            routes = station_routes_from_data(await async_fetch_json(GG_BASE_STATION_ROUTES, bus_station_params(key, station)))
+        except Exception:
+            station_route_refresh_failed(station_id)
+            raise
+        BUS_ROUTE_RETRY_AT.pop(station_id, None)
+        save_bus_route_store(station_id, routes, fetched_at)
+        return routes
+    try:
+        return await async_cached(f'bus-station-routes:{station_id}', factory, BUS_ROUTE_CACHE_TTL, BUS_ROUTE_CACHE_MAX_STALE)
+    except Exception:
+        return []
+
+
+async def async_fetch_bus_stations(stations):
+    key = bus_api_key()
+    if not key:
+        return [parse_arrivals(s) for s in stations]
+    jobs = [
+        (station, asyncio.ensure_future(async_station_route_rows(key, station)), asyncio.ensure_future(async_fetch_json(GG_BASE_ARRIVAL, bus_station_params(key, station))))
+        for station in stations
+    ]
+    await asyncio.wait([task for _, routes_task, arrivals_task in jobs for task in (routes_task, arrivals_task)], timeout=BUS_FETCH_DEADLINE)
+    results = []
+    failures = []
+    for station, routes_task, arrivals_task in jobs:
+        if not arrivals_task.done() or arrivals_task.exception() is not None:
+            reason = str(arrivals_task.exception()) if arrivals_task.done() else '응답 시간 초과'
+            arrivals_task.cancel()
+            routes_task.cancel()
+            failures.append(reason)
+            results.append({**station, 'arrivals': [], 'note': f'정류장 정보를 불러오지 못했습니다: {reason}'})
+            continue
+        route_rows = routes_task.result() if routes_task.done() else []
+        routes_task.cancel()
+        results.append(build_station_arrivals(station, route_rows, arrivals_task.result()))
+    if stations and len(failures) == len(stations):
+        raise RuntimeError(failures[0])
+    return results
+
+
+async def async_fetch_line_positions(deadline=None):
+    data = await async_upstream_json(subway_position_url(), timeout=8, deadline=deadline)
+    return line_positions_from_rows(data.get('realtimePositionList') or [])
+
+
+async def async_fetch_kma_source(url, base_date, base_time, deadline=None):
+    params = {'base_date': base_date, 'base_time': base_time}
+    items = kma_items_from_data(await async_upstream_json(kma_url(url, params), timeout=10, deadline=deadline))
+    if not items:
+        raise RuntimeError(f'KMA {base_date} {base_time} is not published yet')
+    return {'baseDate': base_date, 'baseTime': base_time, 'items': items}
+
+
+async def async_kma_source(name, url, deadline=None):
+    # Same schedule, backoff and probe lock as kma_source(), so worker threads
+    # and coroutines never probe KMA for the same source at once.
+    latest, base_date, base_time, due = kma_source_plan(name)
+    if not due:
+        cache_stat(f'weather-source:{name}', 'hits')
+        return latest
+    fetch_lock = KMA_FETCH_LOCKS[name]
+    acquired = fetch_lock.acquire(blocking=False)
+    if not acquired and latest is None:
+        loop = asyncio.get_running_loop()
+        acquired = await loop.run_in_executor(None, fetch_lock.acquire, True, deadline_timeout(deadline, UPSTREAM_TIMEOUT))
+    if not acquired:
+        if latest is None:
+            raise TimeoutError('request deadline exceeded')
+        cache_stat(f'weather-source:{name}', 'servedPrevious')
+        return latest
+    try:
+        latest, base_date, base_time, due = kma_source_plan(name)
+        if not due:
+            return latest
+        cache_stat(f'weather-source:{name}', 'refreshes')
+        try:
+            value = await async_fetch_kma_source(url, base_date, base_time, deadline)
+        except Exception:
+            cache_stat(f'weather-source:{name}', 'errors')
+            if latest is None:
+                value = await async_fetch_kma_source(url, *kma_previous_base(base_date, base_time), deadline)
+                kma_source_settled(name, value, published=False)
+                return value
+            kma_source_settled(name, published=False)
+            return latest
+        kma_source_settled(name, value)
+        return value
+    finally:
+        fetch_lock.release()
+
+
+async def async_fetch_windy_weather():
+    body = windy_request_body()
+    data = await async_upstream_json(WINDY_POINT_FORECAST, 'POST', body, {'Content-Type': 'application/json'}, timeout=10)
+    return windy_weather_from_data(data)
+
+
+async def async_fetch_weather():
+    windy_task = asyncio.ensure_future(async_cached('weather-source:windy', async_fetch_windy_weather, WINDY_CACHE_TTL, WINDY_CACHE_MAX_STALE))
+    windy_task.add_done_callback(consume_flight_result)
+    deadline = time.monotonic() + REQUEST_DEADLINE
+    ncst, fcst = await asyncio.gather(
+        asyncio.wait_for(async_kma_source('kma-ncst', KMA_ULTRA_NCST, deadline), REQUEST_DEADLINE),
+        asyncio.wait_for(async_kma_source('kma-fcst', KMA_ULTRA_FCST, deadline), REQUEST_DEADLINE),
+        return_exceptions=True,
+    )
+    kma_weather = kma_weather_partial(ncst, fcst)
+    if kma_weather.get('isUnavailable'):
+        return kma_weather
+    if windy_task.done() and not windy_task.cancelled() and windy_task.exception() is None:
+        merge_windy_into_kma(kma_weather, windy_task.result())
+    return kma_weather
+
+
+async def async_handle_bus_arrivals(handler, query):
+    record_metric(handler, 'bus')
+    async def factory():
+        return bus_payload(await async_fetch_bus_stations(DEFAULT_STATIONS))
+    try:
+        encoded_json_response(handler, await async_cached_json('bus-arrivals-default', factory, CACHE_TTL, BUS_CACHE_MAX_STALE))
+    except Exception as exc:
+        json_response(handler, bus_error_payload(exc), status=502)
+
+
+async def async_handle_subway_arrivals(handler, query):
+    record_metric(handler, 'subway')
+    debug_enabled = subway_debug_enabled(query)
+    async def factory():
+        deadline = time.monotonic() + REQUEST_DEADLINE
+        arrival_data, line_positions = await asyncio.gather(
+            async_upstream_json(subway_arrival_url(), timeout=8, deadline=deadline),
+            asyncio.wait_for(async_cached('subway-line-realtime-positions', lambda: async_fetch_line_positions(deadline), SUBWAY_POSITION_CACHE_TTL), REQUEST_DEADLINE),
+            return_exceptions=True,
+        )
+        position_error = line_positions if isinstance(line_positions, Exception) else None
+        if position_error is not None:
+            line_positions = None
+        if isinstance(arrival_data, (UpstreamUnavailable, TimeoutError)):
+            return subway_fallback_payload(debug_enabled, arrival_data, line_positions, position_error)
+        if isinstance(arrival_data, Exception):
+            raise arrival_data
+        rows = arrival_data.get('realtimeArrivalList') or []
+        log_subway_events(rows)
+        parsed = parse_subway_arrivals(debug=debug_enabled, rows_override=rows)
+        return subway_partial_payload(parsed, debug_enabled, line_positions, position_error)
+    try:
+        cache_key = 'subway-arrivals-wolgot-debug' if debug_enabled else 'subway-arrivals-wolgot'
+        encoded_json_response(handler, await async_cached_json(cache_key, factory, SUBWAY_CACHE_TTL, SUBWAY_CACHE_MAX_STALE))
+    except Exception as exc:
+        json_response(handler, subway_error_payload(exc), status=502)
+
+
+async def async_handle_weather(handler, query):
+    record_metric(handler, 'ocean')
+    try:
+        encoded_json_response(handler, await async_cached_json('weather-wolgot-kma', async_fetch_weather, WEATHER_CACHE_TTL, WEATHER_CACHE_MAX_STALE))
+    except Exception as exc:
+        json_response(handler, weather_error_payload(exc), status=502)
+
+
+ASYNC_API_ROUTES = {
+    '/api/bus/arrivals': async_handle_bus_arrivals,
+    '/api/subway/arrivals': async_handle_subway_arrivals,
+    '/api/weather': async_handle_weather,
+}
+
+
+class AsyncRequest:
+    # Just enough of the BaseHTTPRequestHandler surface for the existing
+    # response helpers; the whole response is buffered and written by the
+    # connection coroutine.
+    def __init__(self, command, path, version, headers, body, client_address):
+        self.command = command
+        self.path = path
+        self.request_version = version
+        self.headers = headers
+        self.rfile = io.BytesIO(body)
+        self.wfile = io.BytesIO()
+        self.client_address = client_address
+        self.header_lines = []
+        self.cache_control_sent = False
+        self.last_request = False
+        self.stream_query = None
+        connection = str(headers.get('Connection') or '').lower()
+        self.close_connection = connection == 'close' or (version == 'HTTP/1.0' and connection != 'keep-alive')
+
+    def send_response(self, code, message=None):
+        self.header_lines = [
+            f'HTTP/1.1 {code} {message or http.HTTPStatus(code).phrase}',
+            'Server: update-tide-asyncio',
+            f'Date: {email.utils.formatdate(usegmt=True)}',
+        ]
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'cache-control':
+            self.cache_control_sent = True
+        if keyword.lower() == 'connection' and str(value).lower() == 'close':
+            self.close_connection = True
+        self.header_lines.append(f'{keyword}: {value}')
+
+    def end_headers(self):
+        if not self.cache_control_sent:
+            self.send_header('Cache-Control', 'no-store, no-cache, must-revalidate, max-age=0')
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
+        self.cache_control_sent = False
+        if (self.last_request or self.close_connection) and not any(line.lower().startswith('connection:') for line in self.header_lines):
+            self.send_header('Connection', 'close')
+        self.wfile.write(('\r\n'.join(self.header_lines) + '\r\n\r\n').encode('latin-1'))
+
+    def send_error(self, code, message=None):
+        body = f'{code} {message or http.HTTPStatus(code).phrase}\n'.encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def send_local_file(handler, url_path):
+    rel_path = urllib.parse.unquote(url_path).lstrip('/')
+    parts = rel_path.split('/')
+    allowed = rel_path == 'index.html' or parts[0] in ASYNC_FILE_ROOTS
+    if not allowed or any(not part or part.startswith('.') for part in parts):
+        return handler.send_error(404)
+    path = BASE_DIR / rel_path
+    if not path.is_file():
+        return handler.send_error(404)
+    body = path.read_bytes()
+    handler.send_response(200)
+    handler.send_header('Content-Type', mimetypes.guess_type(rel_path)[0] or 'application/octet-stream')
+    handler.send_header('Content-Length', str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+async def dispatch_async_request(request):
+    loop = asyncio.get_running_loop()
+    parsed = urllib.parse.urlparse(request.path)
+    path = parsed.path
+    if path == '/update-tide':
+        return send_redirect(request, '/update-tide/')
+    if path.startswith('/update-tide/'):
+        path = path[len('/update-tide'):]
+    if request.command == 'POST':
+        if path in ('/login', '/login/'):
+            # DB lookup and password hashing block, so they leave the loop.
+            return await loop.run_in_executor(None, handle_login, request)
+        return request.send_error(404)
+    if request.command not in ('GET', 'HEAD'):
+        return request.send_error(501)
+    if path in ('/login', '/login/'):
+        return send_login_page(request)
+    if path in ('/logout', '/logout/'):
+        return handle_logout(request)
+    query = urllib.parse.parse_qs(parsed.query)
+    if path == '/api/subway/stream':
+        # Written by the connection coroutine once the loop owns the socket.
+        request.stream_query = query
+        return
+    if path in ASYNC_API_ROUTES:
+        return await ASYNC_API_ROUTES[path](request, query)
+    if path in API_ROUTES:
+        return await loop.run_in_executor(None, API_ROUTES[path], request, query)
+    if path == '/' or path.endswith('/index.html'):
+        if not is_authenticated(request):
+            return send_redirect(request, '/update-tide/login')
+        record_metric(request, 'home', 'page')
+        return send_index_page(request) if STATIC_FINGERPRINT else send_local_file(request, 'index.html')
+    if path.startswith('/data/tide') and path.endswith('.json'):
+        record_metric(request, 'ocean')
+    if STATIC_FINGERPRINT and path.lstrip('/') in STATIC_ASSETS and path.lstrip('/') != 'index.html':
+        return send_static_asset(request, path.lstrip('/'), parsed.query)
+    return send_local_file(request, path)
+
+
+async def async_subway_stream(request, writer, query):
+    if not add_subway_stream_subscriber(1):
+        send_overloaded(request)
+        writer.write(request.wfile.getvalue())
+        await writer.drain()
+        return
+    record_metric(request, 'subway')
+    changed = asyncio.Event()
+    waiter = (asyncio.get_running_loop(), changed)
+    with SUBWAY_STREAM_CONDITION:
+        SUBWAY_STREAM_ASYNC_WAITERS.add(waiter)
+    try:
+        send_subway_stream_headers(request)
+        writer.write(request.wfile.getvalue())
+        await writer.drain()
+        last_id = last_subway_stream_event_id(request, query)
+        deadline = time.time() + SUBWAY_STREAM_MAX_SECONDS
+        while time.time() < deadline:
+            changed.clear()
+            event_id, chunk = subway_stream_event()
+            if chunk is not None and event_id != last_id:
+                last_id = event_id
+                writer.write(chunk)
+            else:
+                try:
+                    await asyncio.wait_for(changed.wait(), SUBWAY_STREAM_HEARTBEAT)
+                    continue
+                except asyncio.TimeoutError:
+                    writer.write(b': ping\n\n')
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        with SUBWAY_STREAM_CONDITION:
+            SUBWAY_STREAM_ASYNC_WAITERS.discard(waiter)
+        add_subway_stream_subscriber(-1)
+
+
+async def serve_async_connection(reader, writer):
+    peer = writer.get_extra_info('peername')
+    served = 0
+    try:
+        while served < HTTP_MAX_REQUESTS_PER_CONNECTION:
+            try:
+                request_line = await asyncio.wait_for(reader.readline(), HTTP_KEEPALIVE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+            if not request_line:
+                break
+            parts = request_line.decode('iso-8859-1').split()
+            if not parts:
+                continue
+            if len(parts) != 3:
+                break
+            command, path, version = parts
+            headers = await asyncio.wait_for(read_http_headers(reader), HTTP_KEEPALIVE_TIMEOUT)
+            length = int(headers.get('Content-Length') or 0)
+            body = await asyncio.wait_for(reader.readexactly(length), HTTP_KEEPALIVE_TIMEOUT) if length else b''
+            served += 1
+            request = AsyncRequest(command, path, version, headers, body, peer)
+            request.last_request = served >= HTTP_MAX_REQUESTS_PER_CONNECTION
+            try:
+                await dispatch_async_request(request)
+                if request.stream_query is not None:
+                    await async_subway_stream(request, writer, request.stream_query)
+                    break
+            except Exception:
+                request.wfile = io.BytesIO()
+                request.close_connection = True
+                request.send_error(500)
+            response = request.wfile.getvalue()
+            if command == 'HEAD':
+                response = response.split(b'\r\n\r\n', 1)[0] + b'\r\n\r\n'
+            writer.write(response)
+            await writer.drain()
+            if request.close_connection:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+        pass
+    except asyncio.CancelledError:
+        # Open streams and idle keep-alives are cancelled at shutdown.
+        pass
+    finally:
+        writer.close()
+
+
+def serve_asyncio(host, port):
+    async def main():
+        stopping = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopping.set)
+        server = await asyncio.start_server(serve_async_connection, host, port, reuse_address=True)
+        async with server:
+            await stopping.wait()
+    asyncio.run(main())
+
+
+def exit_on_sigterm(signum, frame):
+    # Turn SIGTERM into a normal interpreter exit so atexit flushes run.
+    raise SystemExit(0)
+
 if __name__ == '__main__':
     load_dotenv()
     port = int(os.getenv('PORT', '5179'))
     host = os.getenv('HOST', '127.0.0.1')
-    httpd = ReusableThreadingHTTPServer((host, port), Handler)
+    if STATIC_FINGERPRINT:
+        load_static_assets()
+    start_login_hash_workers()
+    if os.getenv('SERVER_MODE', 'threading') == 'asyncio':
+        print(f'update-tide asyncio server listening on http://{host}:{port}', flush=True)
+        try:
+            serve_asyncio(host, port)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop_login_hash_workers()
+        raise SystemExit(0)
+    if os.getenv('SERVER_MODE', 'threading') == 'pool':
+        workers = int(os.getenv('SERVER_WORKERS', '32'))
+        API_SLOTS = threading.BoundedSemaphore(min(workers, int(os.getenv('SERVER_API_WORKERS', '16'))))
+        # Each stream subscriber holds a worker outside API_SLOTS, so streams
+        # get their own cap (a quarter of the pool by default) and are closed
+        # sooner; EventSource reconnects and resumes from Last-Event-ID.
+        SUBWAY_STREAM_MAX_CLIENTS = min(SUBWAY_STREAM_MAX_CLIENTS, int(os.getenv('SERVER_STREAM_WORKERS', str(max(1, workers // 4)))))
+        SUBWAY_STREAM_MAX_SECONDS = min(SUBWAY_STREAM_MAX_SECONDS, SUBWAY_STREAM_POOL_MAX_SECONDS)
+        httpd = PooledHTTPServer((host, port), PooledHandler, workers, int(os.getenv('SERVER_ACCEPT_QUEUE', '64')))
+    else:
+        httpd = ReusableThreadingHTTPServer((host, port), Handler)
+    signal.signal(signal.SIGTERM, exit_on_sigterm)
     print(f'update-tide server listening on http://{host}:{port}', flush=True)
-    httpd.serve_forever()
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        stop_login_hash_workers()